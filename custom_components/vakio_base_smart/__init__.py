@@ -8,13 +8,22 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import Config
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 
 from .api import Coordinator
 from .const import DOMAIN
 from .const import CONF_USERNAME, CONF_PASSWORD, CONF_SERVER_URL, CONF_SCAN_INTERVAL
+from .const import CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
 from .const import PLATFORMS
 from .const import languages, CONF_LANGUAGE, DEFAULT_LANGUAGE, DEFAULT_SCAN_INTERVAL
 from .const import ERROR_AUTH, ERROR_CONFIG_NO_TREADY
+from .const import STORAGE_KEY, STORAGE_VERSION
+from .const import CONF_TRANSPORT, CONF_DEVICES, DEFAULT_TRANSPORT, DEFAULT_DEVICE
+from .const import CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+from .const import CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION
+from .const import CONF_SPEED_COUNT, DEFAULT_SPEED_COUNT
+from .mqtt_transport import parse_devices
+from .services import async_setup_services
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -24,6 +33,7 @@ _LOGGER: logging.Logger = logging.getLogger(__package__)
 async def async_setup(hass: HomeAssistant, config: Config) -> bool:
     """Настройка интеграции с использованием YAML не поддерживается."""
     _LOGGER.info("Вызов функции __init__->async_setup()")
+    async_setup_services(hass)
 
     return True
 
@@ -42,17 +52,43 @@ async def async_setup_entry(hass: HomeAssistant, conf: ConfigEntry) -> bool:
         update_interval = timedelta(seconds=conf.options[CONF_SCAN_INTERVAL])
     else:
         update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
-    coordinator = Coordinator(hass, username, password, server, language, update_interval=update_interval)
+    update_interval_max = timedelta(
+        seconds=conf.options.get(CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX)
+    )
+    coordinator = Coordinator(
+        hass,
+        username,
+        password,
+        server,
+        language,
+        update_interval=update_interval,
+        update_interval_max=update_interval_max,
+        entry_id=conf.entry_id,
+        transport=conf.options.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+        devices=parse_devices(conf.options.get(CONF_DEVICES, DEFAULT_DEVICE)),
+        command_timeout=conf.options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+        history_retention=timedelta(
+            hours=conf.options.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION)
+        ),
+        speed_count=conf.options.get(CONF_SPEED_COUNT, DEFAULT_SPEED_COUNT),
+    )
     # Аутентификация, для проверки корректности авторизационных данных.
     if not await coordinator.async_login():
         raise ConfigEntryAuthFailed(ERROR_AUTH)
-    # Выполнение обновления данных.
-    await coordinator.async_config_entry_first_refresh()
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady(ERROR_CONFIG_NO_TREADY)
+    # Сущности создаются по сохранённому состоянию устройств, а первое обновление
+    # с сервера выполняется в фоне. Без сохранённого состояния обновление ожидается.
+    if await coordinator.async_restore():
+        conf.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {conf.entry_id}"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady(ERROR_CONFIG_NO_TREADY)
     # Регистрация интеграции в Home Assistant.
     hass.data[DOMAIN][conf.entry_id] = coordinator
-    conf.add_update_listener(async_reload_entry)
+    coordinator.async_start_stream()
+    conf.async_on_unload(coordinator.async_stop_stream)
     conf.async_on_unload(conf.add_update_listener(config_entry_update_listener))
     await hass.config_entries.async_forward_entry_setups(conf, PLATFORMS)
 
@@ -81,6 +117,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # Отмена расписания обновлений и подписок координатора.
+        await coordinator.async_shutdown()
         _LOGGER.info(
             f"Координатор Coordinator() домена {DOMAIN} удалён, entry_id: {entry.entry_id}."
         )
@@ -88,7 +126,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Перезагрузка интеграции."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Удаление сохранённого состояния устройств при удалении интеграции."""
+    await Store(
+        hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id)
+    ).async_remove()
@@ -1,34 +1,73 @@
 """
 Класс взаимодействия интеграции с сервисом посредством REST FULL API.
 """
+import asyncio
 import decimal
-import requests
+import random
+import time
 # from ppretty import ppretty
 import logging
-from datetime import datetime, timedelta, timezone
-from requests.exceptions import HTTPError, ConnectionError
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Callable
+from urllib.parse import quote
 import json
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import DOMAIN, DEFAULT_SERVER_URL, DEFAULT_LANGUAGE, SERVER_WORK_TO_FAN_MODE
-from .types import ConditionResponse
+from .const import DEFAULT_REQUEST_TIMEOUT, DEFAULT_STREAM_READ_TIMEOUT
+from .const import DEFAULT_STREAM_RECONNECT_DELAY, DEFAULT_COMMAND_COALESCE_DELAY
+from .const import DEFAULT_COMMAND_CONFIRM_TIMEOUT
+from .const import DEFAULT_COMMAND_TIMEOUT, DEFAULT_COMMAND_CONCURRENCY
+from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_MAX
+from .const import DEFAULT_SCAN_FAST_WINDOW, DEFAULT_SCAN_JITTER
+from .const import DEFAULT_CACHE_SAVE_DELAY, STORAGE_KEY, STORAGE_VERSION
+from .const import DEFAULT_HISTORY_RETENTION, DEFAULT_SPEED_COUNT
+from .const import DEFAULT_DEVICE, TRANSPORT_HTTP, TRANSPORT_MQTT
+from .breaker import CircuitBreaker
+from .history import HISTORY_FIELDS, History
+from .metrics import Metrics
+from .mqtt_transport import MqttApi
+from .types import CONDITION_FIELDS, TELEMETRY_FIELDS
+from .types import ConditionResponse, PendingCommand, PingStatistics, Schedule
+from .types import UnsupportedEndpoint
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 HEADER_ACCEPT: str = "Accept"
 HEADER_CONTENT_TYPE: str = "Content-type"
+HEADER_ETAG: str = "ETag"
+HEADER_IF_NONE_MATCH: str = "If-None-Match"
 HEADER_JSON: str = "application/json; charset=UTF-8"
 REQUEST_HEADER_JSON: dict[str, str] = {HEADER_CONTENT_TYPE: HEADER_JSON}
 REQUEST_HEADER_ACCEPT: dict[str, str] = {HEADER_ACCEPT: "application/json"}
+REQUEST_HEADER_EVENTS: dict[str, str] = {HEADER_ACCEPT: "text/event-stream"}
 
 
 class Coordinator(DataUpdateCoordinator):
-    """Класс взаимодействия с сервисом."""
+    """
+    Класс взаимодействия с сервисом.
+    Состояние всех вентиляционных систем сервера обновляется одним запросом.
+
+    В conditions хранится состояние, полученное с сервера, а в data - состояние
+    для отображения: поверх полученного накладываются значения отправленных, но
+    ещё не подтверждённых сервером команд.
 
-    lastUpdate: datetime | None = None
-    condition: ConditionResponse | None = None
+    Интервал опроса адаптивный: после команды или обнаруженного изменения
+    сервер опрашивается с минимальным интервалом, пока состояние не меняется,
+    интервал удваивается до максимального, а при недоступности сервера или
+    устройств используется максимальный интервал со случайным разбросом.
+    """
+
+    streaming: bool = False
 
     def __init__(
         self,
@@ -38,19 +77,95 @@ class Coordinator(DataUpdateCoordinator):
         server: str = DEFAULT_SERVER_URL,
         language: str = DEFAULT_LANGUAGE,
         update_interval: timedelta | None = None,
+        update_interval_max: timedelta | None = None,
+        entry_id: str | None = None,
+        transport: str = TRANSPORT_HTTP,
+        devices: list[str] | None = None,
+        command_timeout: float = DEFAULT_COMMAND_TIMEOUT,
+        history_retention: timedelta | None = None,
+        speed_count: int = DEFAULT_SPEED_COUNT,
     ) -> None:
-        """Конструктор."""
-        super().__init__(hass, _LOGGER, name=DOMAIN)
+        """
+        Конструктор.
+        Если передан идентификатор конфигурации, последнее известное состояние
+        устройств сохраняется в хранилище Home Assistant.
+        При транспорте MQTT состояние устройств devices принимается напрямую из
+        топиков MQTT брокера, минуя сервер.
+        Отправка команды устройству, включая ожидание очереди, ограничена
+        command_timeout секундами.
+        Изменения отображаемого состояния устройств хранятся в истории в
+        течение history_retention.
+        Количество скоростей вентиляции speed_count определяется моделью
+        вентиляционных систем сервера.
+        """
+        if history_retention is None:
+            history_retention = timedelta(hours=DEFAULT_HISTORY_RETENTION)
+        if update_interval is None:
+            update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+        if update_interval_max is None:
+            update_interval_max = timedelta(seconds=DEFAULT_SCAN_INTERVAL_MAX)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=update_interval,
+            always_update=False,
+        )
         self._username = username
         self._password = password
         self._server = server
         self._language = language
-        self.api = Api(server, username, password, language)
-        self.update_interval = update_interval
+        self.speed_count = speed_count
+        self.api: Api | MqttApi
+        if transport == TRANSPORT_MQTT:
+            self.api = MqttApi(hass, devices or [DEFAULT_DEVICE])
+        else:
+            self.api = Api(
+                async_get_clientsession(hass), server, username, password, language
+            )
+        self.conditions: dict[str, ConditionResponse] = {}
+        self._poll_interval = update_interval
+        self._poll_interval_max = max(update_interval, update_interval_max)
+        # Время окончания окна частого опроса.
+        self._fast_poll_until: float = 0
+        self._stream: asyncio.Task | None = None
+        # Очереди команд устройств: последние значения полей, ожидающие отправки.
+        self._commands: dict[str, dict[str, Any]] = {}
+        # Ожидающие результата отправки команд из очередей устройств.
+        self._command_futures: dict[str, list[asyncio.Future[bool]]] = {}
+        # Одновременно выполняемые запросы команд к серверу.
+        self._command_semaphore = asyncio.Semaphore(DEFAULT_COMMAND_CONCURRENCY)
+        self._command_timeout = command_timeout
+        self._commands_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=DEFAULT_COMMAND_COALESCE_DELAY,
+            immediate=False,
+            function=self._async_send_commands,
+        )
+        # Команды устройств, ожидающие подтверждения сервером.
+        self._pending: dict[str, PendingCommand] = {}
+        # Изменившиеся при последнем обновлении поля состояния устройств.
+        # Устройства без изменений в словарь не попадают.
+        self.changes: dict[str, frozenset[str]] = {}
+        self.metrics = Metrics()
+        # Недельные программы устройств, выполняемые сервером; None - сервер
+        # программы не поддерживает или они ещё не получены.
+        self.schedules: dict[str, Schedule] | None = None
+        self.history = History(history_retention.total_seconds())
+        # Последнее записанное в историю отображаемое состояние устройств.
+        self._recorded: dict[str, ConditionResponse] = {}
+        self._store: Store | None = None
+        # Последнее состояние с сервера, запись которого запланирована в хранилище.
+        self._stored: dict[str, ConditionResponse] = {}
+        if entry_id is not None:
+            self._store = Store(
+                hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)
+            )
 
     async def async_login(self) -> bool:
         try:
-            await self.hass.async_add_executor_job(self.api.login)
+            await self.api.login()
         except Exception as ex:
             _LOGGER.error(
                 f'Не удалось авторизоваться на сервере "{self._server}", ошибка: {ex}'
@@ -58,178 +173,926 @@ class Coordinator(DataUpdateCoordinator):
             return False
         return True
 
-    async def _async_update_data(self) -> None:
-        """Запрос данных с общей информацией."""
-        await self._async_update(datetime.now(timezone.utc))
+    async def _async_update_data(self) -> dict[str, ConditionResponse]:
+        """
+        Запрос данных с общей информацией всех вентиляционных систем.
+        Единственный источник опроса сервера: расписание координатора по
+        update_interval. Слушатели уведомляются только при изменении данных.
+        """
+        started: float = self.hass.loop.time()
+        conditions = await self.api.Conditions()
+        self.metrics.Poll(self.hass.loop.time() - started, conditions is not None)
+        if conditions is None:
+            self.changes = {}
+            self._adapt_interval(changed=False, available=False, reachable=False)
+            raise UpdateFailed(
+                f"Не удалось получить состояние с сервера {self._server}"
+            )
+        self._adapt_interval(
+            changed=self._state_changed(conditions),
+            available=any(c.Available for c in conditions.values()),
+        )
+        self.conditions = conditions
+        view = self._view()
+        self._diff(view)
+
+        return view
+
+    def _state_changed(self, conditions: dict[str, ConditionResponse]) -> bool:
+        """
+        Возвращается "истина", если изменилось состояние вентиляционных систем.
+        Изменение только телеметрии не ускоряет опрос сервера.
+        """
+        if conditions == self.conditions:
+            return False
+        if conditions.keys() != self.conditions.keys():
+            return True
+
+        return any(
+            condition.Diff(self.conditions[device]) - TELEMETRY_FIELDS
+            for device, condition in conditions.items()
+        )
+
+    async def async_restore(self) -> bool:
+        """
+        Восстановление последнего известного состояния устройств из хранилища.
+        Возвращается "истина", если состояние восстановлено; слушатели не
+        уведомляются, данные считываются сущностями при добавлении.
+        """
+        if self._store is None:
+            return False
+        cached: dict[str, dict[str, Any]] | None = await self._store.async_load()
+        if not cached:
+            return False
+        try:
+            conditions = {
+                device: ConditionResponse.Parse(condition)
+                for device, condition in cached.items()
+            }
+        except (ValueError, TypeError, AttributeError) as err:
+            _LOGGER.warning(f"Не удалось восстановить состояние устройств: {err}")
+            return False
+        self.conditions = self._stored = conditions
+        self.data = self._recorded = self._view()
+        _LOGGER.debug(f"Восстановлено состояние устройств: {list(conditions)}")
+
+        return True
+
+    def _cache_data(self) -> dict[str, dict[str, Any]]:
+        """Данные для сохранения в хранилище: состояние, полученное с сервера."""
+        return {
+            device: condition.Dump() for device, condition in self.conditions.items()
+        }
 
-    async def _async_update(self, now: datetime) -> None:
+    def _adapt_interval(
+        self, changed: bool, available: bool, reachable: bool = True
+    ) -> None:
         """
-        Функция регистритуется в hass, во всех датчиках и устройствах и контролирует
-        обновление данных через API не чаще чем раз в 2 секунды.
+        Расчёт интервала до следующего опроса сервера.
+        Пока установлен поток событий, опрос отключён и интервал не меняется.
+        Если сервер не отвечает, следующий опрос выполняется после окончания
+        ожидания автоматического выключателя. Окно частого опроса после
+        изменения или команды имеет приоритет над редким опросом, который
+        выбирается, только когда недоступны все устройства сервера.
         """
-        update: bool = False
-        if self.lastUpdate == None:
-            self.lastUpdate = now
-            update = True
-        diff = now - self.lastUpdate
-        if diff > timedelta(seconds=2):
-            self.lastUpdate = now
-            update = True
-        if not update:
+        if self.streaming:
+            return
+        now: float = self.hass.loop.time()
+        if changed:
+            self._fast_poll_until = now + DEFAULT_SCAN_FAST_WINDOW
+        jitter: float = 1 + random.random() * DEFAULT_SCAN_JITTER
+        if not reachable:
+            backoff = timedelta(seconds=self.api.breaker.Remaining())
+            interval = min(
+                max(backoff, self._poll_interval), self._poll_interval_max
+            ) * jitter
+        elif now < self._fast_poll_until:
+            interval = self._poll_interval
+        elif not available:
+            interval = self._poll_interval_max * jitter
+        else:
+            interval = min(
+                (self.update_interval or self._poll_interval) * 2,
+                self._poll_interval_max,
+            )
+        if interval != self.update_interval:
+            _LOGGER.debug(f"Интервал опроса сервера {self._server}: {interval}")
+        self.update_interval = interval
+
+    @callback
+    def _async_poll_fast(self) -> None:
+        """Переход к частому опросу сервера после команды пользователя."""
+        self._fast_poll_until = self.hass.loop.time() + DEFAULT_SCAN_FAST_WINDOW
+        if self.streaming or self.update_interval == self._poll_interval:
+            return
+        self.update_interval = self._poll_interval
+        # Перепланирование уже запланированного длинного интервала.
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_start_stream(self) -> None:
+        """Запуск подписки на поток изменений состояния устройств."""
+        if self._stream is None:
+            self._stream = self.hass.async_create_background_task(
+                self._async_stream(), f"{DOMAIN} stream {self._server}"
+            )
+
+    @callback
+    def async_stop_stream(self) -> None:
+        """Остановка подписки на поток изменений состояния устройств."""
+        if self._stream is not None:
+            self._stream.cancel()
+            self._stream = None
+        self.streaming = False
+
+    async def async_shutdown(self) -> None:
+        """
+        Остановка потока событий и расписания обновлений координатора.
+        Накопленные в очереди команды отправляются немедленно.
+        """
+        self.async_stop_stream()
+        self._commands_debouncer.async_shutdown()
+        await self._async_send_commands()
+        for pending in self._pending.values():
+            if pending.Cancel is not None:
+                pending.Cancel()
+        self._pending = {}
+        if self._store is not None and self.conditions:
+            await self._store.async_save(self._cache_data())
+        await super().async_shutdown()
+
+    async def _async_stream(self) -> None:
+        """
+        Приём изменений состояния устройств из потока событий сервера.
+        Пока поток установлен, периодический опрос отключён. При обрыве потока
+        опрос возобновляется, а подключение повторяется с задержкой.
+        """
+        while True:
+            try:
+                async for device, condition in self.api.Events():
+                    self._set_streaming(True)
+                    self.conditions = {**self.conditions, device: condition}
+                    self._async_publish(self._view())
+            except asyncio.CancelledError:
+                raise
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+                TypeError,
+                KeyError,
+                ConnectionError,
+            ) as err:
+                if self.streaming:
+                    _LOGGER.warning(f"Поток событий сервера прерван: {err}")
+                else:
+                    _LOGGER.debug(f"Не удалось подписаться на поток событий: {err}")
+            self._set_streaming(False)
+            # Пока выключатель открыт, подключение не повторяется.
+            await asyncio.sleep(
+                max(DEFAULT_STREAM_RECONNECT_DELAY, self.api.breaker.Remaining())
+            )
+
+    def _set_streaming(self, streaming: bool) -> None:
+        """Переключение между потоком событий и периодическим опросом."""
+        if self.streaming == streaming:
+            return
+        self.streaming = streaming
+        if streaming:
+            _LOGGER.info(f"Установлен поток событий {self.api.breaker.Name}")
+            self.update_interval = None
             return
-        # _LOGGER.warning(f'{now.astimezone(tz=tz.tzlocal())} - выполнение запроса к API: /condition')
-        self.condition = await self.hass.async_add_executor_job(self.api.Condition)
+        self.update_interval = self._poll_interval
+        self._fast_poll_until = self.hass.loop.time() + DEFAULT_SCAN_FAST_WINDOW
+        if self._listeners:
+            self.hass.async_create_task(self.async_request_refresh())
 
-    def Available(self) -> bool | None:
+    def Devices(self) -> list[str]:
+        """Идентификаторы вентиляционных систем сервера."""
+        return list(self.conditions)
+
+    def _condition(self, device: str) -> ConditionResponse | None:
+        """Отображаемое состояние вентиляционной системы."""
+        if self.data is None:
+            return None
+
+        return self.data.get(device)
+
+    def Available(self, device: str) -> bool | None:
         """Состояние доступности сервера и вентиляционной системы на сервере."""
-        if self.condition == None:
+        condition = self._condition(device)
+        if condition == None:
+            return None
+
+        return condition.Available
+
+    def Ping(self, device: str) -> PingStatistics | None:
+        """Сводка последних проверок доступности вентиляционной системы сервером."""
+        condition = self._condition(device)
+        if condition is None:
             return None
 
-        return self.condition.Available
+        return condition.Ping
 
-    def Speed(self) -> decimal.Decimal | None:
+    def Speed(self, device: str) -> decimal.Decimal | None:
         """Текущая скорость работы вентиляционной системы."""
-        if self.condition == None:
+        condition = self._condition(device)
+        if condition == None:
             return None
-        if not self.condition.State and self.condition.Speed > 0:
-            self.condition.Speed = 0
+        if not condition.State:
+            return 0
 
-        return self.condition.Speed
+        return condition.Speed
 
-    def FanMode(self) -> str | None:
+    def FanMode(self, device: str) -> str | None:
         """
         Текущей предопределённый режим работы вентиляционной системы.
         Возвращается константа.
         """
-        if self.condition == None:
+        condition = self._condition(device)
+        if condition == None:
             return None
-        if self.condition.Speed == 0:
+        if not condition.State or condition.Speed == 0:
             return None
-        work: str = self.condition.Work
+        work: str = condition.Work
 
         return SERVER_WORK_TO_FAN_MODE.get(work, None)
 
-    def IsOn(self) -> bool | None:
+    def IsOn(self, device: str) -> bool | None:
         """
         Текущее состояние включённости вентиляционной системы.
         Если вентиляционная система включена, возвращается "истина", если выключена, "ложь".
         Если состояние не известно, возвращается None.
         """
-        if self.condition == None:
+        condition = self._condition(device)
+        if condition == None:
             return None
 
-        return self.condition.State
+        return condition.State
 
-    def SetTurnOn(self) -> None:
+    def SetTurnOn(
+        self, device: str, on_done: Callable[[bool], None] | None = None
+    ) -> asyncio.Future[bool]:
         """Выполнение команды включения вентиляционной системы."""
-        self.condition.State = "on"
-        self.hass.async_add_executor_job(self.api.State, True)
+        self._expect(device, State=True)
+        return self._queue_command(device, on_done, state=True)
 
-    def SetTurnOff(self) -> None:
+    def SetTurnOff(
+        self, device: str, on_done: Callable[[bool], None] | None = None
+    ) -> asyncio.Future[bool]:
         """Выполнение команды отключения вентиляционной системы."""
-        self.condition.State = "off"
-        self.hass.async_add_executor_job(self.api.State, False)
+        self._expect(device, State=False)
+        return self._queue_command(device, on_done, state=False)
 
-    def SetSpeed(self, speed: decimal.Decimal) -> None:
+    def SetSpeed(
+        self,
+        device: str,
+        speed: decimal.Decimal,
+        on_done: Callable[[bool], None] | None = None,
+    ) -> asyncio.Future[bool]:
         """Выполнение команды установки скорости вентиляции."""
-        self.condition.Speed = speed
-        self.hass.async_add_executor_job(self.api.Speed, speed)
+        self._expect(device, Speed=speed)
+        return self._queue_command(device, on_done, speed=speed)
 
-    def SetWorkMode(self, workmode: str) -> None:
+    def SetWorkMode(
+        self,
+        device: str,
+        workmode: str,
+        on_done: Callable[[bool], None] | None = None,
+    ) -> asyncio.Future[bool]:
         """Выполнение команды установки режима работы вентиляции."""
-        self.condition.Work = workmode
-        self.hass.async_add_executor_job(self.api.Workmode, workmode)
+        self._expect(device, Work=workmode)
+        return self._queue_command(device, on_done, workmode=workmode)
+
+    async def async_apply_scene(
+        self,
+        devices: list[str],
+        state: bool | None = None,
+        speed: decimal.Decimal | None = None,
+        workmode: str | None = None,
+    ) -> dict[str, bool]:
+        """
+        Совместная установка состояния, скорости и режима работы нескольких
+        вентиляционных систем. Команды попадают в одно окно объединения и
+        отправляются серверу одним пакетным запросом.
+        Возвращается результат отправки по каждому устройству.
+        """
+        previous = self.data
+        futures: dict[str, list[asyncio.Future[bool]]] = {}
+        for device in devices:
+            commands = futures.setdefault(device, [])
+            if state is not None:
+                commands.append(
+                    self.SetTurnOn(device) if state else self.SetTurnOff(device)
+                )
+            if workmode is not None:
+                commands.append(self.SetWorkMode(device, workmode))
+            if speed is not None and state is not False:
+                commands.append(self.SetSpeed(device, speed))
+        # Ожидаемое состояние публикуется сразу для всех сущностей устройств,
+        # изменения считаются относительно состояния до команд.
+        self.data = previous
+        self._async_publish(self._view())
+        results = await asyncio.gather(
+            *[asyncio.gather(*commands) for commands in futures.values()]
+        )
+        return {device: all(ok) for device, ok in zip(futures, results)}
+
+    async def async_refresh_schedules(self) -> bool:
+        """
+        Получение недельных программ устройств с сервера.
+        Программы запрашиваются не при каждом опросе, а по требованию: они
+        изменяются только через службы интеграции или API сервера.
+        Возвращается "истина", если программы получены.
+        """
+        schedules = await self.api.Schedules()
+        if schedules is None:
+            return False
+        self.schedules = schedules
+        self._async_notify_schedules()
+        return True
+
+    async def async_set_schedule(self, device: str, schedule: Schedule) -> bool:
+        """
+        Установка недельной программы устройства на сервере.
+        Возвращается "истина", если сервер принял программу.
+        """
+        if not await self.api.SetSchedule(device, schedule):
+            return False
+        self.schedules = {**(self.schedules or {}), device: schedule}
+        self._async_notify_schedules()
+        return True
+
+    @callback
+    def _async_notify_schedules(self) -> None:
+        """
+        Уведомление слушателей об изменении программ. Состояние устройств не
+        изменилось, поэтому изменения полей не передаются.
+        """
+        self.changes = {}
+        self.async_update_listeners()
+
+    def _expect(self, device: str, **fields: Any) -> None:
+        """
+        Регистрация ожидаемого после команды состояния устройства.
+        Ожидаемые значения сразу становятся отображаемым состоянием, а
+        противоречащие им данные сервера не показываются, пока команда не будет
+        подтверждена или не истечёт время ожидания.
+        """
+        now: float = self.hass.loop.time()
+        pending = self._pending.setdefault(device, PendingCommand())
+        pending.Expect(fields, now, now + DEFAULT_COMMAND_CONFIRM_TIMEOUT)
+        if pending.Cancel is not None:
+            pending.Cancel()
+        pending.Cancel = async_call_later(
+            self.hass, DEFAULT_COMMAND_CONFIRM_TIMEOUT, self._async_check_pending
+        )
+        # Слушатели не уведомляются: сущность, отправившая команду, обновляет своё
+        # состояние сама, а повторный вызов её обработчика привёл бы к рекурсии.
+        self.data = self._view()
+        self._record(self.data)
+
+    def _view(self) -> dict[str, ConditionResponse]:
+        """
+        Формирование отображаемого состояния устройств.
+        Подтверждённые сервером команды и команды с истекшим временем ожидания
+        удаляются; для последних состояние возвращается к полученному с сервера.
+        """
+        now: float = self.hass.loop.time()
+        view = dict(self.conditions)
+        for device, pending in list(self._pending.items()):
+            condition = self.conditions.get(device)
+            if condition is None:
+                continue
+            if pending.Confirmed(condition):
+                self._drop_pending(device)
+                self.metrics.RoundTrip(now - pending.Started)
+                continue
+            if pending.Deadline <= now:
+                self._drop_pending(device)
+                _LOGGER.warning(
+                    f"Устройство {device} не подтвердило команду {pending.Expected} "
+                    f"за {DEFAULT_COMMAND_CONFIRM_TIMEOUT} с, состояние возвращено "
+                    "к полученному с сервера"
+                )
+                continue
+            view[device] = pending.Apply(condition)
+
+        return view
+
+    def _diff(self, view: dict[str, ConditionResponse]) -> None:
+        """
+        Расчёт изменившихся полей отображаемого состояния устройств относительно
+        предыдущего. Для исчезнувших устройств изменившимися считаются все поля.
+        """
+        previous: dict[str, ConditionResponse] = self.data or {}
+        changes: dict[str, frozenset[str]] = {}
+        for device, condition in view.items():
+            if fields := condition.Diff(previous.get(device)):
+                changes[device] = fields
+        for device in previous.keys() - view.keys():
+            changes[device] = CONDITION_FIELDS
+        self.changes = changes
+        self._record(view)
+
+    def _record(self, view: dict[str, ConditionResponse]) -> None:
+        """
+        Запись изменений состояния, доступности, скорости и режима в историю
+        относительно последнего записанного отображаемого состояния, и
+        планирование записи в хранилище изменившегося состояния с сервера.
+        Отображаемое состояние после команды записывается в историю сразу, а
+        подтверждение команды сервером повторно не записывается.
+        """
+        now: float = time.time()
+        for device, condition in view.items():
+            if condition.Diff(self._recorded.get(device)) & HISTORY_FIELDS:
+                self.history.Add(now, device, condition)
+        for device in self._recorded.keys() - view.keys():
+            self.history.Add(now, device, None)
+        self._recorded = view
+        if self._store is not None and self.conditions != self._stored:
+            self._stored = self.conditions
+            self._store.async_delay_save(self._cache_data, DEFAULT_CACHE_SAVE_DELAY)
+
+    @callback
+    def _async_publish(self, view: dict[str, ConditionResponse]) -> None:
+        """Установка нового отображаемого состояния и уведомление слушателей."""
+        self._diff(view)
+        self.async_set_updated_data(view)
+
+    def _drop_pending(self, device: str) -> None:
+        """Удаление ожидания подтверждения команды устройства."""
+        if (pending := self._pending.pop(device, None)) is not None:
+            if pending.Cancel is not None:
+                pending.Cancel()
+
+    @callback
+    def _async_check_pending(self, _now: Any) -> None:
+        """Проверка истечения времени ожидания подтверждения команд."""
+        view = self._view()
+        if view != self.data:
+            self._async_publish(view)
+
+    def _queue_command(
+        self,
+        device: str,
+        on_done: Callable[[bool], None] | None = None,
+        **fields: Any,
+    ) -> asyncio.Future[bool]:
+        """
+        Постановка команды в очередь вентиляционной системы.
+        Команды, поступившие в течение короткого окна, объединяются: для каждого
+        поля отправляется только последнее значение одним запросом к серверу.
+        Возвращается future с результатом отправки, который можно ожидать или
+        получить функцией on_done без ожидания. Если до отправки отменены все
+        future очереди устройства, команды устройства не отправляются.
+        """
+        done: asyncio.Future[bool] = self.hass.loop.create_future()
+        if on_done is not None:
+            done.add_done_callback(
+                lambda future: on_done(not future.cancelled() and future.result())
+            )
+        self._command_futures.setdefault(device, []).append(done)
+        self._commands.setdefault(device, {}).update(fields)
+        self._commands_debouncer.async_schedule_call()
+        self._async_poll_fast()
+
+        return done
+
+    async def _async_send_commands(self) -> None:
+        """Отправка накопленных в очередях команд всех устройств."""
+        if not self._commands:
+            return
+        queues, self._commands = self._commands, {}
+        futures, self._command_futures = self._command_futures, {}
+        cancelled: list[str] = []
+        for device, commands in list(queues.items()):
+            if all(done.cancelled() for done in futures.get(device, [])):
+                cancelled.append(device)
+                del queues[device]
+                continue
+            if commands.get("state") is False:
+                # Выключение отменяет установку скорости.
+                commands.pop("speed", None)
+        results = await self._async_send_batch(queues)
+        for device, ok in results.items():
+            self.metrics.Command(ok)
+            for done in futures.get(device, []):
+                if not done.done():
+                    done.set_result(ok)
+        failed = [device for device, ok in results.items() if not ok]
+        if not failed and not cancelled:
+            return
+        # Откат отображаемого состояния устройств, команды которых не выполнены.
+        for device in failed:
+            _LOGGER.warning(
+                f"Команда {queues[device]} устройства {device} не выполнена, "
+                "состояние возвращено к полученному с сервера"
+            )
+            self._drop_pending(device)
+        for device in cancelled:
+            self._drop_pending(device)
+        self._async_publish(self._view())
+
+    async def _async_send_batch(
+        self, queues: dict[str, dict[str, Any]]
+    ) -> dict[str, bool]:
+        """
+        Отправка команд нескольких устройств, возвращается результат по каждому
+        устройству. Если сервер поддерживает пакетные команды, команды всех
+        устройств отправляются одним запросом, иначе - по запросу на устройство.
+        """
+        if len(queues) > 1:
+            try:
+                async with asyncio.timeout(self._command_timeout):
+                    async with self._command_semaphore:
+                        results = await self.api.Controls(queues)
+            except TimeoutError:
+                _LOGGER.warning(
+                    f"Истекло время ожидания отправки команд устройствам "
+                    f"{', '.join(queues)}: {self._command_timeout} с"
+                )
+                return dict.fromkeys(queues, False)
+            if results is not None:
+                return results
+        results = await asyncio.gather(
+            *[
+                self._async_send_command(device, commands)
+                for device, commands in queues.items()
+            ]
+        )
+        return dict(zip(queues, results))
+
+    async def _async_send_command(self, device: str, commands: dict[str, Any]) -> bool:
+        """
+        Отправка команды устройству. Число одновременных запросов к серверу
+        ограничено, время ожидания очереди и выполнения запроса - command_timeout.
+        """
+        try:
+            async with asyncio.timeout(self._command_timeout):
+                async with self._command_semaphore:
+                    return await self.api.Control(device, **commands)
+        except TimeoutError:
+            _LOGGER.warning(
+                f"Истекло время ожидания отправки команды {commands} устройству "
+                f"{device}: {self._command_timeout} с"
+            )
+            return False
 
 
 class Api:
-    """Класс реализации запросов к методам API сервиса."""
+    """
+    Класс реализации запросов к методам API сервиса.
+    Запросы выполняются асинхронно через общую aiohttp сессию Home Assistant,
+    которая переиспользует keep-alive соединения с сервером.
+    Запросы проходят через автоматический выключатель: пока сервер недоступен,
+    они отклоняются без обращения к сети, а ошибки не засоряют журнал.
+    """
 
     def __init__(
-        self, server: str, username: str, password: str, language: str
+        self,
+        session: aiohttp.ClientSession,
+        server: str,
+        username: str,
+        password: str,
+        language: str,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
     ) -> None:
+        self._session = session
         self._server = server
         self._username = username
         self._password = password
         self._language = language
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        # Последние ответы на условные запросы: адрес -> (ETag, результат).
+        self._cache: dict[str, tuple[str, Any]] = {}
+        # Поддержка сервером пакетных команд, сбрасывается при первом отказе.
+        self._batch: bool = True
+        # Поддержка сервером недельных программ, сбрасывается при первом отказе.
+        self._schedules: bool = True
+        self.breaker = CircuitBreaker(server)
 
-    def __enter__(self) -> None:
-        _LOGGER.warning("Вызов функции Api->__enter__()")
-        self.login()
-        return self
-
-    def login(self) -> None:
+    async def login(self) -> None:
         _LOGGER.warning(
             f"Вызов метода login. server={self._server}, username={self._username}, password={self._password}, language={self._language}"
         )
         # raise Error("Ошибка аутентификации.") from None
         # raise
 
-    def Condition(self) -> ConditionResponse | None:
+    async def Conditions(self) -> dict[str, ConditionResponse] | None:
+        """Получение с сервера состояния всех устройств одним запросом."""
+        ENDPOINT: str = "/conditions"
+        return await self._get(
+            ENDPOINT,
+            lambda data: {
+                device: ConditionResponse.Parse(condition)
+                for device, condition in data.items()
+            },
+        )
+
+    async def Condition(self, device: str) -> ConditionResponse | None:
         """Получение с сервера состояния устройства."""
         ENDPOINT: str = "/condition"
-        condition: ConditionResponse | None = None
-        try:
-            response = requests.get(
-                self._server + ENDPOINT, headers=REQUEST_HEADER_ACCEPT
-            )
-        except ConnectionError as err:
-            _LOGGER.error(f"Ошибка подключения к серверу: {err}")
-            return condition
-        except HTTPError as err:
-            _LOGGER.error(f"Ошибка HTTP запроса: {err}")
-            return condition
-        else:
-            try:
-                condition = ConditionResponse(**json.loads(response.text))
-            except json.JSONDecodeError as err:
-                _LOGGER.error(f"Ошибка декодирования JSON: {err}")
-                return condition
-        return condition
+        return await self._get(
+            self._device_endpoint(device, ENDPOINT),
+            ConditionResponse.Parse,
+        )
 
-    def State(self, state: bool) -> None:
+    async def Events(self) -> AsyncIterator[tuple[str, ConditionResponse]]:
+        """
+        Подписка на поток изменений состояния устройств (Server-Sent Events).
+        Для каждого кадра возвращается идентификатор устройства и его состояние.
+        Ошибки подключения и чтения потока передаются вызывающему.
+        """
+        ENDPOINT: str = "/events"
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=self._timeout.total,
+            sock_read=DEFAULT_STREAM_READ_TIMEOUT,
+        )
+        async with self._session.get(
+            self._server + ENDPOINT,
+            headers=REQUEST_HEADER_EVENTS,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            data: list[str] = []
+            async for raw in response.content:
+                line: str = raw.decode().rstrip("\r\n")
+                if not line:
+                    # Пустая строка завершает кадр.
+                    if data:
+                        event = json.loads("\n".join(data))
+                        yield event["device"], ConditionResponse.Parse(event["condition"])
+                        data = []
+                    continue
+                if line.startswith(":"):
+                    # Комментарий, используется для поддержания соединения.
+                    continue
+                field, _, value = line.partition(":")
+                if field == "data":
+                    data.append(value.removeprefix(" "))
+
+    async def State(self, device: str, state: bool) -> bool:
         """Установка нового состояния устройства."""
         ENDPOINT: str = "/state"
-        try:
-            requests.put(
-                self._server + ENDPOINT,
-                json={"state": state},
-                headers=REQUEST_HEADER_JSON,
-            )
-        except ConnectionError as err:
-            _LOGGER.error(f"Ошибка подключения к серверу: {err}")
-            return
-        except HTTPError as err:
-            _LOGGER.error(f"Ошибка HTTP запроса: {err}")
-            return
+        return await self._put(
+            self._device_endpoint(device, ENDPOINT), {"state": state}
+        )
 
-    def Speed(self, speed: decimal.Decimal) -> None:
+    async def Speed(self, device: str, speed: decimal.Decimal) -> bool:
         """Установка скорости работы вентиляции."""
         ENDPOINT: str = "/speed"
-        try:
-            requests.put(
-                self._server + ENDPOINT,
-                json={"speed": speed},
-                headers=REQUEST_HEADER_JSON,
-            )
-        except ConnectionError as err:
-            _LOGGER.error(f"Ошибка подключения к серверу: {err}")
-            return
-        except HTTPError as err:
-            _LOGGER.error(f"Ошибка HTTP запроса: {err}")
-            return
+        return await self._put(
+            self._device_endpoint(device, ENDPOINT), {"speed": speed}
+        )
 
-    def Workmode(self, workmode: str) -> None:
+    async def Workmode(self, device: str, workmode: str) -> bool:
         """Установка предопределённого рабочего режима."""
         ENDPOINT: str = "/workmode"
+        return await self._put(
+            self._device_endpoint(device, ENDPOINT), {"workmode": workmode}
+        )
+
+    async def Control(
+        self,
+        device: str,
+        state: bool | None = None,
+        speed: decimal.Decimal | None = None,
+        workmode: str | None = None,
+    ) -> bool:
+        """
+        Совместная установка состояния, скорости и рабочего режима одним запросом.
+        Не переданные значения не изменяются.
+        """
+        ENDPOINT: str = "/control"
+        return await self._put(
+            self._device_endpoint(device, ENDPOINT),
+            self._control_data(state, speed, workmode),
+        )
+
+    async def Controls(
+        self, commands: dict[str, dict[str, Any]]
+    ) -> dict[str, bool] | None:
+        """
+        Совместная установка состояния, скорости и рабочего режима нескольких
+        устройств одним запросом. Сервер выполняет команды устройств параллельно
+        и возвращает результат по каждому устройству.
+        Если сервер не поддерживает пакетные команды, возвращается None, и
+        команды нужно отправить по одной методом Control.
+        """
+        ENDPOINT: str = "/controls"
+        if not self._batch:
+            return None
+        data: dict[str, dict[str, Any]] = {
+            device: self._control_data(**fields) for device, fields in commands.items()
+        }
         try:
-            requests.put(
-                self._server + ENDPOINT,
-                json={"workmode": workmode},
-                headers=REQUEST_HEADER_JSON,
+            text = await self._put_text(ENDPOINT, data, optional=True)
+        except UnsupportedEndpoint:
+            _LOGGER.info(
+                "Сервер не поддерживает пакетные команды, команды отправляются по одной"
             )
-        except ConnectionError as err:
-            _LOGGER.error(f"Ошибка подключения к серверу: {err}")
-            return
-        except HTTPError as err:
-            _LOGGER.error(f"Ошибка HTTP запроса: {err}")
+            self._batch = False
+            return None
+        if text is None:
+            return dict.fromkeys(commands, False)
+        try:
+            answer: dict[str, Any] = json.loads(text)
+            results: dict[str, bool] = {
+                device: bool(answer.get(device, {}).get("ok")) for device in commands
+            }
+        except (ValueError, TypeError, AttributeError) as err:
+            _LOGGER.error(f"Ошибка декодирования JSON: {err}")
+            return dict.fromkeys(commands, False)
+        for device, ok in results.items():
+            if not ok:
+                _LOGGER.warning(
+                    f"Команда устройству {device} не выполнена: "
+                    f"{answer.get(device, {}).get('error', 'нет ответа')}"
+                )
+        return results
+
+    async def Schedules(self) -> dict[str, Schedule] | None:
+        """
+        Получение с сервера недельных программ всех устройств.
+        Если сервер не поддерживает программы или запрос не выполнен,
+        возвращается None.
+        """
+        ENDPOINT: str = "/schedules"
+        if not self._schedules:
+            return None
+        try:
+            return await self._get(
+                ENDPOINT,
+                lambda data: {
+                    device: Schedule.Parse(schedule)
+                    for device, schedule in data.items()
+                },
+                optional=True,
+            )
+        except UnsupportedEndpoint:
+            _LOGGER.info("Сервер не поддерживает недельные программы устройств")
+            self._schedules = False
+            return None
+
+    async def SetSchedule(self, device: str, schedule: Schedule) -> bool:
+        """Установка недельной программы устройства, программа заменяется целиком."""
+        ENDPOINT: str = "/schedule"
+        return await self._put(
+            self._device_endpoint(device, ENDPOINT), schedule.Dump()
+        )
+
+    @staticmethod
+    def _control_data(
+        state: bool | None = None,
+        speed: decimal.Decimal | None = None,
+        workmode: str | None = None,
+    ) -> dict[str, Any]:
+        """Тело запроса совместной установки, без не переданных значений."""
+        data: dict[str, Any] = {}
+        if state is not None:
+            data["state"] = state
+        if speed is not None:
+            data["speed"] = speed
+        if workmode is not None:
+            data["workmode"] = workmode
+        return data
+
+    @staticmethod
+    def _device_endpoint(device: str, endpoint: str) -> str:
+        """Адрес метода API конкретного устройства."""
+        return f"/devices/{quote(device, safe='')}{endpoint}"
+
+    async def _get(
+        self, endpoint: str, parse: Callable[[Any], Any], optional: bool = False
+    ) -> Any | None:
+        """
+        Выполнение условного GET запроса по ETag предыдущего ответа.
+        Если данные не изменились (304), JSON не декодируется и возвращается
+        тот же объект, что и в прошлый раз. При ошибке возвращается None.
+        Для необязательных методов API ответ 404 или 405 возбуждает
+        UnsupportedEndpoint, как в _put_text.
+        """
+        if not self.breaker.Allow():
+            _LOGGER.debug(f"Запрос {endpoint} отклонён: сервер недоступен")
+            return None
+        headers: dict[str, str] = REQUEST_HEADER_ACCEPT
+        if (cached := self._cache.get(endpoint)) is not None:
+            headers = {**REQUEST_HEADER_ACCEPT, HEADER_IF_NONE_MATCH: cached[0]}
+        try:
+            async with self._session.get(
+                self._server + endpoint,
+                headers=headers,
+                timeout=self._timeout,
+            ) as response:
+                response.raise_for_status()
+                self.breaker.Success()
+                if response.status == HTTPStatus.NOT_MODIFIED and cached is not None:
+                    return cached[1]
+                etag: str | None = response.headers.get(HEADER_ETAG)
+                text: str = await response.text()
+        except aiohttp.ClientResponseError as err:
+            self._unsupported(endpoint, err, optional)
+            self._response_error(err)
+            return None
+        except aiohttp.ClientError as err:
+            self._failure(f"Ошибка подключения к серверу: {err}")
+            return None
+        except asyncio.TimeoutError:
+            self._failure(f"Истекло время ожидания ответа сервера: {endpoint}")
+            return None
+        except asyncio.CancelledError:
+            # Отменённый запрос не даёт результата, но не должен занимать
+            # пробный запрос выключателя.
+            self.breaker.Release()
+            raise
+        try:
+            result = parse(json.loads(text))
+        except (ValueError, TypeError, AttributeError) as err:
+            _LOGGER.error(f"Ошибка декодирования JSON: {err}")
+            return None
+        if etag is not None:
+            self._cache[endpoint] = (etag, result)
+        return result
+
+    async def _put(self, endpoint: str, data: dict[str, Any]) -> bool:
+        """
+        Выполнение PUT запроса с телом в формате JSON.
+        Возвращается "истина", если сервер ответил успешным кодом.
+        """
+        return await self._put_text(endpoint, data) is not None
+
+    async def _put_text(
+        self, endpoint: str, data: Any, optional: bool = False
+    ) -> str | None:
+        """
+        Выполнение PUT запроса с телом в формате JSON.
+        Если сервер ответил успешным кодом, возвращается тело ответа, иначе None.
+        Для необязательных методов API ответ 404 или 405 означает, что сервер
+        их не поддерживает: ошибка не регистрируется, а возбуждается
+        UnsupportedEndpoint.
+        """
+        if not self.breaker.Allow():
+            _LOGGER.warning(f"Команда {endpoint} не отправлена: сервер недоступен")
+            return None
+        try:
+            async with self._session.put(
+                self._server + endpoint,
+                json=data,
+                headers=REQUEST_HEADER_JSON,
+                timeout=self._timeout,
+            ) as response:
+                response.raise_for_status()
+                text: str = await response.text()
+        except aiohttp.ClientResponseError as err:
+            self._unsupported(endpoint, err, optional)
+            self._response_error(err)
+            return None
+        except aiohttp.ClientError as err:
+            self._failure(f"Ошибка подключения к серверу: {err}")
+            return None
+        except asyncio.TimeoutError:
+            self._failure(f"Истекло время ожидания ответа сервера: {endpoint}")
+            return None
+        except asyncio.CancelledError:
+            self.breaker.Release()
+            raise
+        self.breaker.Success()
+        return text
+
+    def _unsupported(
+        self, endpoint: str, err: aiohttp.ClientResponseError, optional: bool
+    ) -> None:
+        """
+        Если необязательный метод API не поддерживается сервером (404 или 405),
+        возбуждается UnsupportedEndpoint; сервер при этом считается доступным.
+        """
+        if optional and err.status in (
+            HTTPStatus.NOT_FOUND,
+            HTTPStatus.METHOD_NOT_ALLOWED,
+        ):
+            self.breaker.Success()
+            raise UnsupportedEndpoint(endpoint) from err
+
+    def _failure(self, message: str) -> None:
+        """
+        Регистрация ошибки связи с сервером.
+        В журнал ошибок попадает только первая ошибка серии.
+        """
+        if self.breaker.Failure():
+            _LOGGER.error(message)
+        else:
+            _LOGGER.debug(message)
+
+    def _response_error(self, err: aiohttp.ClientResponseError) -> None:
+        """
+        Обработка ответа сервера с кодом ошибки. Ошибки сервера (5xx) считаются
+        ошибками связи, ошибки запроса (4xx) означают, что сервер доступен.
+        """
+        if err.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            self._failure(f"Ошибка HTTP запроса: {err}")
             return
+        self.breaker.Success()
+        _LOGGER.error(f"Ошибка HTTP запроса: {err}")
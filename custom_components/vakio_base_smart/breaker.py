@@ -0,0 +1,132 @@
+"""
+Автоматический выключатель (circuit breaker) запросов к серверу.
+Пока сервер недоступен, запросы не выполняются, а повторные попытки
+выполняются с экспоненциально растущим интервалом.
+"""
+import logging
+import time
+from typing import Callable
+
+from .const import BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+from .const import DEFAULT_BREAKER_THRESHOLD
+from .const import DEFAULT_BREAKER_BACKOFF, DEFAULT_BREAKER_BACKOFF_MAX
+
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class CircuitBreaker:
+    """
+    Состояния выключателя:
+    * closed    - запросы выполняются;
+    * open      - после threshold ошибок подряд запросы отклоняются без обращения
+                  к серверу до истечения интервала ожидания;
+    * half_open - интервал ожидания истёк, выполняется один пробный запрос. При
+                  успехе выключатель закрывается, при ошибке снова открывается
+                  с удвоенным интервалом ожидания.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        backoff: float = DEFAULT_BREAKER_BACKOFF,
+        backoff_max: float = DEFAULT_BREAKER_BACKOFF_MAX,
+    ) -> None:
+        """Конструктор."""
+        self.Name = name
+        self.State: str = BREAKER_CLOSED
+        self.Failures: int = 0
+        self.Backoff: float = 0
+        self._threshold = threshold
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+        self._retry_at: float = 0
+        self._probing: bool = False
+        self._listeners: list[Callable[[], None]] = []
+
+    def AddListener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """
+        Подписка на изменение состояния выключателя.
+        Возвращается функция отмены подписки.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def Allow(self) -> bool:
+        """
+        Возвращается "истина", если запрос к серверу можно выполнить.
+        В полуоткрытом состоянии разрешается только один пробный запрос.
+        """
+        if self.State == BREAKER_CLOSED:
+            return True
+        if self.State == BREAKER_OPEN:
+            if time.monotonic() < self._retry_at:
+                return False
+            self.State = BREAKER_HALF_OPEN
+            self._probing = False
+            self._notify()
+        if self._probing:
+            return False
+        self._probing = True
+
+        return True
+
+    def Remaining(self) -> float:
+        """Время до следующей попытки обращения к серверу, секунд."""
+        if self.State != BREAKER_OPEN:
+            return 0
+
+        return max(0, self._retry_at - time.monotonic())
+
+    def Release(self) -> None:
+        """
+        Завершение запроса без результата, например при его отмене.
+        Пробный запрос полуоткрытого состояния освобождается, и следующий
+        запрос снова становится пробным.
+        """
+        self._probing = False
+
+    def Success(self) -> None:
+        """Регистрация успешного запроса."""
+        if self.State == BREAKER_CLOSED and not self.Failures:
+            return
+        if self.State != BREAKER_CLOSED:
+            _LOGGER.warning(f"Связь с сервером {self.Name} восстановлена")
+        self.State = BREAKER_CLOSED
+        self.Failures = 0
+        self.Backoff = 0
+        self._probing = False
+        self._notify()
+
+    def Failure(self) -> bool:
+        """
+        Регистрация ошибки запроса.
+        Возвращается "истина", если ошибку следует записать в журнал: только
+        первая ошибка серии, остальные подавляются до восстановления связи.
+        """
+        self.Failures += 1
+        first: bool = self.Failures == 1
+        if self.State == BREAKER_HALF_OPEN:
+            self._open(min(self.Backoff * 2, self._backoff_max))
+        elif self.State == BREAKER_CLOSED and self.Failures >= self._threshold:
+            self._open(self._backoff)
+        else:
+            self._notify()
+
+        return first
+
+    def _open(self, backoff: float) -> None:
+        self.State = BREAKER_OPEN
+        self.Backoff = backoff
+        self._retry_at = time.monotonic() + backoff
+        self._probing = False
+        _LOGGER.warning(
+            f"Сервер {self.Name} недоступен, ошибок подряд: {self.Failures}, "
+            f"следующая попытка через {backoff:.0f} с"
+        )
+        self._notify()
@@ -15,19 +15,32 @@ from .const import (
     CONF_PASSWORD,
     CONF_LANGUAGE,
     CONF_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL_MAX,
     CONF_ZONE,
     CONF_TRACK_HOSTS,
+    CONF_TRANSPORT,
+    CONF_DEVICES,
+    CONF_COMMAND_TIMEOUT,
+    CONF_HISTORY_RETENTION,
+    CONF_SPEED_COUNT,
 )
 from .const import (
     DEFAULT_SERVER_URL,
     DEFAULT_LANGUAGE,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_MAX,
     DEFAULT_ZONE,
     DEFAULT_TRACK_HOSTS,
+    DEFAULT_TRANSPORT,
+    DEFAULT_DEVICE,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_SPEED_COUNT,
 )
 from .const import DOMAIN, NAME
-from .const import languages
+from .const import languages, TRANSPORTS
 from .api import Coordinator
+from .mqtt_transport import parse_devices
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -109,7 +122,7 @@ class VakioFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 f"Вызов метода VakioFlowHandler->_test_credentials(username={username}, password={password}, server={server}, language={language})"
             )
             coordinator = Coordinator(self.hass, username, password, server, language)
-            await self.hass.async_add_executor_job(coordinator.api.login)
+            await coordinator.api.login()
             return True
         except Exception as ex:  # pylint: disable=broad-except
             _LOGGER.exception(ex)
@@ -130,13 +143,20 @@ class VakioOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_basic_options(self, user_input=None):
         """Обработчик данных заполняемых пользователейм."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            self.options.update(user_input)
-            return await self.async_step_sensor_select()
+            try:
+                parse_devices(user_input.get(CONF_DEVICES, DEFAULT_DEVICE))
+            except ValueError:
+                errors[CONF_DEVICES] = "devices"
+            else:
+                self.options.update(user_input)
+                return await self.async_step_sensor_select()
 
         return self.async_show_form(
             step_id="basic_options",
             last_step=False,
+            errors=errors,
             data_schema=vol.Schema(
                 {
                     vol.Optional(
@@ -145,6 +165,44 @@ class VakioOptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
                         ),
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_SCAN_INTERVAL_MAX,
+                        default=self.config_entry.options.get(
+                            CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_COMMAND_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_HISTORY_RETENTION,
+                        default=self.config_entry.options.get(
+                            CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_SPEED_COUNT,
+                        default=self.config_entry.options.get(
+                            CONF_SPEED_COUNT, DEFAULT_SPEED_COUNT
+                        ),
+                    ): vol.All(cv.positive_int, vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_TRANSPORT,
+                        default=self.config_entry.options.get(
+                            CONF_TRANSPORT, DEFAULT_TRANSPORT
+                        ),
+                    ): selector(
+                        {"select": {"options": TRANSPORTS, "mode": "dropdown"}}
+                    ),
+                    vol.Optional(
+                        CONF_DEVICES,
+                        default=self.config_entry.options.get(
+                            CONF_DEVICES, DEFAULT_DEVICE
+                        ),
+                    ): str,
                     vol.Optional(
                         CONF_ZONE,
                         default=self.config_entry.options.get(CONF_ZONE, DEFAULT_ZONE),
@@ -9,13 +9,16 @@ from homeassistant.const import Platform
 DOMAIN: str = "vakio_base_smart"
 DOMAIN_DATA: str = f"{DOMAIN}_data"
 NAME: str = "Vakio BASE Smart"
+MANUFACTURER: str = "Vakio"
 
 # Платформы.
 SENSOR: Platform = Platform.SENSOR
 FAN: Platform = Platform.FAN
+SWITCH: Platform = Platform.SWITCH
 PLATFORMS: tuple[Platform] = (
     SENSOR,
     FAN,
+    SWITCH,
 )
 
 # Опции конфигурации.
@@ -25,17 +28,58 @@ CONF_USERNAME: str = "username"
 CONF_PASSWORD: str = "password"
 CONF_LANGUAGE: str = "language"
 CONF_SCAN_INTERVAL: str = "scan_interval"
+CONF_SCAN_INTERVAL_MAX: str = "scan_interval_max"
 CONF_ZONE: str = "zone"
 CONF_TRACK_HOSTS: str = "track_network_hosts"
+CONF_TRANSPORT: str = "transport"
+CONF_DEVICES: str = "devices"
+CONF_COMMAND_TIMEOUT: str = "command_timeout"
+CONF_HISTORY_RETENTION: str = "history_retention"
+CONF_SPEED_COUNT: str = "speed_count"
 
 # Умолчания.
 DEFAULT_NAME: str = DOMAIN
 DEFAULT_SERVER_URL: str = "http://localhost:8199"
+DEFAULT_DEVICE: str = "vakio"
 DEFAULT_LANGUAGE: str = "rus"
 DEFAULT_SCAN_INTERVAL: str = 2
+DEFAULT_SCAN_INTERVAL_MAX: int = 60
+DEFAULT_SCAN_FAST_WINDOW: int = 30
+DEFAULT_SCAN_JITTER: float = 0.2
+DEFAULT_CACHE_SAVE_DELAY: int = 30
+DEFAULT_BREAKER_THRESHOLD: int = 3
+DEFAULT_BREAKER_BACKOFF: int = 5
+DEFAULT_BREAKER_BACKOFF_MAX: int = 300
+DEFAULT_METRICS_WINDOW: int = 20
 DEFAULT_ZONE: str = "Сервер"
 DEFAULT_TRACK_HOSTS: bool = False
+DEFAULT_TRANSPORT: str = "http"
 DEFAULT_TIME_BETWEEN_UPDATE = timedelta(seconds=2)
+DEFAULT_REQUEST_TIMEOUT: int = 10
+DEFAULT_STREAM_READ_TIMEOUT: int = 45
+DEFAULT_STREAM_RECONNECT_DELAY: int = 10
+DEFAULT_COMMAND_COALESCE_DELAY: float = 0.3
+DEFAULT_COMMAND_CONFIRM_TIMEOUT: int = 10
+DEFAULT_COMMAND_TIMEOUT: int = 10
+DEFAULT_COMMAND_CONCURRENCY: int = 4
+DEFAULT_HISTORY_RETENTION: int = 24
+DEFAULT_HISTORY_CAPACITY: int = 10000
+
+## Способы взаимодействия с вентиляционными системами.
+## http - через управляющий сервер (server/);
+## mqtt - напрямую через MQTT интеграцию Home Assistant.
+TRANSPORT_HTTP: str = "http"
+TRANSPORT_MQTT: str = "mqtt"
+TRANSPORTS: list[str] = [TRANSPORT_HTTP, TRANSPORT_MQTT]
+
+## Состояния автоматического выключателя запросов к серверу.
+BREAKER_CLOSED: str = "closed"
+BREAKER_OPEN: str = "open"
+BREAKER_HALF_OPEN: str = "half_open"
+
+## Хранилище последнего известного состояния устройств.
+STORAGE_VERSION: int = 1
+STORAGE_KEY: str = f"{DOMAIN}.{{entry_id}}"
 
 ## Поддерживаемые языки.
 languages: dict[str, str] = {
@@ -93,6 +137,36 @@ NAMED_FAN_SPEEDS: list[decimal.Decimal] = [
     FAN_SPEED_06,
     FAN_SPEED_07,
 ]
+## Максимальная скорость режимов с максимальной производительностью:
+## math.MaxUint64 на сервере.
+SPEED_MAX: int = 2**64 - 1
+## Количество скоростей вентиляции по умолчанию, как у Vakio BASE Smart.
+DEFAULT_SPEED_COUNT: int = len(NAMED_FAN_SPEEDS)
+
+## Службы интеграции.
+SERVICE_APPLY_SCENE: str = "apply_scene"
+ATTR_STATE: str = "state"
+ATTR_SPEED: str = "speed"
+ATTR_WORKMODE: str = "workmode"
+SERVICE_EXPORT_HISTORY: str = "export_history"
+ATTR_FILENAME: str = "filename"
+ATTR_FORMAT: str = "format"
+ATTR_CONFIG_ENTRY_ID: str = "config_entry_id"
+HISTORY_FORMAT_CSV: str = "csv"
+HISTORY_FORMAT_JSONL: str = "jsonl"
+HISTORY_FORMATS: list[str] = [HISTORY_FORMAT_CSV, HISTORY_FORMAT_JSONL]
+## Каталог выгрузки истории в каталоге конфигурации Home Assistant.
+HISTORY_EXPORT_DIR: str = "vakio_history"
+SERVICE_SET_SCHEDULE: str = "set_schedule"
+SERVICE_CLEAR_SCHEDULE: str = "clear_schedule"
+ATTR_SLOTS: str = "slots"
+ATTR_ENABLED: str = "enabled"
+ATTR_AT: str = "at"
+ATTR_DAYS: str = "days"
+## Максимальное количество слотов недельной программы, ограничение сервера.
+SCHEDULE_SLOTS_MAX: int = 64
+## Максимальная скорость слота недельной программы, ограничение сервера.
+SCHEDULE_SPEED_MAX: int = len(NAMED_FAN_SPEEDS)
 
 ## Ошибки.
 ERROR_AUTH: str = "ошибка аутентификации"
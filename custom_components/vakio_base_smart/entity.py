@@ -0,0 +1,95 @@
+"""Базовый класс сущностей вентиляционной системы."""
+from __future__ import annotations
+import asyncio
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .api import Coordinator
+from .const import DOMAIN, NAME, MANUFACTURER, DEFAULT_DEVICE
+
+
+class VakioEntity(CoordinatorEntity[Coordinator]):
+    """
+    Сущность одной вентиляционной системы сервера.
+    Вентиляционная система определяется префиксом топиков MQTT на сервере.
+    """
+
+    def __init__(self, coordinator: Coordinator, device: str, entry_id: str) -> None:
+        """Конструктор."""
+        super().__init__(coordinator)
+        self._device = device
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry_id}_{device}")},
+            manufacturer=MANUFACTURER,
+            model=NAME,
+            name=NAME if device == DEFAULT_DEVICE else f"{NAME} {device}",
+        )
+        # Последнее записанное в Home Assistant видимое состояние сущности.
+        self._written: tuple[Any, ...] | None = None
+
+    @property
+    def device(self) -> str:
+        """Идентификатор вентиляционной системы на сервере."""
+        return self._device
+
+    @property
+    def available(self) -> bool:
+        """Сущность доступна, если сервер вернул состояние вентиляционной системы."""
+        return super().available and self._device in self.coordinator.conditions
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Функция вызывается координатором при изменении данных."""
+        self.async_write_state_if_changed()
+
+    @callback
+    def async_write_state_if_changed(self) -> None:
+        """
+        Запись состояния в Home Assistant, только если изменилось видимое состояние:
+        доступность, значение или атрибуты, в том числе дополнительные.
+        Сокращает число записей в базу данных.
+        """
+        written = (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+        if written == self._written:
+            return
+        self._written = written
+        self.async_write_ha_state()
+
+    async def async_wait_commands(self, *commands: asyncio.Future[bool] | None) -> None:
+        """
+        Ожидание отправки команд серверу. Если команда не выполнена, возбуждается
+        HomeAssistantError. Отмена ожидания отменяет ещё не отправленные команды.
+        """
+        results = await asyncio.gather(*[done for done in commands if done is not None])
+        if not all(results):
+            raise HomeAssistantError(
+                f"Команда вентиляционной системе {self._device} не выполнена"
+            )
+
+
+def device_unique_id(device: str, unique_id: str) -> str:
+    """
+    Уникальный идентификатор сущности вентиляционной системы.
+    Для вентиляционной системы по умолчанию сохраняется прежний идентификатор.
+    """
+    if device == DEFAULT_DEVICE:
+        return unique_id
+
+    return f"{device}_{unique_id}"
+
+
+def device_name(device: str, name: str) -> str:
+    """Название сущности вентиляционной системы."""
+    if device == DEFAULT_DEVICE:
+        return name
+
+    return f"{name} {device}"
@@ -1,29 +1,18 @@
 from __future__ import annotations
+import asyncio
 import decimal
 from typing import Any, Optional
 import logging
-import voluptuous as vol
-from datetime import datetime, timedelta, timezone
-
-from homeassistant.components.fan import (
-    FanEntity,
-    FanEntityFeature,
-    DIRECTION_FORWARD,
-    DIRECTION_REVERSE,
-)
+
+from homeassistant.components.fan import FanEntity, FanEntityFeature
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.util.percentage import (
-    ordered_list_item_to_percentage,
-    percentage_to_ordered_list_item,
-)
+from homeassistant.helpers.typing import DiscoveryInfoType
 
 from .api import Coordinator
-from .const import DOMAIN, DEFAULT_TIME_BETWEEN_UPDATE, SERVER_WORK_TO_FAN_MODE
+from .entity import VakioEntity, device_name, device_unique_id
+from .const import DOMAIN
 from .const import (
     FAN_MODE_OFF,
     FAN_MODE_INFLOW,
@@ -33,15 +22,14 @@ from .const import (
     FAN_MODE_OUTFLOW,
     FAN_MODE_OUTFLOW_MAX,
     FAN_MODE_NIGHT,
-    FAN_SPEED_00,
     FAN_SPEED_01,
-    NAMED_FAN_SPEEDS,
 )
+from .modes import FAN_MODE_TO_SERVER_WORK, IDLE_MODES, MODE_STATE, TRANSITIONS
+from .modes import speed_table
+from .modes import ACTION_OSCILLATE_ON, ACTION_OSCILLATE_OFF, ACTION_TURN_ON
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
-percentage = ordered_list_item_to_percentage(NAMED_FAN_SPEEDS, FAN_SPEED_01)
-named_speed = percentage_to_ordered_list_item(NAMED_FAN_SPEEDS, 14)
 
 
 FULL_SUPPORT = (
@@ -51,6 +39,8 @@ FULL_SUPPORT = (
     | FanEntityFeature.PRESET_MODE
 )
 LIMITED_SUPPORT = FanEntityFeature.SET_SPEED
+# Поля состояния устройства, от которых зависит состояние сущности.
+FAN_FIELDS: frozenset[str] = frozenset({"State", "Speed", "Work"})
 
 
 async def async_setup_entry(
@@ -63,17 +53,38 @@ async def async_setup_entry(
 
 async def async_setup_platform(
     hass: HomeAssistant,
-    conf: ConfigType,
+    conf: ConfigEntry,
     entities: AddEntitiesCallback,
     info: DiscoveryInfoType | None = None,
 ) -> bool:
     """Настройка платформы интеграции вентиляционной системы."""
     # _LOGGER.info("Вызов функции fan->async_setup_platform()")
-    vf = VakioFan(
-        hass,
-        "fan1",
-        "Vent machine",
-        conf.entry_id,
+    coordinator: Coordinator = hass.data[DOMAIN][conf.entry_id]
+    known: set[str] = set()
+
+    @callback
+    def async_add_devices() -> None:
+        """Добавление вентиляционных систем, появившихся на сервере."""
+        devices = [device for device in coordinator.Devices() if device not in known]
+        if not devices:
+            return
+        known.update(devices)
+        entities([create_fan(coordinator, device, conf.entry_id) for device in devices])
+
+    async_add_devices()
+    conf.async_on_unload(coordinator.async_add_listener(async_add_devices))
+
+    return True
+
+
+def create_fan(coordinator: Coordinator, device: str, entry_id: str) -> VakioFan:
+    """Создание сущности вентиляционной системы."""
+    return VakioFan(
+        coordinator,
+        device,
+        device_unique_id(device, "fan1"),
+        device_name(device, "Vent machine"),
+        entry_id,
         FULL_SUPPORT,
         [
             FAN_MODE_OFF,
@@ -87,23 +98,13 @@ async def async_setup_platform(
         ],
         translation_key="select_preset_modes",
     )
-    entities([vf])
-    # Регистрация автоматического обновления статуса вентиляционной системы запросами к серверу.
-    coordinator: Coordinator = hass.data[DOMAIN][conf.entry_id]
-    async_track_time_interval(
-        hass, coordinator._async_update, DEFAULT_TIME_BETWEEN_UPDATE
-    )
-    async_track_time_interval(hass, vf._async_update, DEFAULT_TIME_BETWEEN_UPDATE)
-
-    return True
-
 
-class VakioBaseFan(FanEntity):
-    _attr_should_poll = False
 
+class VakioBaseFan(VakioEntity, FanEntity):
     def __init__(
         self,
-        hass: HomeAssistant,
+        coordinator: Coordinator,
+        device: str,
         unique_id: str,
         name: str,
         entry_id: str,
@@ -112,9 +113,11 @@ class VakioBaseFan(FanEntity):
         translation_key: str | None = None,
     ) -> None:
         """Конструктор."""
-        self.hass = hass
+        super().__init__(coordinator, device, entry_id)
         self._unique_id = unique_id
         self._attr_supported_features = supported_features
+        # Соответствие скоростей и процентов модели вентиляционных систем сервера.
+        self._speeds = speed_table(coordinator.speed_count)
         self._percentage: int | None = None
         self._preset_modes = preset_modes
         self._preset_mode: str | None = None
@@ -127,7 +130,6 @@ class VakioBaseFan(FanEntity):
         if supported_features & FanEntityFeature.DIRECTION:
             self._direction = None
         self._attr_translation_key = translation_key
-        self.coordinator: Coordinator = hass.data[DOMAIN][entry_id]
 
     @property
     def unique_id(self) -> str:
@@ -156,7 +158,7 @@ class VakioFan(VakioBaseFan, FanEntity):
     @property
     def speed_count(self) -> int:
         """Возвращает количество поддерживаемых скоростей."""
-        return len(NAMED_FAN_SPEEDS)
+        return self._speeds.count
 
     @property
     def preset_mode(self) -> str | None:
@@ -172,18 +174,16 @@ class VakioFan(VakioBaseFan, FanEntity):
         """Установка скорости работы вентиляции в процентах."""
         self._percentage = percentage
         if percentage == 0:
-            self.coordinator.SetTurnOff()
+            done = self.coordinator.SetTurnOff(self._device)
             self.updateAllOptions()
+            await self.async_wait_commands(done)
             return
-        self.coordinator.SetTurnOn()
-        # Получение именованой скорости.
-        speed: decimal.Decimal = percentage_to_ordered_list_item(
-            NAMED_FAN_SPEEDS, percentage
-        )
+        turned_on = self.coordinator.SetTurnOn(self._device)
         # Выполнение метода API установки скорости.
-        self.coordinator.SetSpeed(speed)
+        done = self.coordinator.SetSpeed(self._device, self._speeds.Speed(percentage))
         if self.updateSpeed():
             self.updateAllOptions()
+        await self.async_wait_commands(turned_on, done)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Переключение режима работы на основе пресета."""
@@ -191,18 +191,22 @@ class VakioFan(VakioBaseFan, FanEntity):
             self._preset_mode = preset_mode
         else:
             raise ValueError(f"Неизвестный режим: {preset_mode}")
+        self._direction, self._oscillating = MODE_STATE[preset_mode]
         if self._preset_mode == FAN_MODE_OFF:
-            self.coordinator.SetTurnOff()
+            self._percentage = 0
+            done = self.coordinator.SetTurnOff(self._device)
             self.updateAllOptions()
+            await self.async_wait_commands(done)
             return
-        # Поиск именованого предустановленного серверного режима.
-        for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-            if mode == preset_mode:
-                # Выполнение метода API установки режима.
-                self.coordinator.SetWorkMode(key)
+        # Выполнение метода API установки режима.
+        done = self.coordinator.SetWorkMode(
+            self._device, FAN_MODE_TO_SERVER_WORK[preset_mode]
+        )
+        speed_done = None
         if self._percentage is None or self._percentage == 0:
-            self.coordinator.SetSpeed(FAN_SPEED_01)
+            speed_done = self.coordinator.SetSpeed(self._device, FAN_SPEED_01)
         self.updateAllOptions()
+        await self.async_wait_commands(done, speed_done)
 
     async def async_turn_on(
         self,
@@ -212,51 +216,69 @@ class VakioFan(VakioBaseFan, FanEntity):
         **kwargs: Any,
     ) -> None:
         """Включение вентиляционной системы."""
-        self.coordinator.SetTurnOn()
-        # Получение именованой скорости.
-        new_speed: decimal.Decimal = 0
-        if percentage != None:
-            new_speed = percentage_to_ordered_list_item(NAMED_FAN_SPEEDS, percentage)
-        else:
-            new_speed = FAN_SPEED_01
+        turned_on = self.coordinator.SetTurnOn(self._device)
+        new_speed: decimal.Decimal = FAN_SPEED_01
+        if percentage:
+            new_speed = self._speeds.Speed(percentage)
         # Выполнение метода API установки скорости.
-        self.coordinator.SetSpeed(new_speed)
+        done = self.coordinator.SetSpeed(self._device, new_speed)
         self.updateAllOptions()
+        await self.async_wait_commands(turned_on, done)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Выключение вентиляционной системы."""
-        self.coordinator.SetTurnOff()
-        await self._async_update(datetime.now(timezone.utc))
+        done = self.coordinator.SetTurnOff(self._device)
+        self.updateState()
+        self.async_write_state_if_changed()
+        await self.async_wait_commands(done)
 
     async def async_set_direction(self, direction: str) -> None:
         """Переключение направления вентиляции."""
-        self._direction = direction
-        if direction == DIRECTION_FORWARD and (
-            self._preset_mode != FAN_MODE_INFLOW
-            or self._preset_mode != FAN_MODE_INFLOW_MAX
-        ):
-            self._preset_mode = FAN_MODE_INFLOW
-            for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-                if mode == self._preset_mode:
-                    self.coordinator.SetWorkMode(key)
-        if direction == DIRECTION_REVERSE and (
-            self._preset_mode != FAN_MODE_OUTFLOW
-            or self._preset_mode != FAN_MODE_OUTFLOW_MAX
-        ):
-            self._preset_mode = FAN_MODE_OUTFLOW
-            for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-                if mode == self._preset_mode:
-                    self.coordinator.SetWorkMode(key)
+        done = self.applyTransition(direction)
         self.updateAllOptions()
+        await self.async_wait_commands(done)
 
     async def async_oscillate(self, oscillating: bool) -> None:
         """Переключение режима рекуперации."""
-        self._oscillating = oscillating
+        done = self.applyTransition(
+            ACTION_OSCILLATE_ON if oscillating else ACTION_OSCILLATE_OFF
+        )
         self.updateAllOptions()
+        await self.async_wait_commands(done)
 
-    async def _async_update(self, now: datetime) -> None:
+    def applyTransition(self, action: str) -> asyncio.Future[bool] | None:
+        """
+        Переход в режим, соответствующий действию пользователя, по таблице
+        переходов. Команда серверу отправляется, только если режим изменился,
+        возвращается future результата её отправки.
+        """
+        transition = TRANSITIONS[(self._preset_mode, action)]
+        self._preset_mode = transition.preset_mode
+        self._direction = transition.direction
+        self._oscillating = transition.oscillating
+        if transition.workmode is None:
+            return None
+
+        return self.coordinator.SetWorkMode(self._device, transition.workmode)
+
+    async def async_added_to_hass(self) -> None:
+        """Начальное заполнение состояния данными координатора."""
+        await super().async_added_to_hass()
+        self.updateState()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Функция вызывается координатором при изменении данных.
+        Состояние сущности пересчитывается, только если изменились поля, от
+        которых оно зависит.
+        """
+        if self.coordinator.changes.get(self._device, frozenset()) & FAN_FIELDS:
+            self.updateState()
+        self.async_write_state_if_changed()
+
+    def updateState(self) -> None:
         """
-        Функция вызывается по таймеру.
         Выполняется сравнение параметров состояния вентиляционной системы с параметрами записанными в классе.
         Если выявляется разница, тогда параметры класса обновляются.
         """
@@ -275,19 +297,11 @@ class VakioFan(VakioBaseFan, FanEntity):
         Обновление текущей скорости работы вентиляционной системы.
         Возвращается "истина" если было выполнено обновление.
         """
-        speed: decimal.Decimal | None = self.coordinator.Speed()
-        if (
-            speed == None or speed > len(NAMED_FAN_SPEEDS) or speed == 0
-        ) and self._percentage != None:
-            self._percentage = None
-            return True
-        if speed == None:
-            return False
-        speed = speed - 1
-        named_speed = NAMED_FAN_SPEEDS[speed]
-        new_speed_percentage = ordered_list_item_to_percentage(
-            NAMED_FAN_SPEEDS, named_speed
-        )
+        speed: decimal.Decimal | None = self.coordinator.Speed(self._device)
+        # Не известная, нулевая и не поддерживаемая моделью скорость не отображается.
+        new_speed_percentage: int | None = None
+        if speed:
+            new_speed_percentage = self._speeds.Percentage(speed)
         if self._percentage != new_speed_percentage:
             self._percentage = new_speed_percentage
             return True
@@ -299,29 +313,11 @@ class VakioFan(VakioBaseFan, FanEntity):
         Обновление текущего предопределённого режима работы вентиляционной системы.
         Возвращается "истина" если было выполнено обновление.
         """
-        mode: str | None = self.coordinator.FanMode()
+        mode: str | None = self.coordinator.FanMode(self._device)
         if self._preset_mode == mode:
             return False
         self._preset_mode = mode
-        self._oscillating = (
-            mode == FAN_MODE_RECUPERATOR
-            or mode == FAN_MODE_WINTER
-            or mode == FAN_MODE_NIGHT
-        )
-        # Переключение значка прямая вентиляция для приточных режимов.
-        if mode == FAN_MODE_INFLOW or mode == FAN_MODE_INFLOW_MAX:
-            self._direction = DIRECTION_FORWARD
-        # Переключение значка обратная вентиляция для режимов вытяжки.
-        if mode == FAN_MODE_OUTFLOW or mode == FAN_MODE_OUTFLOW_MAX:
-            self._direction = DIRECTION_REVERSE
-        # Отключение значка направления для режимов с рекуперацией.
-        if (
-            mode == FAN_MODE_RECUPERATOR
-            or mode == FAN_MODE_WINTER
-            or mode == FAN_MODE_NIGHT
-            or mode == FAN_MODE_OFF
-        ):
-            self._direction = None
+        self._direction, self._oscillating = MODE_STATE.get(mode, MODE_STATE[None])
 
         return True
 
@@ -330,7 +326,7 @@ class VakioFan(VakioBaseFan, FanEntity):
         Обновление текущего состояния включённости вентиляционной системы.
         Возвращается "истина" если было выполнено обновление.
         """
-        isOn: bool | None = self.coordinator.IsOn()
+        isOn: bool | None = self.coordinator.IsOn(self._device)
         if isOn == None:
             return False
         if not bool(isOn):
@@ -343,9 +339,7 @@ class VakioFan(VakioBaseFan, FanEntity):
             # Вентиляция включена.
             if self._percentage is None or self._percentage == 0:
                 if self._percentage is None:
-                    self._percentage = ordered_list_item_to_percentage(
-                        NAMED_FAN_SPEEDS, FAN_SPEED_01
-                    )
+                    self._percentage = self._speeds.Percentage(FAN_SPEED_01)
                 if self._preset_mode == FAN_MODE_OFF:
                     self._preset_mode = None
                 return True
@@ -357,48 +351,7 @@ class VakioFan(VakioBaseFan, FanEntity):
         Обновление состояния всех индикаторов интеграции в соответствии
         с переключённым режимом работы вентиляционной системы.
         """
-        # Выбор режима рекуперация при включении "колебания".
-        if (
-            self._oscillating
-            and self._preset_mode != FAN_MODE_RECUPERATOR
-            and self._preset_mode != FAN_MODE_WINTER
-            and self._preset_mode != FAN_MODE_NIGHT
-        ):
-            self._preset_mode = FAN_MODE_RECUPERATOR
-            for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-                if mode == self._preset_mode:
-                    self.coordinator.SetWorkMode(key)
-        if self._oscillating and self._direction != None:
-            self._direction = None
-        if not self._oscillating and self._direction == None:
-            self._direction = DIRECTION_FORWARD
-        if self._direction == DIRECTION_REVERSE and (
-            self._preset_mode == FAN_MODE_INFLOW
-            or self._preset_mode == FAN_MODE_INFLOW_MAX
-        ):
-            self._direction = DIRECTION_FORWARD
-        if self._direction == DIRECTION_FORWARD and (
-            self._preset_mode == FAN_MODE_OUTFLOW
-            or self._preset_mode == FAN_MODE_OUTFLOW_MAX
-        ):
-            self._direction = DIRECTION_REVERSE
-        if not self._oscillating and (
-            self._preset_mode == FAN_MODE_RECUPERATOR
-            or self._preset_mode == FAN_MODE_WINTER
-            or self._preset_mode == FAN_MODE_NIGHT
-        ):
-            self._preset_mode = FAN_MODE_INFLOW
-            for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-                if mode == self._preset_mode:
-                    self.coordinator.SetWorkMode(key)
-        if (
-            not self._percentage is None
-            and self._percentage > 0
-            and (self._preset_mode is None or self._preset_mode == FAN_MODE_OFF)
-        ):
-            self._direction = DIRECTION_FORWARD
-            self._preset_mode = FAN_MODE_INFLOW
-            for key, mode in SERVER_WORK_TO_FAN_MODE.items():
-                if mode == self._preset_mode:
-                    self.coordinator.SetWorkMode(key)
-        self.schedule_update_ha_state()
+        # Включённая вентиляция без режима переводится в режим притока.
+        if self._percentage and self._preset_mode in IDLE_MODES:
+            self.applyTransition(ACTION_TURN_ON)
+        self.async_write_state_if_changed()
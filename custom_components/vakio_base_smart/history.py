@@ -0,0 +1,191 @@
+"""
+История отображаемого состояния вентиляционных систем.
+Отсчёты хранятся в кольцевом буфере из массивов фиксированного размера:
+время, индекс устройства, состояние, скорость, код режима работы и
+доступность. Один отсчёт занимает 14 байт, записывается только изменение
+состояния. Отсчёты старше времени хранения вытесняются.
+"""
+import array
+import copy
+import csv
+import datetime
+import json
+from typing import IO, Iterator, NamedTuple
+
+from .const import DEFAULT_HISTORY_CAPACITY, SERVER_WORK_TO_FAN_MODE, SPEED_MAX
+from .types import ConditionResponse
+
+
+# Коды режимов работы: индекс в кортеже, -1 - не известен.
+WORKMODES: tuple[str, ...] = tuple(SERVER_WORK_TO_FAN_MODE)
+# Поля состояния устройства, изменение которых записывается в историю.
+HISTORY_FIELDS: frozenset[str] = frozenset({"State", "Speed", "Work", "Available"})
+# Поля выгрузки истории.
+EXPORT_FIELDS: tuple[str, ...] = (
+    "time",
+    "device",
+    "state",
+    "speed",
+    "workmode",
+    "available",
+)
+UNKNOWN: int = -1
+# Код максимальной скорости режимов с максимальной производительностью.
+SPEED_CODE_MAX: int = 127
+
+
+class HistorySample(NamedTuple):
+    """Отсчёт истории состояния вентиляционной системы."""
+
+    At: float
+    Device: str
+    State: bool | None
+    Speed: int | None
+    Work: str | None
+    Available: bool
+
+    def Dump(self) -> dict[str, str | int | bool | None]:
+        """Представление отсчёта для выгрузки, время в формате ISO 8601."""
+        return {
+            "time": datetime.datetime.fromtimestamp(
+                self.At, datetime.timezone.utc
+            ).isoformat(),
+            "device": self.Device,
+            "state": self.State,
+            "speed": self.Speed,
+            "workmode": self.Work,
+            "available": self.Available,
+        }
+
+
+class History:
+    """
+    Кольцевой буфер отсчётов истории состояния устройств.
+    retention - время хранения отсчётов, секунд; capacity - максимальное
+    число отсчётов, при переполнении вытесняются самые старые.
+    """
+
+    def __init__(
+        self, retention: float, capacity: int = DEFAULT_HISTORY_CAPACITY
+    ) -> None:
+        """Конструктор."""
+        self._retention = retention
+        self._capacity = capacity
+        self._times = array.array("d", bytes(8 * capacity))
+        self._devices = array.array("H", bytes(2 * capacity))
+        self._states = array.array("b", bytes(capacity))
+        self._speeds = array.array("b", bytes(capacity))
+        self._works = array.array("b", bytes(capacity))
+        self._available = array.array("b", bytes(capacity))
+        # Идентификаторы устройств по индексу, хранимому в отсчётах.
+        self._names: list[str] = []
+        self._indexes: dict[str, int] = {}
+        self._start: int = 0
+        self._size: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def Add(self, at: float, device: str, condition: ConditionResponse | None) -> None:
+        """
+        Запись состояния устройства на момент at (секунд от начала эпохи).
+        Если состояние не передано, устройство записывается недоступным.
+        """
+        self._expire(at)
+        if (index := self._indexes.get(device)) is None:
+            index = self._indexes[device] = len(self._names)
+            self._names.append(device)
+        n = (self._start + self._size) % self._capacity
+        if self._size == self._capacity:
+            self._start = (self._start + 1) % self._capacity
+        else:
+            self._size += 1
+        self._times[n] = at
+        self._devices[n] = index
+        if condition is None:
+            self._states[n] = self._speeds[n] = self._works[n] = UNKNOWN
+            self._available[n] = False
+            return
+        self._states[n] = UNKNOWN if condition.State is None else condition.State
+        self._speeds[n] = _speed_code(condition.Speed)
+        self._works[n] = (
+            WORKMODES.index(condition.Work) if condition.Work in WORKMODES else UNKNOWN
+        )
+        self._available[n] = bool(condition.Available)
+
+    def _expire(self, now: float) -> None:
+        """Вытеснение отсчётов старше времени хранения."""
+        limit: float = now - self._retention
+        while self._size and self._times[self._start] < limit:
+            self._start = (self._start + 1) % self._capacity
+            self._size -= 1
+
+    def Copy(self) -> "History":
+        """
+        Копия буфера, например для выгрузки в отдельном потоке, пока
+        координатор продолжает записывать отсчёты.
+        """
+        history = copy.copy(self)
+        history._times = self._times[:]
+        history._devices = self._devices[:]
+        history._states = self._states[:]
+        history._speeds = self._speeds[:]
+        history._works = self._works[:]
+        history._available = self._available[:]
+        history._names = list(self._names)
+        history._indexes = dict(self._indexes)
+        return history
+
+    def Samples(self, now: float) -> Iterator[HistorySample]:
+        """Отсчёты в порядке записи, не старше времени хранения на момент now."""
+        limit: float = now - self._retention
+        for offset in range(self._size):
+            n = (self._start + offset) % self._capacity
+            if self._times[n] < limit:
+                continue
+            yield HistorySample(
+                At=self._times[n],
+                Device=self._names[self._devices[n]],
+                State=None if self._states[n] == UNKNOWN else bool(self._states[n]),
+                Speed=_speed(self._speeds[n]),
+                Work=None if self._works[n] == UNKNOWN else WORKMODES[self._works[n]],
+                Available=bool(self._available[n]),
+            )
+
+
+def _speed_code(speed: int | None) -> int:
+    """Код скорости для хранения в массиве знаковых байт."""
+    if speed == SPEED_MAX:
+        return SPEED_CODE_MAX
+    if speed is None or not 0 <= speed < SPEED_CODE_MAX:
+        return UNKNOWN
+    return int(speed)
+
+
+def _speed(code: int) -> int | None:
+    """Скорость по коду, обратное _speed_code."""
+    if code == SPEED_CODE_MAX:
+        return SPEED_MAX
+    if code == UNKNOWN:
+        return None
+    return code
+
+
+def write_csv(samples: Iterator[HistorySample], stream: IO[str]) -> int:
+    """Построчная запись отсчётов в формате CSV с заголовком, возвращается их число."""
+    writer = csv.DictWriter(stream, EXPORT_FIELDS)
+    writer.writeheader()
+    count: int = 0
+    for sample in samples:
+        writer.writerow(sample.Dump())
+        count += 1
+    return count
+
+
+def write_jsonl(samples: Iterator[HistorySample], stream: IO[str]) -> int:
+    """Запись отсчётов в формате JSON Lines, возвращается их число."""
+    count: int = 0
+    for sample in samples:
+        stream.write(json.dumps(sample.Dump(), ensure_ascii=False) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,75 @@
+"""
+Показатели работы координатора для диагностических сенсоров: длительность
+опроса сервера, доля ошибочных запросов и время подтверждения команд.
+Значения рассчитываются по последним измерениям в скользящем окне.
+"""
+import collections
+from typing import Callable
+
+from .const import DEFAULT_METRICS_WINDOW
+
+
+class Metrics:
+    """Скользящие окна измерений с подпиской на их изменение."""
+
+    def __init__(self, window: int = DEFAULT_METRICS_WINDOW) -> None:
+        """Конструктор."""
+        self._latencies: collections.deque[float] = collections.deque(maxlen=window)
+        self._results: collections.deque[bool] = collections.deque(maxlen=window)
+        self._round_trips: collections.deque[float] = collections.deque(
+            maxlen=window
+        )
+        self._listeners: list[Callable[[], None]] = []
+
+    def AddListener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """
+        Подписка на новые измерения.
+        Возвращается функция отмены подписки.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def Poll(self, latency: float, ok: bool) -> None:
+        """Регистрация опроса сервера длительностью latency секунд."""
+        if ok:
+            self._latencies.append(latency)
+        self._results.append(ok)
+        self._notify()
+
+    def Command(self, ok: bool) -> None:
+        """Регистрация результата отправки команды."""
+        self._results.append(ok)
+        self._notify()
+
+    def RoundTrip(self, elapsed: float) -> None:
+        """
+        Регистрация времени от отправки команды до получения состояния
+        устройства, подтверждающего команду, секунд.
+        """
+        self._round_trips.append(elapsed)
+        self._notify()
+
+    def PollLatency(self) -> float | None:
+        """Средняя длительность успешного опроса сервера, миллисекунд."""
+        if not self._latencies:
+            return None
+
+        return round(sum(self._latencies) / len(self._latencies) * 1000, 1)
+
+    def ErrorRate(self) -> float | None:
+        """Доля ошибочных запросов к серверу, процентов."""
+        if not self._results:
+            return None
+
+        return round(self._results.count(False) / len(self._results) * 100, 1)
+
+    def CommandRoundTrip(self) -> float | None:
+        """Среднее время подтверждения команды устройством, секунд."""
+        if not self._round_trips:
+            return None
+
+        return round(sum(self._round_trips) / len(self._round_trips), 2)
@@ -0,0 +1,171 @@
+"""
+Модель предустановленных режимов работы и скоростей вентиляционной системы.
+Все таблицы строятся один раз, при импорте модуля или при первом обращении,
+сущности выполняют только поиск по ним.
+"""
+import decimal
+import functools
+from typing import NamedTuple
+
+from homeassistant.components.fan import DIRECTION_FORWARD, DIRECTION_REVERSE
+from homeassistant.util.percentage import (
+    ordered_list_item_to_percentage,
+    percentage_to_ordered_list_item,
+)
+
+from .const import SERVER_WORK_TO_FAN_MODE, SPEED_MAX
+from .const import (
+    FAN_MODE_OFF,
+    FAN_MODE_INFLOW,
+    FAN_MODE_RECUPERATOR,
+    FAN_MODE_INFLOW_MAX,
+    FAN_MODE_WINTER,
+    FAN_MODE_OUTFLOW,
+    FAN_MODE_OUTFLOW_MAX,
+    FAN_MODE_NIGHT,
+)
+
+
+## Обратное соответствие: режим Home Assistant -> режим сервера.
+FAN_MODE_TO_SERVER_WORK: dict[str, str] = {
+    mode: work for work, mode in SERVER_WORK_TO_FAN_MODE.items()
+}
+
+## Категории режимов.
+INFLOW_MODES: frozenset[str] = frozenset({FAN_MODE_INFLOW, FAN_MODE_INFLOW_MAX})
+OUTFLOW_MODES: frozenset[str] = frozenset({FAN_MODE_OUTFLOW, FAN_MODE_OUTFLOW_MAX})
+RECUPERATION_MODES: frozenset[str] = frozenset(
+    {FAN_MODE_RECUPERATOR, FAN_MODE_WINTER, FAN_MODE_NIGHT}
+)
+# Режимы, в которых вентиляция не работает; None - режим не известен.
+IDLE_MODES: frozenset[str | None] = frozenset({None, FAN_MODE_OFF})
+
+## Действия пользователя.
+ACTION_FORWARD: str = DIRECTION_FORWARD
+ACTION_REVERSE: str = DIRECTION_REVERSE
+ACTION_OSCILLATE_ON: str = "oscillate_on"
+ACTION_OSCILLATE_OFF: str = "oscillate_off"
+ACTION_TURN_ON: str = "turn_on"
+
+
+class ModeState(NamedTuple):
+    """Отображаемое состояние вентиляции в режиме: направление и рекуперация."""
+
+    direction: str | None
+    oscillating: bool
+
+
+class Transition(NamedTuple):
+    """
+    Результат действия пользователя: новый режим, его отображаемое состояние и
+    режим сервера, который требуется установить (None - команда не нужна).
+    """
+
+    preset_mode: str | None
+    direction: str | None
+    oscillating: bool
+    workmode: str | None
+
+
+def _mode_state(mode: str | None) -> ModeState:
+    if mode in INFLOW_MODES:
+        return ModeState(DIRECTION_FORWARD, False)
+    if mode in OUTFLOW_MODES:
+        return ModeState(DIRECTION_REVERSE, False)
+    if mode in RECUPERATION_MODES:
+        return ModeState(None, True)
+    return ModeState(None, False)
+
+
+## Все режимы, включая не известный.
+MODES: tuple[str | None, ...] = (None, *SERVER_WORK_TO_FAN_MODE.values())
+
+## Отображаемое состояние для каждого режима.
+MODE_STATE: dict[str | None, ModeState] = {mode: _mode_state(mode) for mode in MODES}
+
+
+def _transition(mode: str | None, action: str) -> Transition:
+    """
+    Расчёт перехода. Если текущий режим уже соответствует действию, режим
+    сохраняется и команда не отправляется, иначе выбирается основной режим
+    категории.
+    """
+    target: str | None = mode
+    if action == ACTION_FORWARD and mode not in INFLOW_MODES:
+        target = FAN_MODE_INFLOW
+    elif action == ACTION_REVERSE and mode not in OUTFLOW_MODES:
+        target = FAN_MODE_OUTFLOW
+    elif action == ACTION_OSCILLATE_ON and mode not in RECUPERATION_MODES:
+        target = FAN_MODE_RECUPERATOR
+    elif action == ACTION_OSCILLATE_OFF and mode in RECUPERATION_MODES:
+        target = FAN_MODE_INFLOW
+    elif action == ACTION_TURN_ON and mode in IDLE_MODES:
+        target = FAN_MODE_INFLOW
+    return Transition(
+        target,
+        *MODE_STATE[target],
+        FAN_MODE_TO_SERVER_WORK[target] if target != mode else None,
+    )
+
+
+## Таблица переходов: (текущий режим, действие) -> переход.
+TRANSITIONS: dict[tuple[str | None, str], Transition] = {
+    (mode, action): _transition(mode, action)
+    for mode in MODES
+    for action in (
+        ACTION_FORWARD,
+        ACTION_REVERSE,
+        ACTION_OSCILLATE_ON,
+        ACTION_OSCILLATE_OFF,
+        ACTION_TURN_ON,
+    )
+}
+
+
+class SpeedTable:
+    """
+    Соответствие скоростей вентиляции и процентов Home Assistant для модели
+    вентиляционной системы с count скоростями. Таблицы в обе стороны строятся
+    при создании, преобразования выполняются поиском по индексу.
+    """
+
+    def __init__(self, count: int) -> None:
+        """Конструктор."""
+        speeds: list[int] = list(range(1, count + 1))
+        self.count = count
+        # Процент по скорости, индекс - скорость.
+        self._percentages: tuple[int, ...] = (
+            0,
+            *(ordered_list_item_to_percentage(speeds, speed) for speed in speeds),
+        )
+        # Скорость по проценту, индекс - процент.
+        self._speeds: tuple[int, ...] = (
+            0,
+            *(
+                percentage_to_ordered_list_item(speeds, percentage)
+                for percentage in range(1, 101)
+            ),
+        )
+
+    def Percentage(self, speed: decimal.Decimal) -> int | None:
+        """
+        Процент скорости вентиляции, 0 - вентилятор остановлен. Скорость режимов
+        с максимальной производительностью соответствует 100 процентам.
+        Для скорости вне диапазона модели возвращается None.
+        """
+        if speed == SPEED_MAX:
+            return 100
+        if not 0 <= speed <= self.count or speed != int(speed):
+            return None
+
+        return self._percentages[int(speed)]
+
+    def Speed(self, percentage: int) -> int:
+        """Скорость вентиляции по проценту, 0 процентов - вентилятор остановлен."""
+        return self._speeds[min(max(int(percentage), 0), 100)]
+
+
+@functools.cache
+def speed_table(count: int) -> SpeedTable:
+    """Общая для всех сущностей таблица скоростей модели с count скоростями."""
+    return SpeedTable(count)
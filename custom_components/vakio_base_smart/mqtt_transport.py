@@ -0,0 +1,260 @@
+"""
+Прямое взаимодействие с вентиляционными системами через MQTT интеграцию
+Home Assistant, без управляющего сервера (server/).
+Сообщения топиков разбираются по тем же правилам, что и на сервере
+(server_message.go: onMessage, types_mode.go: ModeType.ToState), команды
+публикуются в те же топики, что публикует сервер.
+"""
+import asyncio
+import dataclasses
+import datetime
+import decimal
+import logging
+from typing import Any, AsyncIterator, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .breaker import CircuitBreaker
+from .const import SPEED_MAX
+from .types import ConditionResponse, Schedule
+
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+## Имена топиков вентиляционной системы, относительно префикса устройства.
+TOPIC_SYSTEM: str = "system"
+TOPIC_STATE: str = "state"
+TOPIC_SPEED: str = "speed"
+TOPIC_WORKMODE: str = "workmode"
+TOPIC_MODE: str = "mode"
+
+STATE_ON: str = "on"
+STATE_OFF: str = "off"
+WORKMODES: frozenset[str] = frozenset(
+    {"inflow", "recuperator", "inflow_max", "winter", "outflow", "outflow_max", "night"}
+)
+COMMANDS: frozenset[str] = frozenset({"0608", "0609", "0689"})
+COMMAND_INTERNAL_SYSTEM: str = "internal_system"
+
+## Режимы вентиляционной системы и изменения состояния, которые они вызывают:
+## (состояние, скорость, режим работы), None - значение не меняется.
+MODE_TO_STATE: dict[str, tuple[bool | None, int | None, str | None]] = {
+    "06000": (False, 0, None),
+    "06001": (True, None, None),
+    "06010": (None, None, "recuperator"),
+    "06011": (None, None, "winter"),
+    "06021": (None, None, "inflow"),
+    "06022": (None, SPEED_MAX, "inflow_max"),
+    "06031": (None, None, "outflow"),
+    "06032": (None, SPEED_MAX, "outflow_max"),
+    "06041": (None, None, "night"),
+    **{f"0650{speed}": (None, speed, None) for speed in range(1, 8)},
+}
+
+
+def parse_devices(value: str) -> list[str]:
+    """
+    Разбор списка префиксов топиков вентиляционных систем в формате переменной
+    окружения сервера VAKIO_DEVICES: "префикс[=IP]" через запятую или пробел.
+    IP адреса в этом режиме не используются.
+    """
+    ret: list[str] = []
+    for item in value.replace(",", " ").split():
+        device = item.partition("=")[0].strip("/")
+        if not device or any(char in device for char in "/+#"):
+            raise ValueError(
+                f"Не корректный префикс топиков вентиляционной системы: {item!r}"
+            )
+        if device in ret:
+            raise ValueError(
+                f"Префикс топиков вентиляционной системы указан повторно: {device!r}"
+            )
+        ret.append(device)
+
+    return ret
+
+
+def apply_message(
+    condition: ConditionResponse, name: str, payload: str
+) -> ConditionResponse:
+    """
+    Применение сообщения топика name к состоянию вентиляционной системы.
+    Пробельные символы вокруг значения не учитываются во всех топиках.
+    При некорректном сообщении возбуждается ValueError.
+    """
+    value: str = payload.strip().lower()
+    changes: dict[str, Any] = {}
+    if name == TOPIC_STATE:
+        if value not in (STATE_ON, STATE_OFF):
+            raise ValueError(
+                f"Неизвестное состояние вентиляционной системы: {payload!r}"
+            )
+        changes["State"] = value == STATE_ON
+    elif name == TOPIC_SPEED:
+        if not value.isdigit():
+            raise ValueError(f"Неизвестная скорость вентиляторов: {payload!r}")
+        changes["Speed"] = int(value)
+    elif name == TOPIC_WORKMODE:
+        if value not in WORKMODES:
+            raise ValueError(
+                f"Неизвестный режим работы вентиляционной системы: {payload!r}"
+            )
+        changes["Work"] = value
+    elif name == TOPIC_MODE:
+        if value not in MODE_TO_STATE:
+            raise ValueError(f"Неизвестный режим вентиляционной системы: {payload!r}")
+        changes["Mode"] = value
+        state, speed, work = MODE_TO_STATE[value]
+        if state is not None:
+            changes["State"] = state
+        if speed is not None:
+            changes["Speed"] = speed
+        if work is not None:
+            changes["Work"] = work
+    elif name == TOPIC_SYSTEM:
+        if value in COMMANDS:
+            changes["Command"] = value
+        elif value.startswith(("0600", "0601")):
+            changes["Command"] = COMMAND_INTERNAL_SYSTEM
+        else:
+            raise ValueError(
+                f"Неизвестная команда вентиляционной системы: {payload!r}"
+            )
+    else:
+        raise ValueError(f"Поступило сообщение в неизвестный топик: {name!r}")
+    changes["LastActivityAt"] = datetime.datetime.now(datetime.timezone.utc)
+    # Доступность определяется по поступлению сообщений от устройства.
+    changes["Available"] = True
+
+    return dataclasses.replace(condition, **changes)
+
+
+class MqttApi:
+    """
+    Реализация методов Api поверх MQTT интеграции Home Assistant.
+    Состояние вентиляционных систем собирается из сообщений топиков и
+    передаётся координатору потоком событий, периодический опрос не нужен.
+    """
+
+    def __init__(self, hass: HomeAssistant, devices: list[str]) -> None:
+        self._hass = hass
+        self._devices = devices
+        self.conditions: dict[str, ConditionResponse] = {
+            device: ConditionResponse() for device in devices
+        }
+        self.breaker = CircuitBreaker("mqtt")
+
+    async def login(self) -> None:
+        """Авторизация не требуется, используется подключение MQTT интеграции."""
+
+    async def Conditions(self) -> dict[str, ConditionResponse] | None:
+        """Текущее состояние всех устройств, собранное из сообщений."""
+        return dict(self.conditions)
+
+    async def Condition(self, device: str) -> ConditionResponse | None:
+        """Текущее состояние устройства, собранное из сообщений."""
+        return self.conditions.get(device)
+
+    async def Events(self) -> AsyncIterator[tuple[str, ConditionResponse]]:
+        """
+        Подписка на топики вентиляционных систем.
+        Сначала возвращается текущее состояние всех устройств, затем состояние
+        устройства после каждого сообщения. Если MQTT интеграция не доступна,
+        возбуждается ConnectionError.
+        """
+        from homeassistant.components import mqtt
+
+        if not await mqtt.async_wait_for_mqtt_client(self._hass):
+            raise ConnectionError("MQTT интеграция не доступна")
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        unsubscribe: list[Callable[[], None]] = []
+
+        @callback
+        def message_received(msg: Any) -> None:
+            device, _, name = msg.topic.strip().rpartition("/")
+            if device not in self.conditions:
+                _LOGGER.debug(f"Сообщение неизвестного устройства: {msg.topic}")
+                return
+            try:
+                self.conditions[device] = apply_message(
+                    self.conditions[device], name.lower(), str(msg.payload)
+                )
+            except ValueError as err:
+                _LOGGER.warning(f"Сообщение {msg.topic} не обработано: {err}")
+                return
+            queue.put_nowait(device)
+
+        try:
+            for device in self._devices:
+                unsubscribe.append(
+                    await mqtt.async_subscribe(
+                        self._hass, f"{device}/+", message_received
+                    )
+                )
+            for device, condition in self.conditions.items():
+                yield device, condition
+            while True:
+                device = await queue.get()
+                yield device, self.conditions[device]
+        finally:
+            for unsub in unsubscribe:
+                unsub()
+
+    async def Control(
+        self,
+        device: str,
+        state: bool | None = None,
+        speed: decimal.Decimal | None = None,
+        workmode: str | None = None,
+    ) -> bool:
+        """
+        Публикация команд в топики устройства в том же порядке, что и на
+        сервере: состояние, режим работы, скорость. При выключении скорость не
+        публикуется.
+        """
+        from homeassistant.components import mqtt
+
+        try:
+            if state is not None:
+                await mqtt.async_publish(
+                    self._hass,
+                    f"{device}/{TOPIC_STATE}",
+                    STATE_ON if state else STATE_OFF,
+                )
+            if workmode is not None:
+                await mqtt.async_publish(
+                    self._hass, f"{device}/{TOPIC_WORKMODE}", workmode
+                )
+            if speed is not None and state is not False:
+                await mqtt.async_publish(
+                    self._hass, f"{device}/{TOPIC_SPEED}", str(int(speed))
+                )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error(f"Ошибка публикации команды устройству {device}: {err}")
+            return False
+
+        return True
+
+    async def Controls(
+        self, commands: dict[str, dict[str, Any]]
+    ) -> dict[str, bool] | None:
+        """
+        Пакетные команды не поддерживаются: каждое устройство управляется своими
+        топиками, команды отправляются по одной методом Control.
+        """
+        return None
+
+    async def Schedules(self) -> dict[str, Schedule] | None:
+        """
+        Недельные программы выполняются сервером и без него не поддерживаются,
+        возвращается None.
+        """
+        return None
+
+    async def SetSchedule(self, device: str, schedule: Schedule) -> bool:
+        """Недельные программы без сервера не поддерживаются."""
+        _LOGGER.error(
+            f"Программа устройства {device} не установлена: недельные программы "
+            "выполняются сервером и не поддерживаются при транспорте MQTT"
+        )
+        return False
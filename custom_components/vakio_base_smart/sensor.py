@@ -3,14 +3,26 @@ import decimal
 import logging
 
 # from homeassistant.components.sensor.const import SensorDeviceClass
-from homeassistant.components.sensor import SensorEntity
+from typing import Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .api import Coordinator
-from .const import DOMAIN, DEFAULT_TIME_BETWEEN_UPDATE
+from .const import DOMAIN, NAME, MANUFACTURER
+from .const import BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+from .entity import VakioEntity, device_name, device_unique_id
+from .metrics import Metrics
+from .types import PingStatistics
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -23,28 +35,100 @@ async def async_setup_entry(
     # _LOGGER.info("Вызов функции sensor->async_setup_entry()")
     name = "Main power"
     unique_id = "main_power"
-    async_add_entities([VakioSensorEntity(hass, unique_id, name, conf.entry_id)])
     coordinator: Coordinator = hass.data[DOMAIN][conf.entry_id]
-    async_track_time_interval(
-        hass, coordinator._async_update, DEFAULT_TIME_BETWEEN_UPDATE
+    known: set[str] = set()
+
+    @callback
+    def async_add_devices() -> None:
+        """Добавление сенсоров для новых вентиляционных систем сервера."""
+        devices = [device for device in coordinator.Devices() if device not in known]
+        if not devices:
+            return
+        known.update(devices)
+        entities: list[SensorEntity] = []
+        for device in devices:
+            entities += [
+                VakioSensorEntity(
+                    coordinator,
+                    device,
+                    device_unique_id(device, unique_id),
+                    device_name(device, name),
+                    conf.entry_id,
+                ),
+                VakioPingSensorEntity(
+                    coordinator,
+                    device,
+                    conf.entry_id,
+                    "ping_rtt",
+                    "Ping RTT",
+                    lambda ping: ping.RttAvg,
+                    UnitOfTime.MILLISECONDS,
+                    SensorDeviceClass.DURATION,
+                ),
+                VakioPingSensorEntity(
+                    coordinator,
+                    device,
+                    conf.entry_id,
+                    "ping_loss",
+                    "Ping loss",
+                    lambda ping: ping.Loss,
+                    PERCENTAGE,
+                ),
+            ]
+        async_add_entities(entities)
+
+    async_add_entities(
+        [
+            VakioBreakerSensorEntity(coordinator, conf.entry_id),
+            VakioMetricSensorEntity(
+                coordinator,
+                conf.entry_id,
+                "poll_latency",
+                "Bridge poll latency",
+                Metrics.PollLatency,
+                UnitOfTime.MILLISECONDS,
+                SensorDeviceClass.DURATION,
+            ),
+            VakioMetricSensorEntity(
+                coordinator,
+                conf.entry_id,
+                "error_rate",
+                "Bridge error rate",
+                Metrics.ErrorRate,
+                PERCENTAGE,
+            ),
+            VakioMetricSensorEntity(
+                coordinator,
+                conf.entry_id,
+                "command_round_trip",
+                "Command round trip",
+                Metrics.CommandRoundTrip,
+                UnitOfTime.SECONDS,
+                SensorDeviceClass.DURATION,
+            ),
+        ]
     )
+    async_add_devices()
+    conf.async_on_unload(coordinator.async_add_listener(async_add_devices))
 
     return True
 
 
-class VakioSensorEntity(SensorEntity):
+class VakioSensorEntity(VakioEntity, SensorEntity):
     def __init__(
-        self, hass: HomeAssistant, unique_id: str, name: str, entry_id: str
+        self,
+        coordinator: Coordinator,
+        device: str,
+        unique_id: str,
+        name: str,
+        entry_id: str,
     ) -> None:
-        super().__init__()
-        coordinator: Coordinator = hass.data[DOMAIN][entry_id]
-        self.hass = hass
+        super().__init__(coordinator, device, entry_id)
         self._attr_unique_id = unique_id
         self._attr_name = name
         self._entity_id = entry_id
         # self._attr_device_class = SensorDeviceClass.BATTERY
         self._attr_device_class = "battery"
-        self.coordinator = coordinator
 
     @property
     def state(self) -> None | decimal.Decimal:
@@ -56,7 +140,7 @@ class VakioSensorEntity(SensorEntity):
         * 100  - Сервер успешно пингует вентиляционную систему.
         """
         ret: decimal.Decimal | None = None
-        ave = self.coordinator.Available()
+        ave = self.coordinator.Available(self._device)
         if ave != None:
             if ave:
                 ret = decimal.Decimal(100)
@@ -64,3 +148,143 @@ class VakioSensorEntity(SensorEntity):
                 ret = decimal.Decimal(0)
 
         return ret
+
+
+class VakioPingSensorEntity(VakioEntity, SensorEntity):
+    """
+    Сенсор качества связи сервера с вентиляционной системой по результатам
+    последних ICMP проверок доступности. Минимальное и максимальное время
+    отклика и количество проверок передаются атрибутами.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: Coordinator,
+        device: str,
+        entry_id: str,
+        key: str,
+        name: str,
+        value: Callable[[PingStatistics], float | None],
+        unit: str,
+        device_class: SensorDeviceClass | None = None,
+    ) -> None:
+        super().__init__(coordinator, device, entry_id)
+        self._value = value
+        self._attr_unique_id = device_unique_id(device, f"{entry_id}_{key}")
+        self._attr_name = device_name(device, name)
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+
+    @property
+    def native_value(self) -> float | None:
+        ping = self.coordinator.Ping(self._device)
+        if ping is None:
+            return None
+
+        return self._value(ping)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, float | int | None]:
+        ping = self.coordinator.Ping(self._device)
+        if ping is None:
+            return {}
+
+        return {
+            "rtt_min": ping.RttMin,
+            "rtt_max": ping.RttMax,
+            "samples": ping.Samples,
+        }
+
+
+def bridge_device_info(entry_id: str) -> DeviceInfo:
+    """Описание устройства сервера, к которому относятся диагностические сенсоры."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry_id)},
+        manufacturer=MANUFACTURER,
+        model=NAME,
+        name=f"{NAME} bridge",
+    )
+
+
+class VakioBreakerSensorEntity(CoordinatorEntity[Coordinator], SensorEntity):
+    """
+    Диагностический сенсор состояния связи с сервером: состояние автоматического
+    выключателя запросов. Доступен всегда, в том числе когда сервер недоступен.
+    """
+
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_options = [BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN]
+
+    def __init__(self, coordinator: Coordinator, entry_id: str) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry_id}_bridge_breaker"
+        self._attr_name = "Bridge connection"
+        self._attr_device_info = bridge_device_info(entry_id)
+
+    async def async_added_to_hass(self) -> None:
+        """Подписка на изменение состояния выключателя."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.api.breaker.AddListener(self.async_write_ha_state)
+        )
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def native_value(self) -> str:
+        return self.coordinator.api.breaker.State
+
+    @property
+    def extra_state_attributes(self) -> dict[str, float]:
+        breaker = self.coordinator.api.breaker
+        return {"failures": breaker.Failures, "backoff": breaker.Backoff}
+
+
+class VakioMetricSensorEntity(CoordinatorEntity[Coordinator], SensorEntity):
+    """
+    Диагностический сенсор показателя работы координатора. По умолчанию
+    отключён: состояние обновляется при каждом опросе сервера.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: Coordinator,
+        entry_id: str,
+        key: str,
+        name: str,
+        value: Callable[[Metrics], float | None],
+        unit: str,
+        device_class: SensorDeviceClass | None = None,
+    ) -> None:
+        super().__init__(coordinator)
+        self._value = value
+        self._attr_unique_id = f"{entry_id}_{key}"
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_device_info = bridge_device_info(entry_id)
+
+    async def async_added_to_hass(self) -> None:
+        """Подписка на новые измерения."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.metrics.AddListener(self.async_write_ha_state)
+        )
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def native_value(self) -> float | None:
+        return self._value(self.coordinator.metrics)
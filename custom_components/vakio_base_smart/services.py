@@ -0,0 +1,338 @@
+"""
+Службы интеграции.
+apply_scene - совместная установка состояния, скорости и режима работы
+нескольких вентиляционных систем одним вызовом;
+export_history - выгрузка истории состояния вентиляционных систем в файл;
+set_schedule, clear_schedule - установка и удаление недельных программ,
+выполняемых сервером.
+"""
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+import pathlib
+import time
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.const import WEEKDAYS
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+
+from .api import Coordinator
+from .const import DOMAIN, FAN, SERVER_WORK_TO_FAN_MODE
+from .const import SERVICE_APPLY_SCENE, ATTR_STATE, ATTR_SPEED, ATTR_WORKMODE
+from .const import SERVICE_EXPORT_HISTORY, ATTR_FILENAME, ATTR_FORMAT
+from .const import ATTR_CONFIG_ENTRY_ID, HISTORY_FORMATS, HISTORY_FORMAT_CSV
+from .const import HISTORY_EXPORT_DIR
+from .const import SERVICE_SET_SCHEDULE, SERVICE_CLEAR_SCHEDULE, ATTR_SLOTS
+from .const import ATTR_ENABLED, ATTR_AT, ATTR_DAYS, SCHEDULE_SLOTS_MAX
+from .const import SCHEDULE_SPEED_MAX
+from .history import History, write_csv, write_jsonl
+from .types import Schedule, ScheduleSlot
+
+if TYPE_CHECKING:
+    from .fan import VakioFan
+
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+# Режимы работы, которые можно установить службами.
+WORKMODES: list[str] = [work for work in SERVER_WORK_TO_FAN_MODE if work != "off"]
+APPLY_SCENE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_STATE): cv.boolean,
+        vol.Optional(ATTR_SPEED): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_WORKMODE): vol.In(WORKMODES),
+    }
+)
+
+SCHEDULE_SLOT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_AT): cv.time,
+            vol.Optional(ATTR_DAYS, default=list): vol.All(
+                cv.ensure_list, [vol.In(WEEKDAYS)]
+            ),
+            vol.Optional(ATTR_STATE): cv.boolean,
+            # Сервер выполняет слоты только с именованными скоростями 1-7.
+            vol.Optional(ATTR_SPEED): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=SCHEDULE_SPEED_MAX)
+            ),
+            vol.Optional(ATTR_WORKMODE): vol.In(WORKMODES),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_STATE, ATTR_SPEED, ATTR_WORKMODE),
+)
+
+SET_SCHEDULE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Required(ATTR_SLOTS): vol.All(
+            cv.ensure_list,
+            vol.Length(max=SCHEDULE_SLOTS_MAX),
+            [SCHEDULE_SLOT_SCHEMA],
+        ),
+        vol.Optional(ATTR_ENABLED, default=True): cv.boolean,
+    }
+)
+
+EXPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_FORMAT, default=HISTORY_FORMAT_CSV): vol.In(HISTORY_FORMATS),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Регистрация служб интеграции."""
+    if hass.services.has_service(DOMAIN, SERVICE_APPLY_SCENE):
+        return
+
+    async def async_apply_scene(call: ServiceCall) -> ServiceResponse:
+        """
+        Установка состояния выбранных вентиляционных систем.
+        Команды устройств одного сервера отправляются одним пакетным запросом,
+        серверы обрабатываются параллельно.
+        """
+        fields: dict[str, Any] = {
+            name: call.data[name]
+            for name in (ATTR_STATE, ATTR_SPEED, ATTR_WORKMODE)
+            if name in call.data
+        }
+        if not fields:
+            raise ServiceValidationError(
+                "Не указано ни состояние, ни скорость, ни режим работы"
+            )
+        groups = _selected_fans(hass, call)
+        _check_speed(groups, fields.get(ATTR_SPEED, 0))
+        results = await asyncio.gather(
+            *[
+                coordinator.async_apply_scene(list(entities), **fields)
+                for coordinator, entities in groups.items()
+            ]
+        )
+        response: dict[str, Any] = {}
+        for (coordinator, entities), result in zip(groups.items(), results):
+            for device, entity_id in entities.items():
+                response[entity_id] = {"device": device, "success": result[device]}
+        if not all(item["success"] for item in response.values()):
+            _LOGGER.warning(
+                f"Сцена {fields} применена не ко всем вентиляционным системам: "
+                f"{', '.join(e for e, item in response.items() if not item['success'])}"
+            )
+
+        return {"results": response}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_SCENE,
+        async_apply_scene,
+        schema=APPLY_SCENE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_export_history(call: ServiceCall) -> ServiceResponse:
+        """
+        Выгрузка истории состояния вентиляционных систем в файл в каталоге
+        выгрузки. Отсчёты записываются построчно в отдельном потоке из копии
+        буфера, цикл событий не блокируется.
+        """
+        path, exclusive = _export_path(hass, call.data[ATTR_FILENAME])
+        entry_id: str | None = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        coordinators: dict[str, Coordinator] = hass.data.get(DOMAIN, {})
+        if entry_id is not None and entry_id not in coordinators:
+            raise ServiceValidationError(f"Интеграция {entry_id} не настроена")
+        histories: list[History] = [
+            coordinator.history.Copy()
+            for key, coordinator in coordinators.items()
+            if entry_id in (None, key)
+        ]
+        try:
+            samples: int = await hass.async_add_executor_job(
+                _write_history,
+                path,
+                call.data[ATTR_FORMAT],
+                histories,
+                time.time(),
+                exclusive,
+            )
+        except FileExistsError:
+            raise ServiceValidationError(f"Файл {path} уже существует") from None
+        _LOGGER.debug(f"История состояния выгружена в {path}: {samples} отсчётов")
+
+        return {"path": str(path), "samples": samples}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        async_export_history,
+        schema=EXPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_set_schedule(call: ServiceCall) -> None:
+        """
+        Установка недельной программы выбранных вентиляционных систем.
+        Программа заменяет прежнюю и выполняется сервером без участия
+        Home Assistant.
+        """
+        groups = _selected_fans(hass, call)
+        slots: list[dict[str, Any]] = call.data[ATTR_SLOTS]
+        _check_speed(groups, max([slot.get(ATTR_SPEED, 0) for slot in slots] or [0]))
+        schedule = Schedule(
+            Enabled=call.data[ATTR_ENABLED],
+            Slots=tuple(_schedule_slot(slot) for slot in slots),
+        )
+        await _async_set_schedules(groups, schedule)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_SCHEDULE,
+        async_set_schedule,
+        schema=SET_SCHEDULE_SCHEMA,
+    )
+
+    async def async_clear_schedule(call: ServiceCall) -> None:
+        """Удаление недельной программы выбранных вентиляционных систем."""
+        await _async_set_schedules(_selected_fans(hass, call), Schedule())
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CLEAR_SCHEDULE,
+        async_clear_schedule,
+        schema=cv.make_entity_service_schema({}),
+    )
+
+
+def _selected_fans(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[Coordinator, dict[str, str]]:
+    """
+    Выбранные в вызове службы вентиляционные системы, сгруппированные по
+    координаторам: идентификатор устройства -> идентификатор сущности.
+    """
+    selected = async_extract_referenced_entity_ids(hass, call)
+    groups: dict[Coordinator, dict[str, str]] = {}
+    for entity_id in sorted(selected.referenced | selected.indirectly_referenced):
+        fan = _vakio_fan(hass, entity_id)
+        if fan is None:
+            # Сущности других интеграций в выбранных зонах и устройствах
+            # пропускаются, а явно указанные считаются ошибкой.
+            if entity_id in selected.referenced:
+                raise ServiceValidationError(
+                    f"{entity_id} не является вентиляционной системой {DOMAIN}"
+                )
+            continue
+        groups.setdefault(fan.coordinator, {})[fan.device] = entity_id
+    if not groups:
+        raise ServiceValidationError("Не выбрано ни одной вентиляционной системы")
+
+    return groups
+
+
+def _check_speed(groups: dict[Coordinator, dict[str, str]], speed: int) -> None:
+    """Проверка, что скорость поддерживается вентиляционными системами."""
+    for coordinator in groups:
+        if speed > coordinator.speed_count:
+            raise ServiceValidationError(
+                f"Скорость {speed} не поддерживается, количество "
+                f"скоростей вентиляционных систем: {coordinator.speed_count}"
+            )
+
+
+def _schedule_slot(data: dict[str, Any]) -> ScheduleSlot:
+    """
+    Слот программы по данным вызова службы. Дни недели Home Assistant
+    (mon - sun) переводятся в номера сервера (0 - воскресенье).
+    """
+    return ScheduleSlot(
+        At=data[ATTR_AT].strftime("%H:%M"),
+        Days=tuple(sorted((WEEKDAYS.index(day) + 1) % 7 for day in data[ATTR_DAYS])),
+        State=data.get(ATTR_STATE),
+        Speed=data.get(ATTR_SPEED),
+        Work=data.get(ATTR_WORKMODE),
+    )
+
+
+async def _async_set_schedules(
+    groups: dict[Coordinator, dict[str, str]], schedule: Schedule
+) -> None:
+    """
+    Установка программы всем выбранным вентиляционным системам.
+    Если программа установлена не всем, возбуждается HomeAssistantError.
+    """
+    targets = [
+        (coordinator, device, entity_id)
+        for coordinator, entities in groups.items()
+        for device, entity_id in entities.items()
+    ]
+    results = await asyncio.gather(
+        *[
+            coordinator.async_set_schedule(device, schedule)
+            for coordinator, device, _ in targets
+        ]
+    )
+    if failed := [entity_id for (*_, entity_id), ok in zip(targets, results) if not ok]:
+        raise HomeAssistantError(
+            f"Программа не установлена вентиляционным системам: {', '.join(failed)}"
+        )
+
+
+def _export_path(hass: HomeAssistant, filename: str) -> tuple[pathlib.Path, bool]:
+    """
+    Путь к файлу выгрузки истории и признак запрета перезаписи файла.
+    Относительный путь отсчитывается от каталога выгрузки в каталоге конфигурации,
+    файлы в нём перезаписываются. Путь вне каталога выгрузки должен быть разрешён
+    настройкой allowlist_external_dirs, существующий файл по нему не перезаписывается.
+    """
+    directory = pathlib.Path(hass.config.path(HISTORY_EXPORT_DIR)).resolve()
+    path = (directory / filename).resolve()
+    if path != directory and path.is_relative_to(directory):
+        return path, False
+    if hass.config.is_allowed_path(str(path)):
+        return path, True
+    raise ServiceValidationError(f"Запись в файл {path} не разрешена")
+
+
+def _write_history(
+    path: pathlib.Path,
+    file_format: str,
+    histories: list[History],
+    now: float,
+    exclusive: bool = False,
+) -> int:
+    """
+    Запись отсчётов историй в файл в порядке времени.
+    Если exclusive, существующий файл не перезаписывается: возбуждается
+    FileExistsError. Возвращается число записанных отсчётов.
+    """
+    samples = heapq.merge(
+        *[history.Samples(now) for history in histories],
+        key=lambda sample: sample.At,
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("x" if exclusive else "w", encoding="utf-8", newline="") as stream:
+        if file_format == HISTORY_FORMAT_CSV:
+            return write_csv(samples, stream)
+        return write_jsonl(samples, stream)
+
+
+def _vakio_fan(hass: HomeAssistant, entity_id: str) -> VakioFan | None:
+    """Сущность вентиляционной системы интеграции по идентификатору."""
+    # Платформа загружается Home Assistant при настройке интеграции, к моменту
+    # вызова службы модуль уже импортирован.
+    from .fan import VakioFan
+
+    component = hass.data.get(FAN)
+    if component is None:
+        return None
+    fan = component.get_entity(entity_id)
+    if not isinstance(fan, VakioFan):
+        return None
+
+    return fan
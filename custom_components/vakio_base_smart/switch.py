@@ -0,0 +1,116 @@
+from __future__ import annotations
+import dataclasses
+import logging
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api import Coordinator
+from .const import DOMAIN
+from .entity import VakioEntity, device_name, device_unique_id
+from .types import Schedule
+
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, conf: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> bool:
+    """
+    Инициализация переключателей недельных программ.
+    Если программы не получены с сервера при настройке, запрос повторяется при
+    обновлениях координатора, и переключатели создаются после первого успешного
+    запроса. Сервер без поддержки программ повторно не опрашивается.
+    """
+    coordinator: Coordinator = hass.data[DOMAIN][conf.entry_id]
+    known: set[str] = set()
+    refreshing: bool = False
+
+    async def async_refresh_schedules() -> None:
+        """Повторный запрос программ, не полученных при настройке."""
+        nonlocal refreshing
+        refreshing = True
+        try:
+            await coordinator.async_refresh_schedules()
+        finally:
+            refreshing = False
+
+    @callback
+    def async_add_devices() -> None:
+        """Добавление переключателей для новых вентиляционных систем сервера."""
+        if coordinator.schedules is None:
+            if not refreshing:
+                conf.async_create_background_task(
+                    hass,
+                    async_refresh_schedules(),
+                    f"{DOMAIN} schedules {conf.entry_id}",
+                )
+            return
+        devices = [device for device in coordinator.Devices() if device not in known]
+        if not devices:
+            return
+        known.update(devices)
+        async_add_entities(
+            VakioScheduleSwitchEntity(coordinator, device, conf.entry_id)
+            for device in devices
+        )
+
+    if await coordinator.async_refresh_schedules():
+        async_add_devices()
+    else:
+        _LOGGER.debug("Недельные программы устройств не получены с сервера")
+    conf.async_on_unload(coordinator.async_add_listener(async_add_devices))
+
+    return True
+
+
+class VakioScheduleSwitchEntity(VakioEntity, SwitchEntity):
+    """
+    Переключатель выполнения недельной программы вентиляционной системы
+    сервером. Слоты программы передаются атрибутом, сама программа
+    устанавливается службой set_schedule.
+    """
+
+    _attr_icon = "mdi:calendar-clock"
+
+    def __init__(self, coordinator: Coordinator, device: str, entry_id: str) -> None:
+        super().__init__(coordinator, device, entry_id)
+        self._attr_unique_id = device_unique_id(device, f"{entry_id}_schedule")
+        self._attr_name = device_name(device, "Schedule")
+
+    @property
+    def schedule(self) -> Schedule:
+        """Программа вентиляционной системы, полученная с сервера."""
+        return (self.coordinator.schedules or {}).get(self._device, Schedule())
+
+    @property
+    def available(self) -> bool:
+        """Программа без слотов не может выполняться."""
+        return super().available and bool(self.schedule.Slots)
+
+    @property
+    def is_on(self) -> bool:
+        return self.schedule.Enabled
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"slots": [slot.Dump() for slot in self.schedule.Slots]}
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        await self._async_enable(True)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        await self._async_enable(False)
+
+    async def _async_enable(self, enabled: bool) -> None:
+        """Включение или отключение выполнения программы на сервере."""
+        schedule = dataclasses.replace(self.schedule, Enabled=enabled)
+        if not await self.coordinator.async_set_schedule(self._device, schedule):
+            raise HomeAssistantError(
+                f"Программа вентиляционной системы {self._device} не изменена"
+            )
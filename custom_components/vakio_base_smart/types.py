@@ -1,6 +1,7 @@
+import dataclasses
 import datetime
 import decimal
-import dateutil
+from typing import Any, Callable
 
 
 class Error(Exception):
@@ -32,27 +33,230 @@ class AuthError(Error):
     pass
 
 
+class UnsupportedEndpoint(Error):
+    """Необязательный метод API не поддерживается сервером (ответ 404 или 405)."""
+
+    def __init__(self, endpoint: str):
+        super().__init__(f"Метод API {endpoint} не поддерживается сервером")
+        self.endpoint = endpoint
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PingStatistics:
+    """
+    Сводка последних проверок доступности вентиляционной системы по IP адресу.
+    Время отклика в миллисекундах не заполняется, если ни одна проверка не
+    получила ответа. Время последней проверки в сравнении не участвует.
+    """
+
+    Samples: int = 0
+    RttMin: float | None = None
+    RttAvg: float | None = None
+    RttMax: float | None = None
+    Loss: float = 0
+    LastAt: datetime.datetime | None = dataclasses.field(default=None, compare=False)
+
+    @classmethod
+    def Parse(cls, data: dict[str, Any]) -> "PingStatistics":
+        """Создание объекта из декодированного JSON ответа сервера."""
+        last_at: str | None = data.get("last_at")
+        return cls(
+            Samples=data.get("samples", 0),
+            RttMin=data.get("rtt_min"),
+            RttAvg=data.get("rtt_avg"),
+            RttMax=data.get("rtt_max"),
+            Loss=data.get("loss", 0),
+            LastAt=datetime.datetime.fromisoformat(last_at) if last_at else None,
+        )
+
+    def Dump(self) -> dict[str, Any]:
+        """Представление объекта в формате ответа сервера, обратное Parse."""
+        return {
+            "samples": self.Samples,
+            "rtt_min": self.RttMin,
+            "rtt_avg": self.RttAvg,
+            "rtt_max": self.RttMax,
+            "loss": self.Loss,
+            "last_at": self.LastAt.isoformat() if self.LastAt else None,
+        }
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class ConditionResponse:
     """
     Структура данных возвращаемая запросом API с выполненными обработками полученных данных.
+    Объекты сравниваются по значению тех же полей, по которым сервер считает
+    контрольную сумму статуса: LastActivityAt, Mode и Command не учитываются.
+    """
+
+    State: bool = False
+    LastActivityAt: datetime.datetime | None = dataclasses.field(
+        default=None, compare=False
+    )
+    Available: bool = False
+    Speed: decimal.Decimal = 0
+    Work: str = ""
+    Mode: str = dataclasses.field(default="", compare=False)
+    Command: str = dataclasses.field(default="", compare=False)
+    Ping: PingStatistics | None = None
+
+    @classmethod
+    def Parse(cls, data: dict[str, Any]) -> "ConditionResponse":
+        """
+        Создание объекта из декодированного JSON ответа сервера.
+        Неизвестные поля игнорируются, отсутствующие принимают значения по умолчанию.
+        """
+        last_activity_at: str | None = data.get("last_activity_at")
+        ping: dict[str, Any] | None = data.get("ping")
+        return cls(
+            State=data.get("state") == "on",
+            LastActivityAt=(
+                datetime.datetime.fromisoformat(last_activity_at)
+                if last_activity_at
+                else None
+            ),
+            Available=data.get("available", False),
+            Speed=data.get("speed", 0),
+            Work=data.get("work", ""),
+            Mode=data.get("mode", ""),
+            Command=data.get("command", ""),
+            Ping=PingStatistics.Parse(ping) if ping else None,
+        )
+
+    def Dump(self) -> dict[str, Any]:
+        """Представление объекта в формате ответа сервера, обратное Parse."""
+        return {
+            "last_activity_at": (
+                self.LastActivityAt.isoformat() if self.LastActivityAt else None
+            ),
+            "available": self.Available,
+            "speed": self.Speed,
+            "state": "on" if self.State else "off",
+            "work": self.Work,
+            "mode": self.Mode,
+            "command": self.Command,
+            "ping": self.Ping.Dump() if self.Ping else None,
+        }
+
+    def Diff(self, previous: "ConditionResponse | None") -> frozenset[str]:
+        """
+        Имена сравниваемых полей, значения которых отличаются от предыдущего
+        состояния. Если предыдущего состояния нет, изменившимися считаются все поля.
+        """
+        if previous is None:
+            return CONDITION_FIELDS
+        return frozenset(
+            name
+            for name in CONDITION_FIELDS
+            if getattr(self, name) != getattr(previous, name)
+        )
+
+
+## Поля ConditionResponse, участвующие в сравнении.
+CONDITION_FIELDS: frozenset[str] = frozenset(
+    field.name for field in dataclasses.fields(ConditionResponse) if field.compare
+)
+## Поля телеметрии: меняются при каждой проверке доступности сервером и не
+## считаются изменением состояния вентиляционной системы.
+TELEMETRY_FIELDS: frozenset[str] = frozenset({"Ping"})
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ScheduleSlot:
     """
+    Слот недельной программы вентиляционной системы: с времени At ("ЧЧ:ММ" по
+    местному времени сервера) в дни недели Days устанавливаются заданные
+    состояние, скорость и режим работы, не заданные значения не изменяются.
+    Дни недели нумеруются как на сервере: 0 - воскресенье, 6 - суббота,
+    пустой кортеж - каждый день.
+    """
+
+    At: str
+    Days: tuple[int, ...] = ()
+    State: bool | None = None
+    Speed: int | None = None
+    Work: str | None = None
+
+    @classmethod
+    def Parse(cls, data: dict[str, Any]) -> "ScheduleSlot":
+        """Создание объекта из декодированного JSON ответа сервера."""
+        return cls(
+            At=data["at"],
+            Days=tuple(data.get("days") or ()),
+            State=data.get("state"),
+            Speed=data.get("speed"),
+            Work=data.get("workmode"),
+        )
+
+    def Dump(self) -> dict[str, Any]:
+        """Представление объекта в формате запроса сервера, без не заданных значений."""
+        data: dict[str, Any] = {"at": self.At}
+        if self.Days:
+            data["days"] = list(self.Days)
+        if self.State is not None:
+            data["state"] = self.State
+        if self.Speed is not None:
+            data["speed"] = self.Speed
+        if self.Work is not None:
+            data["workmode"] = self.Work
+        return data
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Schedule:
+    """
+    Недельная программа вентиляционной системы, выполняемая сервером.
+    Программа хранится на сервере и выполняется без участия Home Assistant.
+    """
+
+    Enabled: bool = False
+    Slots: tuple[ScheduleSlot, ...] = ()
+
+    @classmethod
+    def Parse(cls, data: dict[str, Any]) -> "Schedule":
+        """Создание объекта из декодированного JSON ответа сервера."""
+        return cls(
+            Enabled=data.get("enabled", False),
+            Slots=tuple(ScheduleSlot.Parse(slot) for slot in data.get("slots") or ()),
+        )
+
+    def Dump(self) -> dict[str, Any]:
+        """Представление объекта в формате запроса сервера, обратное Parse."""
+        return {
+            "enabled": self.Enabled,
+            "slots": [slot.Dump() for slot in self.Slots],
+        }
+
+
+class PendingCommand:
+    """
+    Ожидаемое состояние устройства после отправки команды.
+    Поля ожидания совпадают с именами свойств ConditionResponse.
+    """
+
+    def __init__(self) -> None:
+        self.Expected: dict[str, Any] = {}
+        self.Deadline: float = 0
+        # Время отправки первой ещё не подтверждённой команды.
+        self.Started: float = 0
+        self.Cancel: Callable[[], None] | None = None
+
+    def Expect(self, fields: dict[str, Any], now: float, deadline: float) -> None:
+        """Добавление ожидаемых значений и продление срока ожидания."""
+        if not self.Expected:
+            self.Started = now
+        self.Expected.update(fields)
+        if self.Expected.get("State") is False:
+            # При выключении скорость не устанавливается.
+            self.Expected.pop("Speed", None)
+        self.Deadline = deadline
+
+    def Confirmed(self, condition: ConditionResponse) -> bool:
+        """Возвращается "истина", если состояние устройства совпало с ожидаемым."""
+        return all(
+            getattr(condition, name) == value for name, value in self.Expected.items()
+        )
 
-    def __init__(
-        self,
-        last_activity_at: str,
-        available: bool,
-        speed: decimal.Decimal,
-        state: str,
-        work: str,
-        mode: str,
-        command: str,
-    ):
-        self.State: bool = False
-        self.LastActivityAt: datetime = dateutil.parser.isoparse(last_activity_at)
-        self.Available: bool = available
-        self.Speed: decimal.Decimal = speed
-        self.Work: str = work
-        self.Mode: str = mode
-        self.Command: str = command
-        if state == "on":
-            self.State = True
+    def Apply(self, condition: ConditionResponse) -> ConditionResponse:
+        """Копия состояния устройства с наложенными ожидаемыми значениями."""
+        return dataclasses.replace(condition, **self.Expected)
@@ -1,15 +1,36 @@
 // Package main
 package main
 
-import "math"
+import (
+	"math"
+	"time"
+)
+
+const (
+	chanInBuffer    = 1000             // Размер канала входящих сообщений.
+	defaultDeviceID = "vakio"          // Префикс топиков вентиляционной системы по умолчанию.
+	publishTimeout  = time.Second * 5  // Время ожидания подтверждения публикации сообщения брокером.
+	controlsLimit   = 8                // Количество вентиляционных систем, управляемых пакетным запросом одновременно.
+	snapshotDelay   = time.Second * 30 // Задержка записи снимка состояния после изменения.
+	shutdownTimeout = time.Second * 10 // Время ожидания завершения запросов при остановке web сервера.
+)
+
+// Параметры выполнения недельных программ вентиляционных систем.
+const (
+	scheduleTimeLayout = "15:04"            // Формат времени начала слота программы.
+	scheduleSlotsLimit = 64                 // Максимальное количество слотов одной программы.
+	scheduleTick       = time.Second        // Интервал проверки наступления слотов программ.
+	scheduleSpread     = time.Second * 30   // Интервал, на который распределяется выполнение слотов, наступивших одновременно.
+	scheduleWeek       = time.Hour * 24 * 7 // Длительность недельной программы.
+)
 
+// Имена топиков вентиляционной системы, полное имя топика: "префикс/имя".
 const (
-	chanInBuffer  = 1000 // Размер канала входящих сообщений.
-	topicSystem   = "vakio/system"
-	topicState    = "vakio/state"
-	topicSpeed    = "vakio/speed"
-	topicWorkmode = "vakio/workmode"
-	topicMode     = "vakio/mode"
+	topicSystem   = "system"
+	topicState    = "state"
+	topicSpeed    = "speed"
+	topicWorkmode = "workmode"
+	topicMode     = "mode"
 )
 
 // Константы состояния вентиляционной системы.
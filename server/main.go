@@ -25,6 +25,15 @@ func main() {
 		MqttPassword: os.Getenv(envMqttPassword),
 		VakioIp:      net.ParseIP(os.Getenv(envVakioIp)),
 		WebServer:    os.Getenv(envWebServer),
+		SnapshotFile: os.Getenv(envSnapshotFile),
+	}
+	if cfg.Devices, err = ParseDevices(os.Getenv(envVakioDevices)); err != nil {
+		log.Fatalf(err.Error())
+		return
+	}
+	// Без списка вентиляционных систем используется одна система с топиками "vakio/*".
+	if len(cfg.Devices) == 0 {
+		cfg.Devices = []DeviceConfiguration{{ID: defaultDeviceID, Ip: cfg.VakioIp}}
 	}
 	// Создание сервера.
 	srv = NewServer(cfg)
@@ -3,8 +3,13 @@ package main
 
 import (
 	"context"
+	"fmt"
 	"log"
+	"os"
+	"os/signal"
 	"strconv"
+	"sync"
+	"syscall"
 	"time"
 
 	mqtt "github.com/eclipse/paho.mqtt.golang"
@@ -12,13 +17,26 @@ import (
 
 // NewServer Создание объекта сервера.
 func NewServer(cfg *Configuration) Server {
-	var srv = &impl{
-		Cfg:    cfg,
-		Mco:    mqtt.NewClientOptions(),
-		Status: new(status),
-		done:   make(chan struct{}),
-		in:     make(chan *Message, chanInBuffer),
+	var (
+		n   int
+		srv *impl
+	)
+
+	srv = &impl{
+		Cfg:       cfg,
+		Mco:       mqtt.NewClientOptions(),
+		Devices:   make(map[string]*device, len(cfg.Devices)),
+		Events:    newEvents(),
+		Schedules: newSchedules(),
+		Snapshot:  newSnapshotStore(cfg.SnapshotFile),
+		done:      make(chan struct{}, 1),
+		in:        make(chan *Message, chanInBuffer),
 	}
+	for n = range cfg.Devices {
+		srv.Devices[cfg.Devices[n].ID] = newDevice(cfg.Devices[n])
+		srv.DeviceIds = append(srv.DeviceIds, cfg.Devices[n].ID)
+	}
+	srv.Metrics = newMetrics(srv.DeviceIds, []string{topicSystem, topicState, topicSpeed, topicWorkmode})
 
 	srv.Mco.SetCleanSession(true)
 	srv.Mco.AddBroker(srv.Cfg.MqttUrl)
@@ -37,6 +55,9 @@ func (srv *impl) Start() (err error) {
 	var token mqtt.Token
 
 	srv.Log()
+	if srv.Snapshot != nil {
+		srv.restoreSnapshot()
+	}
 	srv.Mct = mqtt.NewClient(srv.Mco)
 	log.Println("Запуск сервера.")
 	for {
@@ -57,24 +78,65 @@ func (srv *impl) Start() (err error) {
 }
 
 // Do Выполнение сервера с блокировкой функции.
+// Работа завершается при ошибке сервера или по сигналу SIGINT, SIGTERM.
 func (srv *impl) Do() (err error) {
-	var cfn context.CancelFunc
+	var (
+		ctx  context.Context
+		stop context.CancelFunc
+		cfn  context.CancelFunc
+		end  chan struct{}
+	)
 
+	ctx, stop = signal.NotifyContext(context.Background(), os.Interrupt, syscall.SIGTERM)
+	defer stop()
 	log.Println("Запуск клиента MQTT брокера.")
-	cfn = srv.runServer()
-	defer cfn()
-	<-srv.done
+	cfn, end = srv.runServer(ctx)
+	select {
+	case <-srv.done:
+	case <-ctx.Done():
+		log.Println("Получен сигнал завершения работы сервера.")
+	}
+	cfn()
+	// Ожидание завершения запросов web сервера и записи снимка состояния.
+	<-end
 
 	return
 }
 
-func (srv *impl) runServer() (ret context.CancelFunc) {
-	var ctx context.Context
+// Сигнал завершения работы сервера. Не блокируется, если сигнал уже отправлен.
+func (srv *impl) stop() {
+	select {
+	case srv.done <- struct{}{}:
+	default:
+	}
+}
+
+// Запуск процессов сервера. Процессы завершаются отменой возвращаемого контекста.
+// Процесс записи снимка состояния останавливается после остановки web сервера, чтобы
+// в снимок попали изменения завершённых запросов, канал end закрывается последним.
+func (srv *impl) runServer(parent context.Context) (ret context.CancelFunc, end chan struct{}) {
+	var (
+		ctx  context.Context
+		sctx context.Context
+		scfn context.CancelFunc
+		web  chan struct{}
+	)
 
-	ctx, ret = context.WithCancel(context.Background())
+	ctx, ret = context.WithCancel(parent)
+	sctx, scfn = context.WithCancel(context.Background())
+	end, web = make(chan struct{}), make(chan struct{})
 	go srv.msgServer(ctx)
-	go srv.pingServer(ctx)
-	go srv.webServer(ctx)
+	for _, id := range srv.DeviceIds {
+		go srv.pingServer(ctx, srv.Devices[id])
+	}
+	go srv.scheduleServer(ctx)
+	go srv.webServer(ctx, web)
+	go func() { <-web; scfn() }()
+	if srv.Snapshot != nil {
+		go srv.snapshotServer(sctx, end)
+	} else {
+		go func() { <-sctx.Done(); close(end) }()
+	}
 
 	return
 }
@@ -93,7 +155,11 @@ func (srv *impl) onConnect(client mqtt.Client) {
 		token mqtt.Token
 	)
 
-	chl = []string{topicSystem, topicState, topicSpeed, topicWorkmode, topicMode}
+	for _, id := range srv.DeviceIds {
+		for _, name := range []string{topicSystem, topicState, topicSpeed, topicWorkmode, topicMode} {
+			chl = append(chl, srv.Devices[id].Topic(name))
+		}
+	}
 	sub = func(client mqtt.Client, message mqtt.Message) {
 		msg := &Message{
 			Topic:    message.Topic(),
@@ -104,17 +170,18 @@ func (srv *impl) onConnect(client mqtt.Client) {
 			Msg:      &message,
 		}
 		srv.in <- msg
+		srv.Metrics.Queue(len(srv.in))
 	}
 	log.Println("Соединение с MQTT брокером установлено.")
 	for n = range chl {
 		if token = client.Subscribe(chl[n], 0, sub); !token.WaitTimeout(subscribeTimeout) {
 			log.Printf("Подписка на канал %q прервана по таймауту.\n", chl[n])
-			srv.done <- struct{}{}
+			srv.stop()
 			return
 		}
 		if err = token.Error(); err != nil {
 			log.Printf("Подписка на канал %q прервана ошибкой: %s", chl[n], err)
-			srv.done <- struct{}{}
+			srv.stop()
 			return
 		}
 		log.Printf("Выполнена подписка на канал %q.", chl[n])
@@ -122,69 +189,157 @@ func (srv *impl) onConnect(client mqtt.Client) {
 	log.Println("Завершена подписка на каналы.")
 }
 
-// Reboot Перезагрузка вентиляционной системы.
-func (srv *impl) Reboot() (err error) {
+// Вентиляционная система по умолчанию, первая в списке конфигурации.
+func (srv *impl) defaultDevice() *device { return srv.Devices[srv.DeviceIds[0]] }
+
+// Публикация сообщения в топик вентиляционной системы с ожиданием подтверждения брокером.
+// Ожидание ограничено publishTimeout, чтобы зависший брокер не блокировал обработчики запросов.
+func (srv *impl) publish(dev *device, name string, payload string) (err error) {
 	var (
 		token mqtt.Token
 		qos   int
+		begin time.Time
 	)
 
-	token = srv.Mct.Publish(topicSystem, byte(qos), false, CommandReboot)
-	<-token.Done()
-	err = token.Error()
+	begin = time.Now()
+	token = srv.Mct.Publish(dev.Topic(name), byte(qos), false, payload)
+	if token.WaitTimeout(publishTimeout) {
+		err = token.Error()
+	} else {
+		err = fmt.Errorf("истекло время ожидания публикации в топик %q: %s", dev.Topic(name), publishTimeout)
+	}
+	srv.Metrics.PublishDone(name, time.Since(begin), err)
+
+	return
+}
+
+// Reboot Перезагрузка вентиляционной системы по умолчанию.
+func (srv *impl) Reboot() (err error) {
+	err = srv.publish(srv.defaultDevice(), topicSystem, CommandReboot.String())
 
 	return
 }
 
 // TurnOnOff Включение и отключение вентиляционной системы.
-func (srv *impl) TurnOnOff(state bool) (err error) {
-	var (
-		token mqtt.Token
-		qos   int
-		cmd   StateType
-	)
+func (srv *impl) TurnOnOff(dev *device, state bool) (err error) {
+	var cmd StateType
 
 	if cmd = StateOn; !state {
 		cmd = StateOff
-		srv.Status.Speed = 0
 	}
-	srv.Status.State = cmd
-	token = srv.Mct.Publish(topicState, byte(qos), false, cmd.String())
-	<-token.Done()
-	err = token.Error()
+	dev.Status.Update(func(st *status) {
+		if st.State = cmd; cmd == StateOff {
+			st.Speed = 0
+		}
+	})
+	err = srv.publish(dev, topicState, cmd.String())
 
 	return
 }
 
 // Speed Установка скорости работы вентиляционной системы.
-func (srv *impl) Speed(speed uint8) (err error) {
+func (srv *impl) Speed(dev *device, speed uint8) (err error) {
+	dev.Status.Update(func(st *status) {
+		st.Speed = uint64(speed)
+		if st.State = StateOff; st.Speed > 0 {
+			st.State = StateOn
+		}
+	})
+	err = srv.publish(dev, topicSpeed, strconv.FormatUint(uint64(speed), 10))
+
+	return
+}
+
+// Workmode Установка предопределённого режима работы вентиляционной системы.
+func (srv *impl) Workmode(dev *device, wmode WorkType) (err error) {
+	dev.Status.Update(func(st *status) { st.Work = wmode })
+	err = srv.publish(dev, topicWorkmode, wmode.String())
+
+	return
+}
+
+// Control Совместная установка состояния, скорости и режима работы вентиляционной системы.
+// Команды публикуются последовательно: состояние, режим работы, скорость.
+// При выключении скорость не публикуется, так как выключение её отменяет.
+func (srv *impl) Control(dev *device, state *bool, speed *uint8, wmode WorkType) (err error) {
+	if state != nil {
+		if err = srv.TurnOnOff(dev, *state); err != nil {
+			return
+		}
+	}
+	if wmode != WorkUnknown {
+		if err = srv.Workmode(dev, wmode); err != nil {
+			return
+		}
+	}
+	if speed != nil && (state == nil || *state) {
+		if err = srv.Speed(dev, *speed); err != nil {
+			return
+		}
+	}
+
+	return
+}
+
+// Controls Совместная установка состояния, скорости и режима работы нескольких вентиляционных систем.
+// Вентиляционные системы обрабатываются параллельно, не более controlsLimit одновременно,
+// команды каждой системы публикуются последовательно, как в Control.
+func (srv *impl) Controls(req map[string]*controlRequest) (ret map[string]*controlResult) {
 	var (
-		token mqtt.Token
-		qos   int
+		mux   sync.Mutex
+		wg    sync.WaitGroup
+		limit chan struct{}
 	)
 
-	srv.Status.Speed = uint64(speed)
-	if srv.Status.State = StateOff; srv.Status.Speed > 0 {
-		srv.Status.State = StateOn
+	ret, limit = make(map[string]*controlResult, len(req)), make(chan struct{}, controlsLimit)
+	for id := range req {
+		wg.Add(1)
+		go func(id string, cmd *controlRequest) {
+			var result *controlResult
+
+			defer wg.Done()
+			result = srv.control(id, cmd, limit)
+			mux.Lock()
+			ret[id] = result
+			mux.Unlock()
+		}(id, req[id])
 	}
-	token = srv.Mct.Publish(topicSpeed, byte(qos), false, strconv.FormatUint(srv.Status.Speed, 10))
-	<-token.Done()
-	err = token.Error()
+	wg.Wait()
 
 	return
 }
 
-// Workmode Установка предопределённого режима работы вентиляционной системы.
-func (srv *impl) Workmode(wmode WorkType) (err error) {
+// Установка состояния одной вентиляционной системы пакетного запроса.
+func (srv *impl) control(id string, cmd *controlRequest, limit chan struct{}) (ret *controlResult) {
 	var (
-		token mqtt.Token
-		qos   int
+		err   error
+		ok    bool
+		dev   *device
+		wmode WorkType
 	)
 
-	srv.Status.Work = wmode
-	token = srv.Mct.Publish(topicWorkmode, byte(qos), false, wmode.String())
-	<-token.Done()
-	err = token.Error()
+	ret = new(controlResult)
+	if dev, ok = srv.Devices[id]; !ok {
+		ret.Error = fmt.Sprintf("вентиляционная система %q не найдена", id)
+		return
+	}
+	if cmd == nil {
+		ret.Ok = true
+		return
+	}
+	if cmd.Workmode != nil {
+		if wmode = WorkParse(*cmd.Workmode); wmode == WorkUnknown {
+			ret.Error = fmt.Sprintf("неизвестный режим работы вентиляционной системы: %q", *cmd.Workmode)
+			return
+		}
+	}
+	limit <- struct{}{}
+	defer func() { <-limit }()
+	if err = srv.Control(dev, cmd.State, cmd.Speed, wmode); err != nil {
+		ret.Error = err.Error()
+		return
+	}
+	ret.Ok = true
 
 	return
 }
@@ -0,0 +1,188 @@
+// Package main
+package main
+
+import (
+	"encoding/json"
+	"errors"
+	"fmt"
+	"log"
+	"net/http"
+	"sync"
+	"time"
+
+	"github.com/webnice/kit/modules/answer"
+	"github.com/webnice/web/v2/header"
+)
+
+const (
+	eventsHeartbeat     = time.Second * 15    // Интервал отправки комментария для поддержания соединения.
+	eventsMimeType      = "text/event-stream" // Тип контента потока событий.
+	eventsConditionName = "condition"         // Название события изменения статуса.
+)
+
+// Подписчики на поток изменений статуса вентиляционных систем.
+type events struct {
+	sync.Mutex
+	subscribers map[*subscriber]struct{}
+	closed      chan struct{} // Закрывается при остановке потоков событий.
+	once        sync.Once
+}
+
+// Подписчик на поток изменений статуса.
+// Для каждой вентиляционной системы хранится только последний не отправленный кадр,
+// промежуточные кадры медленного подписчика отбрасываются.
+type subscriber struct {
+	sync.Mutex
+	notify  chan struct{}     // Сигнал о наличии не отправленных кадров.
+	pending map[string][]byte // Не отправленные кадры по идентификатору вентиляционной системы.
+}
+
+// Создание объекта подписчиков.
+func newEvents() *events {
+	return &events{subscribers: make(map[*subscriber]struct{}), closed: make(chan struct{})}
+}
+
+// Close Остановка потоков событий всех подписчиков. Повторный вызов ничего не делает.
+func (evt *events) Close() { evt.once.Do(func() { close(evt.closed) }) }
+
+// Subscribe Регистрация нового подписчика.
+func (evt *events) Subscribe() (ret *subscriber) {
+	ret = &subscriber{notify: make(chan struct{}, 1), pending: make(map[string][]byte)}
+	evt.Lock()
+	evt.subscribers[ret] = struct{}{}
+	evt.Unlock()
+
+	return
+}
+
+// Unsubscribe Удаление подписчика.
+func (evt *events) Unsubscribe(sub *subscriber) {
+	evt.Lock()
+	delete(evt.subscribers, sub)
+	evt.Unlock()
+}
+
+// Count Количество подписчиков.
+func (evt *events) Count() (ret int) {
+	evt.Lock()
+	ret = len(evt.subscribers)
+	evt.Unlock()
+
+	return
+}
+
+// Publish Отправка кадра вентиляционной системы всем подписчикам без блокировки.
+func (evt *events) Publish(id string, frame []byte) {
+	var sub *subscriber
+
+	evt.Lock()
+	defer evt.Unlock()
+	for sub = range evt.subscribers {
+		sub.Lock()
+		sub.pending[id] = frame
+		sub.Unlock()
+		select {
+		case sub.notify <- struct{}{}:
+		default:
+		}
+	}
+}
+
+// Take Извлечение всех не отправленных кадров подписчика.
+func (sub *subscriber) Take() (ret []byte) {
+	var id string
+
+	sub.Lock()
+	defer sub.Unlock()
+	for id = range sub.pending {
+		ret = append(ret, sub.pending[id]...)
+		delete(sub.pending, id)
+	}
+
+	return
+}
+
+// Данные события изменения статуса вентиляционной системы.
+type conditionEvent struct {
+	Device    string          `json:"device"`    // Идентификатор вентиляционной системы.
+	Condition json.RawMessage `json:"condition"` // Статус вентиляционной системы в формате JSON.
+}
+
+// Формирование кадра события изменения статуса вентиляционной системы.
+func (srv *impl) conditionFrame(dev *device) (ret []byte, err error) {
+	var buf []byte
+
+	if buf, err = json.Marshal(&conditionEvent{Device: dev.ID, Condition: dev.Status.Load().JSON}); err != nil {
+		return
+	}
+	ret = []byte(fmt.Sprintf("event: %s\ndata: %s\n\n", eventsConditionName, buf))
+
+	return
+}
+
+// Отправка изменённого статуса вентиляционной системы всем подписчикам потока.
+func (srv *impl) publishStatus(dev *device) {
+	var (
+		err   error
+		frame []byte
+	)
+
+	if frame, err = srv.conditionFrame(dev); err != nil {
+		log.Printf("Сериализация статуса прервана ошибкой: %s\n", err)
+		return
+	}
+	srv.Events.Publish(dev.ID, frame)
+}
+
+// Поток изменений состояния вентиляционных систем в формате Server-Sent Events.
+// Первыми кадрами отправляется текущее состояние всех вентиляционных систем,
+// далее кадр отправляется при каждом изменении контрольной суммы статуса.
+func (srv *impl) eventsHandler(wr http.ResponseWriter, rq *http.Request) {
+	var (
+		err     error
+		ok      bool
+		flusher http.Flusher
+		ticker  *time.Ticker
+		sub     *subscriber
+		frame   []byte
+		buf     []byte
+	)
+
+	if flusher, ok = wr.(http.Flusher); !ok {
+		answer.InternalServerError(wr, errors.New("потоковая передача не поддерживается"))
+		return
+	}
+	// Подписка выполняется до формирования первых кадров, чтобы изменение статуса между ними
+	// не было потеряно. Такое изменение может быть отправлено повторно следующим кадром.
+	sub = srv.Events.Subscribe()
+	defer srv.Events.Unsubscribe(sub)
+	for _, id := range srv.DeviceIds {
+		if buf, err = srv.conditionFrame(srv.Devices[id]); err != nil {
+			answer.InternalServerError(wr, err)
+			return
+		}
+		frame = append(frame, buf...)
+	}
+	wr.Header().Set(header.ContentType, eventsMimeType)
+	wr.Header().Set("Cache-Control", "no-cache")
+	wr.Header().Set("Connection", "keep-alive")
+	wr.WriteHeader(http.StatusOK)
+	ticker = time.NewTicker(eventsHeartbeat)
+	defer ticker.Stop()
+	for {
+		if _, err = wr.Write(frame); err != nil {
+			return
+		}
+		flusher.Flush()
+		select {
+		case <-rq.Context().Done():
+			return
+		case <-srv.Events.closed:
+			return
+		case <-sub.notify:
+			frame = sub.Take()
+		case <-ticker.C:
+			frame = []byte(": ping\n\n")
+		}
+	}
+}
@@ -13,7 +13,7 @@ import (
 )
 
 // Процесс мониторинга доступности вентиляционной системы через ICMP пинги по IP адресу.
-func (srv *impl) pingServer(ctx context.Context) {
+func (srv *impl) pingServer(ctx context.Context, dev *device) {
 	const (
 		tickerAvailableTimeout = time.Second * 30
 		pingCount              = 4
@@ -43,28 +43,37 @@ func (srv *impl) pingServer(ctx context.Context) {
 			continue
 		case <-ticker.C:
 			f1 = true
-			if srv.Cfg.VakioIp == nil {
-				log.Println("ip == nil")
+			if dev.Ip == nil {
+				log.Printf("%s: ip == nil\n", dev.ID)
 				continue
 			}
-			if pingo, err = ping.NewPinger(srv.Cfg.VakioIp.String()); err != nil {
-				log.Printf("создание объекта пинг прервано ошибкой: %s\n", err)
+			if pingo, err = ping.NewPinger(dev.Ip.String()); err != nil {
+				log.Printf("%s: создание объекта пинг прервано ошибкой: %s\n", dev.ID, err)
+				srv.Metrics.PingDone(dev.ID, 0, 0, err)
 				continue
 			}
 			pingo.SetPrivileged(true)
 			pingo.Count = pingCount
 			pingo.Timeout = tickerAvailableTimeout / 2
 			if err = pingo.Run(); err != nil {
-				log.Printf("пинг завершился ошибкой: %s\n", err)
+				log.Printf("%s: пинг завершился ошибкой: %s\n", dev.ID, err)
+				srv.Metrics.PingDone(dev.ID, 0, 0, err)
 				continue
 			}
-			switch pings = pingo.Statistics(); pings.PacketLoss {
-			case 100.0:
-				srv.Status.Available = false
-			default:
-				srv.Status.Available = true
-			}
-			srv.checkStatus()
+			pings = pingo.Statistics()
+			srv.Metrics.PingDone(dev.ID, pings.AvgRtt, pings.PacketLoss/100, nil)
+			dev.Pings.Add(pingSample{
+				At:   time.Now(),
+				Min:  pings.MinRtt,
+				Avg:  pings.AvgRtt,
+				Max:  pings.MaxRtt,
+				Loss: pings.PacketLoss,
+			})
+			dev.Status.Update(func(st *status) {
+				st.Ping = dev.Pings.Summary()
+				st.Available = pings.PacketLoss < 100.0
+			})
+			srv.checkStatus(dev)
 		}
 	}
 }
@@ -77,6 +86,7 @@ func (srv *impl) msgServer(ctx context.Context) {
 		end    bool
 		ticker *time.Ticker
 		msg    *Message
+		dev    *device
 	)
 
 	ticker = time.NewTicker(timeout)
@@ -90,11 +100,13 @@ func (srv *impl) msgServer(ctx context.Context) {
 			end = true
 			continue
 		case msg = <-srv.in:
-			if err = srv.onMessage(msg); err != nil {
+			dev, err = srv.onMessage(msg)
+			srv.Metrics.Message(err)
+			if err != nil {
 				log.Printf("Обработка входящего сообщения прервана ошибкой: %s\n", err)
 				continue
 			}
-			srv.checkStatus()
+			srv.checkStatus(dev)
 		case <-ticker.C:
 
 			_ = err
@@ -104,57 +116,75 @@ func (srv *impl) msgServer(ctx context.Context) {
 }
 
 // Разбор входящих сообщений MQTT брокера в статус вентиляционной системы.
-func (srv *impl) onMessage(msg *Message) (err error) {
+// Вентиляционная система определяется по префиксу топика сообщения.
+func (srv *impl) onMessage(msg *Message) (dev *device, err error) {
 	var (
-		topic string
-		state StateType
-		speed uint64
-		work  WorkType
-		mode  ModeType
-		commd CommandType
-		ok    bool
+		topic  string
+		name   string
+		n      int
+		state  StateType
+		speed  uint64
+		work   WorkType
+		mode   ModeType
+		commd  CommandType
+		ok     bool
+		change func(st *status)
 	)
 
-	switch topic = strings.ToLower(strings.TrimSpace(msg.Topic)); topic {
+	topic = strings.TrimSpace(msg.Topic)
+	if n = strings.LastIndex(topic, "/"); n <= 0 {
+		err = fmt.Errorf("поступило сообщение в неизвестный топик %q, сообщение: %s", topic, msg.Payload)
+		return
+	}
+	if dev, ok = srv.Devices[topic[:n]]; !ok {
+		err = fmt.Errorf("поступило сообщение неизвестной вентиляционной системы %q, сообщение: %s", topic, msg.Payload)
+		return
+	}
+	switch name = strings.ToLower(topic[n+1:]); name {
 	case topicState:
 		if state = StateParse(msg.Payload); state == StateUnknown {
 			err = fmt.Errorf("неизвестное состояние вентиляционной системы: %q", msg.Payload)
 			return
 		}
-		srv.Status.State = state
+		change = func(st *status) { st.State = state }
 	case topicSpeed:
 		if speed, err = strconv.ParseUint(msg.Payload, 10, 64); err != nil {
 			err = fmt.Errorf("неизвестная скорость вентиляторов: %q", msg.Payload)
 			return
 		}
-		srv.Status.Speed = speed
+		change = func(st *status) { st.Speed = speed }
 	case topicWorkmode:
 		if work = WorkParse(msg.Payload); work == WorkUnknown {
 			err = fmt.Errorf("неизвестный режим работы вентиляционной системы: %q", msg.Payload)
 			return
 		}
-		srv.Status.Work = work
+		change = func(st *status) { st.Work = work }
 	case topicMode:
 		if mode = ModeParse(msg.Payload); mode == ModeUnknown {
 			err = fmt.Errorf("неизвестный режим вентиляционной системы: %q", msg.Payload)
 			return
 		}
-		srv.Status.Mode = mode
-		if ok, state, speed, work = mode.ToState(srv.Status); ok {
-			srv.Status.State, srv.Status.Speed, srv.Status.Work = state, speed, work
+		change = func(st *status) {
+			st.Mode = mode
+			if ok, state, speed, work = mode.ToState(st); ok {
+				st.State, st.Speed, st.Work = state, speed, work
+			}
 		}
 	case topicSystem:
 		if commd = CommandParse(msg.Payload); commd == CommandUnknown {
 			err = fmt.Errorf("неизвестная команда вентиляционной системы: %q", msg.Payload)
 			return
 		}
-		srv.Status.Command = commd
-		log.Printf("Системная команда: %s\n", msg.Payload)
+		change = func(st *status) { st.Command = commd }
+		log.Printf("%s: системная команда: %s\n", dev.ID, msg.Payload)
 	default:
 		err = fmt.Errorf("поступило сообщение в неизвестный топик %q, сообщение: %s", topic, msg.Payload)
 		return
 	}
-	srv.Status.LastActivityAt = time.Now()
+	dev.Status.Update(func(st *status) {
+		change(st)
+		st.LastActivityAt = time.Now()
+	})
 
 	return
 }
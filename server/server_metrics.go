@@ -0,0 +1,60 @@
+// Package main
+package main
+
+import (
+	"bytes"
+	"net/http"
+	"time"
+
+	"github.com/go-chi/chi/v5"
+	"github.com/go-chi/chi/v5/middleware"
+	"github.com/webnice/web/v2/header"
+)
+
+const (
+	metricsMimeType  = "text/plain; version=0.0.4; charset=utf-8" // Тип контента текстового формата Prometheus.
+	metricsRouteNone = "unmatched"                                // Шаблон маршрута запросов, для которых маршрут не найден.
+)
+
+// Показатели работы сервера в текстовом формате Prometheus.
+func (srv *impl) metricsHandler(wr http.ResponseWriter, _ *http.Request) {
+	var (
+		buf       bytes.Buffer
+		available map[string]bool
+	)
+
+	available = make(map[string]bool, len(srv.DeviceIds))
+	for _, id := range srv.DeviceIds {
+		available[id] = srv.Devices[id].Status.Load().Status.Available
+	}
+	srv.Metrics.Write(&buf, len(srv.in), cap(srv.in), srv.Events.Count(), available)
+	wr.Header().Set(header.ContentType, metricsMimeType)
+	wr.WriteHeader(http.StatusOK)
+	_, _ = wr.Write(buf.Bytes())
+}
+
+// Промежуточный обработчик, регистрирующий длительность и код ответа HTTP запросов.
+// Запросы группируются по шаблону маршрута, чтобы число меток не зависело от адресов запросов.
+func (srv *impl) metricsMiddleware(next http.Handler) http.Handler {
+	return http.HandlerFunc(func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			begin = time.Now()
+			ww    = middleware.NewWrapResponseWriter(wr, rq.ProtoMajor)
+			route string
+			code  int
+		)
+
+		next.ServeHTTP(ww, rq)
+		if rctx := chi.RouteContext(rq.Context()); rctx != nil {
+			route = rctx.RoutePattern()
+		}
+		if route == "" {
+			route = metricsRouteNone
+		}
+		// Если обработчик ничего не записал, сервер отвечает кодом 200.
+		if code = ww.Status(); code == 0 {
+			code = http.StatusOK
+		}
+		srv.Metrics.Request(rq.Method, route, code, time.Since(begin))
+	})
+}
@@ -1,22 +1,18 @@
 // Package main
 package main
 
-import (
-	"encoding/base64"
-)
+// Проверка изменения контрольной суммы статуса вентиляционной системы с предыдущей проверки.
+func (srv *impl) checkStatus(dev *device) {
+	var changed bool
 
-func (srv *impl) checkStatus() {
-	var nowHex string
-
-	if nowHex = base64.URLEncoding.EncodeToString(srv.Status.Hash().Sum(nil)); nowHex != srv.StatusHexHash {
-		srv.StatusHexHash = nowHex
-		srv.onChangeStatus()
+	if _, changed = dev.Status.Check(); changed {
+		srv.onChangeStatus(dev)
 	}
 }
 
 // Выбор действия в зависимости от состояния вентиляционной системы.
-func (srv *impl) onChangeStatus() {
-
-	//log.Println(debug.DumperString(srv.Status))
-
+func (srv *impl) onChangeStatus(dev *device) {
+	//log.Println(debug.DumperString(dev.Status))
+	srv.publishStatus(dev)
+	srv.Snapshot.Changed()
 }
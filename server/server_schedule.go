@@ -0,0 +1,60 @@
+// Package main
+package main
+
+import (
+	"context"
+	"log"
+	"time"
+)
+
+// Процесс выполнения недельных программ вентиляционных систем.
+// Программы выполняются сервером независимо от клиентов. Чтобы слоты, наступившие у всех
+// вентиляционных систем в одну минуту, не порождали всплеск публикаций, выполнение слота
+// каждой системы смещается на свою долю scheduleSpread в порядке конфигурации.
+// Слоты, время которых прошло до запуска сервера, не выполняются.
+func (srv *impl) scheduleServer(ctx context.Context) {
+	var (
+		ticker   *time.Ticker
+		last     time.Time
+		now      time.Time
+		finished bool
+	)
+
+	ticker, last = time.NewTicker(scheduleTick), time.Now()
+	defer ticker.Stop()
+	for !finished {
+		select {
+		case <-ctx.Done():
+			finished = true
+		case now = <-ticker.C:
+			srv.scheduleRun(last, now)
+			last = now
+		}
+	}
+}
+
+// Выполнение слотов программ, наступивших в интервале (from, to] с учётом смещения
+// вентиляционных систем. Если в интервал попало несколько слотов, выполняется последний.
+func (srv *impl) scheduleRun(from time.Time, to time.Time) {
+	var (
+		err    error
+		n      int
+		id     string
+		dev    *device
+		slot   *scheduleSlot
+		offset time.Duration
+	)
+
+	for n, id = range srv.DeviceIds {
+		offset = scheduleSpread * time.Duration(n) / time.Duration(len(srv.DeviceIds))
+		if slot = srv.Schedules.Get(id).Due(from.Add(-offset), to.Add(-offset)); slot == nil {
+			continue
+		}
+		dev = srv.Devices[id]
+		if err = srv.Control(dev, slot.State, slot.Speed, slot.wmode); err != nil {
+			log.Printf("%s: выполнение слота программы %s прервано ошибкой: %s\n", dev.ID, slot.At, err)
+			continue
+		}
+		log.Printf("%s: выполнен слот программы %s.\n", dev.ID, slot.At)
+	}
+}
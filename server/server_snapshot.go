@@ -0,0 +1,122 @@
+// Package main
+package main
+
+import (
+	"context"
+	"log"
+	"time"
+)
+
+// Процесс записи снимка состояния сервера.
+// После первого изменения состояния снимок записывается через snapshotDelay, изменения,
+// поступившие за это время, попадают в ту же запись. При завершении работы состояние,
+// ожидающее записи, записывается сразу, после чего закрывается канал end.
+func (srv *impl) snapshotServer(ctx context.Context, end chan<- struct{}) {
+	var (
+		timer    *time.Timer
+		pending  bool
+		finished bool
+	)
+
+	defer close(end)
+	timer = time.NewTimer(snapshotDelay)
+	timer.Stop()
+	defer timer.Stop()
+	for !finished {
+		select {
+		case <-ctx.Done():
+			finished = true
+			select {
+			case <-srv.Snapshot.dirty:
+				pending = true
+			default:
+			}
+			if pending {
+				srv.saveSnapshot()
+			}
+		case <-srv.Snapshot.dirty:
+			if !pending {
+				pending = true
+				timer.Reset(snapshotDelay)
+			}
+		case <-timer.C:
+			pending = false
+			srv.saveSnapshot()
+		}
+	}
+}
+
+// Снимок текущего состояния вентиляционных систем и их недельных программ.
+func (srv *impl) snapshot() (ret *snapshot) {
+	var (
+		st   status
+		item *schedule
+	)
+
+	ret = &snapshot{Devices: make(map[string]*snapshotDevice, len(srv.DeviceIds))}
+	for _, id := range srv.DeviceIds {
+		st = srv.Devices[id].Status.Load().Status
+		ret.Devices[id] = &snapshotDevice{
+			LastActivityAt: st.LastActivityAt,
+			Speed:          st.Speed,
+			State:          st.State,
+			Work:           st.Work,
+			Mode:           st.Mode,
+		}
+		if item = srv.Schedules.Get(id); item.Enabled || len(item.Slots) > 0 {
+			ret.Devices[id].Schedule = item
+		}
+	}
+
+	return
+}
+
+// Запись снимка состояния в файл.
+func (srv *impl) saveSnapshot() {
+	var err error
+
+	if err = srv.Snapshot.Save(srv.snapshot()); err != nil {
+		log.Printf("Запись снимка состояния в файл %q прервана ошибкой: %s\n", srv.Snapshot.path, err)
+	}
+}
+
+// Восстановление состояния вентиляционных систем и их недельных программ из снимка.
+// Вентиляционные системы, отсутствующие в конфигурации, пропускаются. Восстановленное
+// состояние заменяется сообщениями вентиляционной системы по мере их поступления.
+func (srv *impl) restoreSnapshot() {
+	var (
+		err  error
+		item *snapshot
+		dev  *device
+		ok   bool
+	)
+
+	if item, err = srv.Snapshot.Load(); err != nil {
+		log.Printf("Загрузка снимка состояния из файла %q прервана ошибкой: %s\n", srv.Snapshot.path, err)
+		return
+	}
+	if item == nil {
+		return
+	}
+	for id, saved := range item.Devices {
+		if dev, ok = srv.Devices[id]; !ok || saved == nil {
+			continue
+		}
+		dev.Status.Update(func(st *status) {
+			st.LastActivityAt = saved.LastActivityAt
+			st.Speed, st.State = saved.Speed, saved.State
+			st.Work, st.Mode = saved.Work, saved.Mode
+		})
+		// Восстановленный статус не считается изменением.
+		dev.Status.Check()
+		if saved.Schedule == nil {
+			continue
+		}
+		if err = saved.Schedule.Prepare(); err != nil {
+			log.Printf("%s: программа из снимка состояния пропущена: %s\n", id, err)
+			continue
+		}
+		srv.Schedules.Set(id, saved.Schedule)
+	}
+	log.Printf("Состояние вентиляционных систем восстановлено из снимка от %s.\n", item.SavedAt.Format(time.RFC3339))
+}
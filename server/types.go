@@ -12,7 +12,9 @@ const (
 	envMqttUsername = "MQTT_USERNAME" // Имя пользователя MQTT брокера.
 	envMqttPassword = "MQTT_PASSWORD" // Пароль пользователя MQTT брокера.
 	envVakioIp      = "VAKIO_IP"      // IP адрес вентиляционной системы.
+	envVakioDevices = "VAKIO_DEVICES" // Список вентиляционных систем в формате "префикс=ip" через запятую.
 	envWebServer    = "WEB_SERVER"    // Хост и порт открытия веб сервера.
+	envSnapshotFile = "SNAPSHOT_FILE" // Файл снимка состояния сервера, восстанавливаемого при запуске.
 )
 
 // Server Интерфейс сервера.
@@ -29,13 +31,17 @@ type Server interface {
 
 // Server Основной объект сервера вентиляционной системы.
 type impl struct {
-	Cfg           *Configuration      // Конфигурация сервера.
-	Mco           *mqtt.ClientOptions // Настройки MQTT клиента.
-	Mct           mqtt.Client         // Интерфейс MQTT клиента.
-	Status        *status             // Статус вентиляционной системы.
-	StatusHexHash string              // Контрольная сумма статуса вентиляционной системы.
-	done          chan struct{}       // Канал завершения работы сервера.
-	in            chan *Message       // Канал входящих сообщений.
+	Cfg       *Configuration      // Конфигурация сервера.
+	Mco       *mqtt.ClientOptions // Настройки MQTT клиента.
+	Mct       mqtt.Client         // Интерфейс MQTT клиента.
+	Devices   map[string]*device  // Вентиляционные системы по префиксу топиков MQTT.
+	DeviceIds []string            // Префиксы топиков вентиляционных систем в порядке конфигурации.
+	Events    *events             // Подписчики на поток изменений статуса вентиляционной системы.
+	Metrics   *metrics            // Показатели работы сервера.
+	Schedules *schedules          // Недельные программы вентиляционных систем.
+	Snapshot  *snapshotStore      // Файл снимка состояния, nil - снимок не сохраняется.
+	done      chan struct{}       // Канал завершения работы сервера.
+	in        chan *Message       // Канал входящих сообщений.
 }
 
 // Message Сообщение получаемое и отправляемое в MQTT брокер.
@@ -55,4 +61,12 @@ type Configuration struct {
 	MqttPassword string // Пароль пользователя MQTT сервера сообщений.
 	VakioIp      net.IP // IP адрес вентиляционной системы.
 	WebServer    string // Хост и порт открытия веб сервера.
+	SnapshotFile string // Файл снимка состояния сервера.
+	Devices      []DeviceConfiguration
+}
+
+// DeviceConfiguration Описание конфигурации вентиляционной системы.
+type DeviceConfiguration struct {
+	ID string // Префикс топиков MQTT вентиляционной системы.
+	Ip net.IP // IP адрес вентиляционной системы.
 }
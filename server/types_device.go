@@ -0,0 +1,63 @@
+// Package main
+package main
+
+import (
+	"fmt"
+	"net"
+	"strings"
+	"unicode"
+)
+
+// Вентиляционная система, обслуживаемая сервером.
+type device struct {
+	ID     string       // Идентификатор вентиляционной системы, он же префикс топиков MQTT.
+	Ip     net.IP       // IP адрес вентиляционной системы.
+	Status *statusStore // Статус вентиляционной системы.
+	Pings  *pingRing    // Последние результаты проверки доступности.
+}
+
+// Создание объекта вентиляционной системы.
+func newDevice(cfg DeviceConfiguration) *device {
+	return &device{ID: cfg.ID, Ip: cfg.Ip, Status: newStatusStore(), Pings: new(pingRing)}
+}
+
+// Topic Полное имя топика MQTT вентиляционной системы.
+func (dev *device) Topic(name string) string { return dev.ID + "/" + name }
+
+// ParseDevices Разбор списка вентиляционных систем.
+// Формат: "префикс=ip" через запятую или пробел, например: "vakio=192.168.1.10,vakio2=192.168.1.11".
+// IP адрес можно не указывать, тогда доступность вентиляционной системы не проверяется.
+func ParseDevices(s string) (ret []DeviceConfiguration, err error) {
+	var (
+		n      int
+		items  []string
+		id, ip string
+		ok     bool
+		cfg    DeviceConfiguration
+		exists map[string]bool
+	)
+
+	items = strings.FieldsFunc(s, func(r rune) bool { return r == ',' || unicode.IsSpace(r) })
+	exists = make(map[string]bool, len(items))
+	for n = range items {
+		id, ip, ok = strings.Cut(items[n], "=")
+		if id = strings.Trim(id, "/"); id == "" || strings.Contains(id, "/") {
+			err = fmt.Errorf("не корректный префикс топиков вентиляционной системы: %q", items[n])
+			return
+		}
+		if exists[id] {
+			err = fmt.Errorf("префикс топиков вентиляционной системы указан повторно: %q", id)
+			return
+		}
+		cfg = DeviceConfiguration{ID: id}
+		if ok {
+			if cfg.Ip = net.ParseIP(ip); cfg.Ip == nil {
+				err = fmt.Errorf("не корректный IP адрес вентиляционной системы %q: %q", id, ip)
+				return
+			}
+		}
+		exists[id], ret = true, append(ret, cfg)
+	}
+
+	return
+}
@@ -0,0 +1,350 @@
+// Package main
+package main
+
+import (
+	"bytes"
+	"fmt"
+	"sort"
+	"strconv"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"time"
+)
+
+// Границы интервалов гистограмм длительности операций, секунд.
+var metricsBuckets = []float64{.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10}
+
+// Экранирование значений меток текстового формата Prometheus.
+var metricsLabelEscaper = strings.NewReplacer(`\`, `\\`, `"`, `\"`, "\n", `\n`)
+
+// Гистограмма длительности операций.
+type histogram struct {
+	sync.Mutex
+	counts []uint64 // Количество наблюдений по интервалам metricsBuckets, без накопления.
+	sum    float64  // Сумма наблюдений, секунд.
+	count  uint64   // Количество наблюдений.
+}
+
+// Показатели публикации сообщений в топик вентиляционных систем.
+type publishMetric struct {
+	Duration *histogram    // Длительность публикации до подтверждения брокером.
+	Errors   atomic.Uint64 // Количество ошибок публикации.
+}
+
+// Показатели последней проверки доступности вентиляционной системы.
+type pingMetric struct {
+	sync.Mutex
+	Rtt    time.Duration // Среднее время отклика.
+	Loss   float64       // Доля потерянных пакетов, от 0 до 1.
+	Runs   uint64        // Количество проверок.
+	Errors uint64        // Количество проверок, прерванных ошибкой.
+}
+
+// Ключ показателей HTTP запросов.
+type httpMetricKey struct {
+	Method string // HTTP метод.
+	Route  string // Шаблон маршрута.
+}
+
+// Ключ счётчика ответов на HTTP запросы.
+type httpCodeKey struct {
+	httpMetricKey
+	Code int // Код ответа.
+}
+
+// Показатели работы сервера.
+// Наборы топиков и вентиляционных систем неизменны после создания объекта и читаются без
+// блокировки, набор маршрутов HTTP пополняется под блокировкой объекта.
+type metrics struct {
+	sync.Mutex
+	Started       time.Time                    // Время запуска сервера.
+	Messages      atomic.Uint64                // Количество полученных сообщений MQTT брокера.
+	MessageErrors atomic.Uint64                // Количество сообщений, обработка которых прервана ошибкой.
+	InMax         atomic.Int64                 // Максимальная глубина канала входящих сообщений.
+	Publish       map[string]*publishMetric    // Показатели публикации по имени топика.
+	Ping          map[string]*pingMetric       // Показатели проверки доступности по идентификатору вентиляционной системы.
+	HttpDuration  map[httpMetricKey]*histogram // Длительность HTTP запросов.
+	HttpResponses map[httpCodeKey]uint64       // Количество ответов на HTTP запросы.
+	publishTopics []string                     // Имена топиков в порядке вывода.
+	pingDeviceIds []string                     // Идентификаторы вентиляционных систем в порядке вывода.
+}
+
+// Создание объекта гистограммы.
+func newHistogram() *histogram { return &histogram{counts: make([]uint64, len(metricsBuckets))} }
+
+// Observe Регистрация наблюдения.
+func (h *histogram) Observe(d time.Duration) {
+	var (
+		n int
+		v = d.Seconds()
+	)
+
+	n = sort.SearchFloat64s(metricsBuckets, v)
+	h.Lock()
+	if n < len(h.counts) {
+		h.counts[n]++
+	}
+	h.sum += v
+	h.count++
+	h.Unlock()
+}
+
+// Запись гистограммы в текстовом формате Prometheus.
+func (h *histogram) write(buf *bytes.Buffer, name string, labels string) {
+	var (
+		n   int
+		cum uint64
+		sep string
+	)
+
+	if labels != "" {
+		sep = ","
+	}
+	h.Lock()
+	defer h.Unlock()
+	for n = range metricsBuckets {
+		cum += h.counts[n]
+		fmt.Fprintf(buf, "%s_bucket{%s%sle=%q} %d\n", name, labels, sep, metricsFloat(metricsBuckets[n]), cum)
+	}
+	fmt.Fprintf(buf, "%s_bucket{%s%sle=\"+Inf\"} %d\n", name, labels, sep, h.count)
+	fmt.Fprintf(buf, "%s_sum%s %s\n", name, metricsLabels(labels), metricsFloat(h.sum))
+	fmt.Fprintf(buf, "%s_count%s %d\n", name, metricsLabels(labels), h.count)
+}
+
+// Создание объекта показателей работы сервера.
+func newMetrics(deviceIds []string, topics []string) (ret *metrics) {
+	var n int
+
+	ret = &metrics{
+		Started:       time.Now(),
+		Publish:       make(map[string]*publishMetric, len(topics)),
+		Ping:          make(map[string]*pingMetric, len(deviceIds)),
+		HttpDuration:  make(map[httpMetricKey]*histogram),
+		HttpResponses: make(map[httpCodeKey]uint64),
+		publishTopics: topics,
+		pingDeviceIds: deviceIds,
+	}
+	for n = range topics {
+		ret.Publish[topics[n]] = &publishMetric{Duration: newHistogram()}
+	}
+	for n = range deviceIds {
+		ret.Ping[deviceIds[n]] = new(pingMetric)
+	}
+
+	return
+}
+
+// Message Регистрация полученного сообщения MQTT брокера.
+func (mtr *metrics) Message(err error) {
+	mtr.Messages.Add(1)
+	if err != nil {
+		mtr.MessageErrors.Add(1)
+	}
+}
+
+// Queue Регистрация глубины канала входящих сообщений.
+func (mtr *metrics) Queue(length int) {
+	var max int64
+
+	for max = mtr.InMax.Load(); int64(length) > max; max = mtr.InMax.Load() {
+		if mtr.InMax.CompareAndSwap(max, int64(length)) {
+			return
+		}
+	}
+}
+
+// PublishDone Регистрация публикации сообщения в топик name.
+func (mtr *metrics) PublishDone(name string, d time.Duration, err error) {
+	var (
+		ok  bool
+		pub *publishMetric
+	)
+
+	if pub, ok = mtr.Publish[name]; !ok {
+		return
+	}
+	pub.Duration.Observe(d)
+	if err != nil {
+		pub.Errors.Add(1)
+	}
+}
+
+// PingDone Регистрация проверки доступности вентиляционной системы.
+func (mtr *metrics) PingDone(id string, rtt time.Duration, loss float64, err error) {
+	var (
+		ok  bool
+		png *pingMetric
+	)
+
+	if png, ok = mtr.Ping[id]; !ok {
+		return
+	}
+	png.Lock()
+	defer png.Unlock()
+	png.Runs++
+	if err != nil {
+		png.Errors++
+		return
+	}
+	png.Rtt, png.Loss = rtt, loss
+}
+
+// Request Регистрация HTTP запроса.
+func (mtr *metrics) Request(method string, route string, code int, d time.Duration) {
+	var (
+		ok  bool
+		key = httpMetricKey{Method: method, Route: route}
+		hgm *histogram
+	)
+
+	mtr.Lock()
+	if hgm, ok = mtr.HttpDuration[key]; !ok {
+		hgm = newHistogram()
+		mtr.HttpDuration[key] = hgm
+	}
+	mtr.HttpResponses[httpCodeKey{httpMetricKey: key, Code: code}]++
+	mtr.Unlock()
+	hgm.Observe(d)
+}
+
+// Write Запись показателей в текстовом формате Prometheus.
+// Значения, которые хранятся в других объектах сервера, передаются параметрами.
+func (mtr *metrics) Write(buf *bytes.Buffer, inLength int, inCapacity int, subscribers int, available map[string]bool) {
+	var (
+		n     int
+		id    string
+		keys  []httpMetricKey
+		codes []httpCodeKey
+		durs  map[httpMetricKey]*histogram
+		resp  map[httpCodeKey]uint64
+	)
+
+	metricsHeader(buf, "vakio_start_time_seconds", "gauge", "Время запуска сервера, секунд с начала эпохи Unix.")
+	fmt.Fprintf(buf, "vakio_start_time_seconds %d\n", mtr.Started.Unix())
+	metricsHeader(buf, "vakio_mqtt_messages_total", "counter", "Количество полученных сообщений MQTT брокера.")
+	fmt.Fprintf(buf, "vakio_mqtt_messages_total %d\n", mtr.Messages.Load())
+	metricsHeader(buf, "vakio_mqtt_message_errors_total", "counter", "Количество сообщений MQTT брокера, обработка которых прервана ошибкой.")
+	fmt.Fprintf(buf, "vakio_mqtt_message_errors_total %d\n", mtr.MessageErrors.Load())
+	metricsHeader(buf, "vakio_in_queue_length", "gauge", "Текущая глубина канала входящих сообщений.")
+	fmt.Fprintf(buf, "vakio_in_queue_length %d\n", inLength)
+	metricsHeader(buf, "vakio_in_queue_length_max", "gauge", "Максимальная глубина канала входящих сообщений с момента запуска.")
+	fmt.Fprintf(buf, "vakio_in_queue_length_max %d\n", mtr.InMax.Load())
+	metricsHeader(buf, "vakio_in_queue_capacity", "gauge", "Размер канала входящих сообщений.")
+	fmt.Fprintf(buf, "vakio_in_queue_capacity %d\n", inCapacity)
+	metricsHeader(buf, "vakio_events_subscribers", "gauge", "Количество подписчиков на поток изменений статуса.")
+	fmt.Fprintf(buf, "vakio_events_subscribers %d\n", subscribers)
+	// Публикация сообщений.
+	metricsHeader(buf, "vakio_mqtt_publish_duration_seconds", "histogram", "Длительность публикации сообщений до подтверждения брокером.")
+	for _, name := range mtr.publishTopics {
+		mtr.Publish[name].Duration.write(buf, "vakio_mqtt_publish_duration_seconds", metricsLabel("topic", name))
+	}
+	metricsHeader(buf, "vakio_mqtt_publish_errors_total", "counter", "Количество ошибок публикации сообщений.")
+	for _, name := range mtr.publishTopics {
+		fmt.Fprintf(buf, "vakio_mqtt_publish_errors_total{%s} %d\n", metricsLabel("topic", name), mtr.Publish[name].Errors.Load())
+	}
+	// Доступность вентиляционных систем.
+	metricsHeader(buf, "vakio_device_available", "gauge", "Доступность вентиляционной системы по результатам пинга.")
+	for _, id = range mtr.pingDeviceIds {
+		fmt.Fprintf(buf, "vakio_device_available{%s} %d\n", metricsLabel("device", id), metricsBool(available[id]))
+	}
+	metricsHeader(buf, "vakio_ping_rtt_seconds", "gauge", "Среднее время отклика последней проверки доступности.")
+	mtr.eachPing(func(id string, png *pingMetric) {
+		fmt.Fprintf(buf, "vakio_ping_rtt_seconds{%s} %s\n", metricsLabel("device", id), metricsFloat(png.Rtt.Seconds()))
+	})
+	metricsHeader(buf, "vakio_ping_loss_ratio", "gauge", "Доля потерянных пакетов последней проверки доступности.")
+	mtr.eachPing(func(id string, png *pingMetric) {
+		fmt.Fprintf(buf, "vakio_ping_loss_ratio{%s} %s\n", metricsLabel("device", id), metricsFloat(png.Loss))
+	})
+	metricsHeader(buf, "vakio_ping_runs_total", "counter", "Количество проверок доступности.")
+	mtr.eachPing(func(id string, png *pingMetric) {
+		fmt.Fprintf(buf, "vakio_ping_runs_total{%s} %d\n", metricsLabel("device", id), png.Runs)
+	})
+	metricsHeader(buf, "vakio_ping_errors_total", "counter", "Количество проверок доступности, прерванных ошибкой.")
+	mtr.eachPing(func(id string, png *pingMetric) {
+		fmt.Fprintf(buf, "vakio_ping_errors_total{%s} %d\n", metricsLabel("device", id), png.Errors)
+	})
+	// HTTP запросы. Копии словарей снимаются под блокировкой, вывод выполняется без неё.
+	mtr.Lock()
+	durs = make(map[httpMetricKey]*histogram, len(mtr.HttpDuration))
+	for key, hgm := range mtr.HttpDuration {
+		durs[key] = hgm
+		keys = append(keys, key)
+	}
+	resp = make(map[httpCodeKey]uint64, len(mtr.HttpResponses))
+	for key, count := range mtr.HttpResponses {
+		resp[key] = count
+		codes = append(codes, key)
+	}
+	mtr.Unlock()
+	sort.Slice(keys, func(i, j int) bool { return httpMetricLess(keys[i], keys[j]) })
+	sort.Slice(codes, func(i, j int) bool {
+		if codes[i].httpMetricKey == codes[j].httpMetricKey {
+			return codes[i].Code < codes[j].Code
+		}
+		return httpMetricLess(codes[i].httpMetricKey, codes[j].httpMetricKey)
+	})
+	metricsHeader(buf, "vakio_http_request_duration_seconds", "histogram", "Длительность обработки HTTP запросов.")
+	for n = range keys {
+		durs[keys[n]].write(buf, "vakio_http_request_duration_seconds", keys[n].labels())
+	}
+	metricsHeader(buf, "vakio_http_requests_total", "counter", "Количество HTTP запросов по коду ответа.")
+	for n = range codes {
+		fmt.Fprintf(buf, "vakio_http_requests_total{%s,%s} %d\n",
+			codes[n].labels(), metricsLabel("code", strconv.Itoa(codes[n].Code)), resp[codes[n]])
+	}
+}
+
+// Вызов функции для показателей проверки доступности каждой вентиляционной системы под блокировкой.
+func (mtr *metrics) eachPing(fn func(id string, png *pingMetric)) {
+	var png *pingMetric
+
+	for _, id := range mtr.pingDeviceIds {
+		png = mtr.Ping[id]
+		png.Lock()
+		fn(id, png)
+		png.Unlock()
+	}
+}
+
+// Метки показателей HTTP запроса.
+func (key httpMetricKey) labels() string {
+	return metricsLabel("method", key.Method) + "," + metricsLabel("route", key.Route)
+}
+
+// Порядок вывода показателей HTTP запросов.
+func httpMetricLess(a httpMetricKey, b httpMetricKey) bool {
+	if a.Route == b.Route {
+		return a.Method < b.Method
+	}
+	return a.Route < b.Route
+}
+
+// Строки описания и типа показателя.
+func metricsHeader(buf *bytes.Buffer, name string, kind string, help string) {
+	fmt.Fprintf(buf, "# HELP %s %s\n# TYPE %s %s\n", name, help, name, kind)
+}
+
+// Метка показателя в формате `имя="значение"`.
+func metricsLabel(name string, value string) string {
+	return name + `="` + metricsLabelEscaper.Replace(value) + `"`
+}
+
+// Метки показателя в фигурных скобках, пустая строка без меток.
+func metricsLabels(labels string) string {
+	if labels == "" {
+		return ""
+	}
+	return "{" + labels + "}"
+}
+
+// Значение с плавающей точкой в текстовом формате Prometheus.
+func metricsFloat(v float64) string { return strconv.FormatFloat(v, 'g', -1, 64) }
+
+// Логическое значение показателя.
+func metricsBool(v bool) int {
+	if v {
+		return 1
+	}
+	return 0
+}
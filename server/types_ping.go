@@ -0,0 +1,113 @@
+// Package main
+package main
+
+import (
+	"math"
+	"strconv"
+	"sync"
+	"time"
+)
+
+// Количество хранимых результатов проверки доступности вентиляционной системы.
+// При интервале проверки 30 секунд это последние 10 минут.
+const pingHistory = 20
+
+// Результат одной проверки доступности вентиляционной системы.
+type pingSample struct {
+	At   time.Time     // Время проверки.
+	Min  time.Duration // Минимальное время отклика.
+	Avg  time.Duration // Среднее время отклика.
+	Max  time.Duration // Максимальное время отклика.
+	Loss float64       // Потерянные пакеты, процентов.
+}
+
+// Кольцевой буфер последних результатов проверки доступности вентиляционной системы.
+type pingRing struct {
+	sync.Mutex
+	items [pingHistory]pingSample // Результаты проверок.
+	next  int                     // Индекс следующей записи.
+	size  int                     // Количество записанных результатов.
+}
+
+// Сводка результатов проверки доступности вентиляционной системы за время хранения.
+// Время отклика учитывается только по проверкам, в которых получен хотя бы один ответ,
+// если таких проверок нет, время отклика не заполняется.
+type pingSummary struct {
+	Samples int       `json:"samples"` // Количество проверок.
+	RttMin  *float64  `json:"rtt_min"` // Минимальное время отклика, миллисекунд.
+	RttAvg  *float64  `json:"rtt_avg"` // Среднее время отклика, миллисекунд.
+	RttMax  *float64  `json:"rtt_max"` // Максимальное время отклика, миллисекунд.
+	Loss    float64   `json:"loss"`    // Потерянные пакеты, процентов.
+	LastAt  time.Time `json:"last_at"` // Время последней проверки.
+	key     string    // Значения сводки для контрольной суммы статуса, без времени проверки.
+}
+
+// Add Добавление результата проверки, самый старый результат вытесняется.
+func (rng *pingRing) Add(sample pingSample) {
+	rng.Lock()
+	rng.items[rng.next] = sample
+	rng.next = (rng.next + 1) % pingHistory
+	if rng.size < pingHistory {
+		rng.size++
+	}
+	rng.Unlock()
+}
+
+// Summary Сводка хранимых результатов проверки. Если результатов нет, возвращается nil.
+func (rng *pingRing) Summary() (ret *pingSummary) {
+	var (
+		n        int
+		answered int
+		item     *pingSample
+		avg      time.Duration
+		min, max time.Duration
+	)
+
+	rng.Lock()
+	defer rng.Unlock()
+	if rng.size == 0 {
+		return
+	}
+	ret = &pingSummary{Samples: rng.size}
+	for n = 0; n < rng.size; n++ {
+		item = &rng.items[n]
+		ret.Loss += item.Loss
+		if item.At.After(ret.LastAt) {
+			ret.LastAt = item.At
+		}
+		if item.Loss >= 100 {
+			continue
+		}
+		if answered == 0 || item.Min < min {
+			min = item.Min
+		}
+		if item.Max > max {
+			max = item.Max
+		}
+		avg += item.Avg
+		answered++
+	}
+	ret.Loss = pingRound(ret.Loss / float64(rng.size))
+	ret.key = strconv.Itoa(ret.Samples) + "/" + strconv.FormatFloat(ret.Loss, 'f', -1, 64)
+	if answered > 0 {
+		ret.RttMin = pingMilliseconds(min)
+		ret.RttAvg = pingMilliseconds(avg / time.Duration(answered))
+		ret.RttMax = pingMilliseconds(max)
+		ret.key += "/" + strconv.FormatFloat(*ret.RttMin, 'f', -1, 64) +
+			"/" + strconv.FormatFloat(*ret.RttAvg, 'f', -1, 64) +
+			"/" + strconv.FormatFloat(*ret.RttMax, 'f', -1, 64)
+	}
+
+	return
+}
+
+// Время в миллисекундах с точностью до сотых.
+func pingMilliseconds(d time.Duration) (ret *float64) {
+	ret = new(float64)
+	*ret = pingRound(float64(d) / float64(time.Millisecond))
+
+	return
+}
+
+// Округление до сотых.
+func pingRound(v float64) float64 { return math.Round(v*100) / 100 }
@@ -0,0 +1,146 @@
+// Package main
+package main
+
+import (
+	"fmt"
+	"sort"
+	"sync"
+	"time"
+)
+
+// Слот недельной программы: с указанного времени выбранных дней недели вентиляционная система
+// переводится в заданное состояние, режим работы и скорость. Отсутствующие поля не изменяются.
+type scheduleSlot struct {
+	Days     []time.Weekday `json:"days,omitempty"`     // Дни недели: 0-воскресенье, 6-суббота. Пустой список - каждый день.
+	At       string         `json:"at"`                 // Время начала слота "ЧЧ:ММ" по местному времени сервера.
+	State    *bool          `json:"state,omitempty"`    // Новое состояние. Истина=включить, Ложь=выключить.
+	Speed    *uint8         `json:"speed,omitempty"`    // Новое значение скорости.
+	Workmode *string        `json:"workmode,omitempty"` // Новый предустановленный режим работы.
+	minute   int            // Минута суток начала слота.
+	days     uint8          // Дни недели битовой маской, 0 - каждый день.
+	wmode    WorkType       // Разобранный режим работы.
+}
+
+// Недельная программа вентиляционной системы.
+type schedule struct {
+	Enabled bool            `json:"enabled"` // Программа выполняется.
+	Slots   []*scheduleSlot `json:"slots"`   // Слоты программы в порядке времени начала.
+}
+
+// Недельные программы вентиляционных систем. Сохранённая программа не изменяется,
+// при установке новой программы объект заменяется целиком.
+type schedules struct {
+	sync.RWMutex
+	items map[string]*schedule // Программы по идентификатору вентиляционной системы.
+}
+
+// Создание хранилища программ.
+func newSchedules() *schedules { return &schedules{items: make(map[string]*schedule)} }
+
+// Get Программа вентиляционной системы. Если программа не задана, возвращается пустая программа.
+func (sch *schedules) Get(id string) (ret *schedule) {
+	var ok bool
+
+	sch.RLock()
+	ret, ok = sch.items[id]
+	sch.RUnlock()
+	if !ok {
+		ret = &schedule{Slots: []*scheduleSlot{}}
+	}
+
+	return
+}
+
+// Set Установка программы вентиляционной системы. Если передан nil, программа удаляется.
+func (sch *schedules) Set(id string, item *schedule) {
+	sch.Lock()
+	defer sch.Unlock()
+	if item == nil {
+		delete(sch.items, id)
+		return
+	}
+	sch.items[id] = item
+}
+
+// Prepare Проверка и разбор слотов программы, слоты сортируются по времени начала.
+func (item *schedule) Prepare() (err error) {
+	var (
+		n    int
+		at   time.Time
+		slot *scheduleSlot
+	)
+
+	if len(item.Slots) > scheduleSlotsLimit {
+		err = fmt.Errorf("количество слотов программы больше %d", scheduleSlotsLimit)
+		return
+	}
+	if item.Slots == nil {
+		item.Slots = []*scheduleSlot{}
+	}
+	for n = range item.Slots {
+		if slot = item.Slots[n]; slot == nil {
+			err = fmt.Errorf("слот %d программы не задан", n)
+			return
+		}
+		if at, err = time.Parse(scheduleTimeLayout, slot.At); err != nil {
+			err = fmt.Errorf("не корректное время начала слота %d: %q", n, slot.At)
+			return
+		}
+		slot.At, slot.minute, slot.days = at.Format(scheduleTimeLayout), at.Hour()*60+at.Minute(), 0
+		for _, day := range slot.Days {
+			if day < time.Sunday || day > time.Saturday {
+				err = fmt.Errorf("не корректный день недели слота %d: %d", n, day)
+				return
+			}
+			slot.days |= 1 << day
+		}
+		if slot.Speed != nil && (*slot.Speed < Speed1 || *slot.Speed > Speed7) {
+			err = fmt.Errorf("не корректная скорость слота %d: %d", n, *slot.Speed)
+			return
+		}
+		if slot.wmode = WorkUnknown; slot.Workmode != nil {
+			if slot.wmode = WorkParse(*slot.Workmode); slot.wmode == WorkUnknown {
+				err = fmt.Errorf("неизвестный режим работы слота %d: %q", n, *slot.Workmode)
+				return
+			}
+		}
+		if slot.State == nil && slot.Speed == nil && slot.wmode == WorkUnknown {
+			err = fmt.Errorf("слот %d не изменяет ни состояние, ни скорость, ни режим работы", n)
+			return
+		}
+	}
+	sort.SliceStable(item.Slots, func(i, j int) bool { return item.Slots[i].minute < item.Slots[j].minute })
+
+	return
+}
+
+// Due Последний слот программы, время начала которого попадает в интервал (from, to].
+// Если ни один слот не начинается в интервале, возвращается nil.
+// Интервал больше недели сокращается до последней недели.
+func (item *schedule) Due(from time.Time, to time.Time) (ret *scheduleSlot) {
+	var (
+		day, at, last time.Time
+		slot          *scheduleSlot
+	)
+
+	if !item.Enabled || !to.After(from) {
+		return
+	}
+	if to.Sub(from) > scheduleWeek {
+		from = to.Add(-scheduleWeek)
+	}
+	day = time.Date(from.Year(), from.Month(), from.Day(), 0, 0, 0, 0, from.Location())
+	for ; !day.After(to); day = day.AddDate(0, 0, 1) {
+		for _, slot = range item.Slots {
+			if slot.days != 0 && slot.days&(1<<day.Weekday()) == 0 {
+				continue
+			}
+			at = time.Date(day.Year(), day.Month(), day.Day(), slot.minute/60, slot.minute%60, 0, 0, day.Location())
+			if at.After(from) && !at.After(to) && !at.Before(last) {
+				ret, last = slot, at
+			}
+		}
+	}
+
+	return
+}
@@ -0,0 +1,142 @@
+// Package main
+package main
+
+import (
+	"bytes"
+	"encoding/json"
+	"os"
+	"path/filepath"
+	"sync"
+	"time"
+)
+
+// Снимок состояния сервера, сохраняемый в файл и загружаемый при запуске.
+type snapshot struct {
+	SavedAt time.Time                  `json:"saved_at"` // Дата и время сохранения снимка.
+	Devices map[string]*snapshotDevice `json:"devices"`  // Состояние вентиляционных систем по идентификатору.
+}
+
+// Сохраняемое состояние вентиляционной системы. Доступность и сводка проверок по IP адресу
+// не сохраняются: после запуска они определяются проверкой доступности заново.
+type snapshotDevice struct {
+	LastActivityAt time.Time `json:"last_activity_at"`   // Дата и время последней активности.
+	Speed          uint64    `json:"speed"`              // Скорость вращения вентилятора.
+	State          StateType `json:"state"`              // Константа состояния.
+	Work           WorkType  `json:"work"`               // Константа текущего режима.
+	Mode           ModeType  `json:"mode"`               // Константа режима одним числом.
+	Schedule       *schedule `json:"schedule,omitempty"` // Недельная программа, если задана.
+}
+
+// Файл снимка состояния сервера.
+// Запись выполняется не чаще одного раза в snapshotDelay после первого изменения,
+// через временный файл и переименование, чтобы при сбое не остался частично записанный снимок.
+type snapshotStore struct {
+	sync.Mutex
+	path  string        // Путь к файлу снимка.
+	dirty chan struct{} // Сигнал изменения состояния, ожидающего записи.
+	last  []byte        // Последний записанный снимок без времени сохранения.
+}
+
+// Создание хранилища снимка. Если путь к файлу не задан, снимок не сохраняется, возвращается nil.
+func newSnapshotStore(path string) *snapshotStore {
+	if path == "" {
+		return nil
+	}
+
+	return &snapshotStore{path: path, dirty: make(chan struct{}, 1)}
+}
+
+// Changed Отметка изменения состояния, снимок будет записан после задержки. Не блокируется.
+func (sto *snapshotStore) Changed() {
+	if sto == nil {
+		return
+	}
+	select {
+	case sto.dirty <- struct{}{}:
+	default:
+	}
+}
+
+// Load Загрузка снимка из файла. Если файла нет, возвращается nil без ошибки.
+func (sto *snapshotStore) Load() (ret *snapshot, err error) {
+	var buf []byte
+
+	if buf, err = os.ReadFile(sto.path); os.IsNotExist(err) {
+		err = nil
+		return
+	} else if err != nil {
+		return
+	}
+	ret = new(snapshot)
+	if err = json.Unmarshal(buf, ret); err != nil {
+		ret = nil
+		return
+	}
+	sto.Lock()
+	sto.last, _ = ret.Compared()
+	sto.Unlock()
+
+	return
+}
+
+// Save Запись снимка в файл с текущим временем сохранения.
+// Если состояние не изменилось с последней записи, файл не перезаписывается.
+func (sto *snapshotStore) Save(item *snapshot) (err error) {
+	var buf, cmp []byte
+
+	if cmp, err = item.Compared(); err != nil {
+		return
+	}
+	sto.Lock()
+	defer sto.Unlock()
+	if bytes.Equal(cmp, sto.last) {
+		return
+	}
+	item.SavedAt = time.Now()
+	if buf, err = json.Marshal(item); err != nil {
+		return
+	}
+	if err = snapshotWrite(sto.path, buf); err != nil {
+		return
+	}
+	sto.last = cmp
+
+	return
+}
+
+// Compared Представление снимка без времени сохранения, для сравнения снимков.
+func (item snapshot) Compared() (ret []byte, err error) {
+	item.SavedAt = time.Time{}
+	ret, err = json.Marshal(&item)
+
+	return
+}
+
+// Атомарная запись файла: данные записываются во временный файл в том же каталоге,
+// сбрасываются на диск и переименовываются в целевой файл.
+func snapshotWrite(path string, buf []byte) (err error) {
+	var tmp *os.File
+
+	if tmp, err = os.CreateTemp(filepath.Dir(path), filepath.Base(path)+".*"); err != nil {
+		return
+	}
+	defer func() {
+		if err != nil {
+			_ = os.Remove(tmp.Name())
+		}
+	}()
+	if _, err = tmp.Write(buf); err != nil {
+		_ = tmp.Close()
+		return
+	}
+	if err = tmp.Sync(); err != nil {
+		_ = tmp.Close()
+		return
+	}
+	if err = tmp.Close(); err != nil {
+		return
+	}
+	err = os.Rename(tmp.Name(), path)
+
+	return
+}
@@ -3,19 +3,26 @@ package main
 
 import (
 	"crypto/sha1"
+	"encoding/base64"
+	"encoding/json"
 	"hash"
 	"strconv"
+	"sync"
+	"sync/atomic"
 	"time"
 )
 
+// Статус вентиляционной системы.
+// Объект статуса, опубликованный в хранилище statusStore, не изменяется.
 type status struct {
-	LastActivityAt time.Time   `json:"last_activity_at"` // Дата и время последней активности.
-	Available      bool        `json:"available"`        // Доступность вентиляционной системы по IP адресу.
-	Speed          uint64      `json:"speed"`            // Скорость вращения вентилятора. 0-Остановлен. math.MaxUint64-Максимальная скорость.
-	State          StateType   `json:"state"`            // Константа состояния.
-	Work           WorkType    `json:"work"`             // Константа текущего режима.
-	Mode           ModeType    `json:"mode"`             // Константа режима одним числом.
-	Command        CommandType `json:"command"`          // Последняя команда отправленная или полученная вентиляционной системой.
+	LastActivityAt time.Time    `json:"last_activity_at"` // Дата и время последней активности.
+	Available      bool         `json:"available"`        // Доступность вентиляционной системы по IP адресу.
+	Speed          uint64       `json:"speed"`            // Скорость вращения вентилятора. 0-Остановлен. math.MaxUint64-Максимальная скорость.
+	State          StateType    `json:"state"`            // Константа состояния.
+	Work           WorkType     `json:"work"`             // Константа текущего режима.
+	Mode           ModeType     `json:"mode"`             // Константа режима одним числом.
+	Command        CommandType  `json:"command"`          // Последняя команда отправленная или полученная вентиляционной системой.
+	Ping           *pingSummary `json:"ping,omitempty"`   // Сводка последних проверок доступности по IP адресу.
 }
 
 // Hash Вычисление контрольной суммы на основе основных свойств объекта статуса вентиляционной системы.
@@ -23,6 +30,7 @@ type status struct {
 // - LastActivityAt
 // - Mode
 // - Command
+// Сводка проверок доступности учитывается без времени последней проверки.
 func (sto status) Hash() (ret hash.Hash) {
 	ret = sha1.New()
 	if sto.Available {
@@ -33,6 +41,88 @@ func (sto status) Hash() (ret hash.Hash) {
 	ret.Write([]byte(strconv.FormatUint(sto.Speed, 10)))
 	ret.Write([]byte(sto.State.String()))
 	ret.Write([]byte(sto.Work.String()))
+	if sto.Ping != nil {
+		ret.Write([]byte(sto.Ping.key))
+	}
+
+	return
+}
+
+// HashString Контрольная сумма статуса вентиляционной системы в виде строки.
+func (sto status) HashString() string {
+	return base64.URLEncoding.EncodeToString(sto.Hash().Sum(nil))
+}
+
+// Опубликованная версия статуса вентиляционной системы с заранее вычисленными
+// контрольной суммой и JSON представлением. Объект не изменяется после публикации.
+type statusView struct {
+	Status status // Статус вентиляционной системы.
+	Hash   string // Контрольная сумма статуса в виде строки.
+	ETag   string // Значение заголовка ETag.
+	JSON   []byte // JSON представление статуса.
+}
+
+// Хранилище статуса вентиляционной системы.
+// Статус изменяется копированием текущей версии и атомарной заменой указателя на новую версию,
+// изменения выполняются последовательно под мьютексом. Чтение статуса не блокируется и всегда
+// возвращает согласованную версию, JSON представление пересчитывается только при изменении.
+type statusStore struct {
+	mux     sync.Mutex                 // Блокировка изменений.
+	view    atomic.Pointer[statusView] // Текущая версия статуса.
+	checked string                     // Контрольная сумма статуса при последней проверке изменений.
+}
+
+// Создание хранилища с пустым статусом. Первая проверка изменений считает статус изменённым.
+func newStatusStore() (ret *statusStore) {
+	ret = new(statusStore)
+	ret.view.Store(newStatusView(status{}))
+
+	return
+}
+
+// Создание версии статуса.
+func newStatusView(st status) (ret *statusView) {
+	var err error
+
+	ret = &statusView{Status: st, Hash: st.HashString()}
+	ret.ETag = `"` + ret.Hash + `"`
+	if ret.JSON, err = json.Marshal(&ret.Status); err != nil {
+		// Статус состоит из простых типов, ошибка сериализации не возможна.
+		panic(err)
+	}
+
+	return
+}
+
+// Load Текущая версия статуса.
+func (sto *statusStore) Load() *statusView { return sto.view.Load() }
+
+// Update Изменение статуса функцией fn над копией текущей версии.
+// Если статус не изменился, новая версия не публикуется.
+func (sto *statusStore) Update(fn func(st *status)) (ret *statusView) {
+	var st status
+
+	sto.mux.Lock()
+	defer sto.mux.Unlock()
+	ret = sto.view.Load()
+	st = ret.Status
+	if fn(&st); st == ret.Status {
+		return
+	}
+	ret = newStatusView(st)
+	sto.view.Store(ret)
+
+	return
+}
+
+// Check Текущая версия статуса и признак изменения её контрольной суммы с предыдущей проверки.
+func (sto *statusStore) Check() (ret *statusView, changed bool) {
+	sto.mux.Lock()
+	defer sto.mux.Unlock()
+	ret = sto.view.Load()
+	if changed = ret.Hash != sto.checked; changed {
+		sto.checked = ret.Hash
+	}
 
 	return
 }
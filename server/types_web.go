@@ -12,3 +12,17 @@ type speedRequest struct {
 type workmodeRequest struct {
 	Workmode string `json:"workmode"`
 }
+
+// Совместная установка состояния, скорости и режима работы одним запросом.
+// Отсутствующие в запросе поля не изменяются.
+type controlRequest struct {
+	State    *bool   `json:"state,omitempty"`    // Новое состояние. Истина=включить, Ложь=выключить.
+	Speed    *uint8  `json:"speed,omitempty"`    // Новое значение скорости.
+	Workmode *string `json:"workmode,omitempty"` // Новый предустановленный режим работы.
+}
+
+// Результат установки состояния одной вентиляционной системы пакетным запросом.
+type controlResult struct {
+	Ok    bool   `json:"ok"`              // Команды опубликованы.
+	Error string `json:"error,omitempty"` // Описание ошибки.
+}
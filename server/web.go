@@ -3,10 +3,13 @@ package main
 
 import (
 	"context"
+	"crypto/sha1"
+	"encoding/base64"
 	"encoding/json"
 	"log"
 	"net"
 	"net/http"
+	"strings"
 
 	"github.com/webnice/kit/modules/answer"
 	"github.com/webnice/web/v2/header"
@@ -17,26 +20,163 @@ import (
 	"github.com/go-chi/chi/v5/middleware"
 )
 
-func (srv *impl) webServer(ctx context.Context) {
+const (
+	headerETag        = "ETag"
+	headerIfNoneMatch = "If-None-Match"
+)
+
+// Проверка совпадения значения заголовка If-None-Match с текущим ETag.
+func etagMatch(ifNoneMatch string, etag string) (ret bool) {
+	var (
+		n    int
+		tag  string
+		tags []string
+	)
+
+	tags = strings.Split(ifNoneMatch, ",")
+	for n = range tags {
+		if tag = strings.TrimPrefix(strings.TrimSpace(tags[n]), "W/"); tag == etag || tag == "*" {
+			ret = true
+			return
+		}
+	}
+
+	return
+}
+
+// Процесс web сервера. При отмене контекста новые соединения не принимаются, потоки событий
+// завершаются, а выполняющиеся запросы ожидаются не дольше shutdownTimeout.
+// Канал end закрывается после остановки web сервера.
+func (srv *impl) webServer(ctx context.Context, end chan<- struct{}) {
 	var (
 		listener net.Listener
 		router   *chi.Mux
 		err      error
-		end      chan error
+		serve    chan error
+		sctx     context.Context
+		scfn     context.CancelFunc
 	)
 
+	defer close(end)
+
 	router = chi.NewRouter()
 	router.Use(middleware.RealIP)
 	router.Use(middleware.Recoverer)
+	router.Use(srv.metricsMiddleware)
 	// Заглушка.
 	router.Get("/", func(wr http.ResponseWriter, rq *http.Request) {
 		wr.Header().Set(header.Location, "https://github.com/monoflash/vakio")
 		answer.Response(wr, webStatus.MovedPermanently, nil)
 	})
+	// Состояние всех вентиляционных систем одним запросом.
+	// Если статусы не изменились с момента предыдущего запроса, возвращается 304 без тела ответа.
+	router.Get("/conditions", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			etag = srv.conditionsETag()
+			ret  map[string]json.RawMessage
+		)
+
+		wr.Header().Set(headerETag, etag)
+		if etagMatch(rq.Header.Get(headerIfNoneMatch), etag) {
+			answer.Response(wr, webStatus.NotModified, nil)
+			return
+		}
+		ret = make(map[string]json.RawMessage, len(srv.DeviceIds))
+		for _, id := range srv.DeviceIds {
+			ret[id] = srv.Devices[id].Status.Load().JSON
+		}
+		wr.Header().Set(header.ContentType, mime.TextPlainCharsetUTF8)
+		answer.JSON(wr, webStatus.Ok, ret)
+	})
+	// Поток изменений состояния вентиляционных систем.
+	router.Get("/events", srv.eventsHandler)
+	// Показатели работы сервера в текстовом формате Prometheus.
+	router.Get("/metrics", srv.metricsHandler)
+	// Совместная установка состояния, скорости и режима работы нескольких вентиляционных систем.
+	// Тело запроса: объект, ключи которого - идентификаторы вентиляционных систем, значения - как в /control.
+	// Ответ: объект с результатом по каждой вентиляционной системе.
+	router.Put("/controls", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			err     error
+			decoder *json.Decoder
+			req     map[string]*controlRequest
+		)
+
+		decoder = json.NewDecoder(rq.Body)
+		decoder.DisallowUnknownFields()
+		if err = decoder.Decode(&req); err != nil {
+			answer.InternalServerError(wr, err)
+			return
+		}
+		wr.Header().Set(header.ContentType, mime.TextPlainCharsetUTF8)
+		answer.JSON(wr, webStatus.Ok, srv.Controls(req))
+	})
+	// Недельные программы всех вентиляционных систем.
+	router.Get("/schedules", func(wr http.ResponseWriter, rq *http.Request) {
+		var ret = make(map[string]*schedule, len(srv.DeviceIds))
+
+		for _, id := range srv.DeviceIds {
+			ret[id] = srv.Schedules.Get(id)
+		}
+		wr.Header().Set(header.ContentType, mime.TextPlainCharsetUTF8)
+		answer.JSON(wr, webStatus.Ok, ret)
+	})
+	// Маршруты вентиляционной системы по умолчанию, сохранены для совместимости.
+	srv.deviceRoutes(router)
+	// Маршруты вентиляционной системы по идентификатору.
+	router.Route("/devices/{id}", srv.deviceRoutes)
+	// Настройка сервера.
+	server := &http.Server{Addr: srv.Cfg.WebServer, Handler: router}
+	addr := server.Addr
+	if addr == "" {
+		addr = ":http"
+	}
+	if listener, err = net.Listen("tcp", addr); err != nil {
+		log.Printf("запуск web сервера прерван ошибкой: %s", err)
+		srv.stop()
+		return
+	}
+	// Потоки событий не завершаются сами, они закрываются при остановке web сервера.
+	server.RegisterOnShutdown(srv.Events.Close)
+	serve = make(chan error, 1)
+	go func(e chan<- error, l net.Listener) { e <- server.Serve(listener) }(serve, listener)
+	select {
+	case err = <-serve:
+		log.Printf("работа web сервера прервана ошибкой: %s", err)
+		srv.stop()
+	case <-ctx.Done():
+		sctx, scfn = context.WithTimeout(context.Background(), shutdownTimeout)
+		defer scfn()
+		if err = server.Shutdown(sctx); err != nil {
+			log.Printf("остановка web сервера прервана ошибкой: %s", err)
+		}
+	}
+}
+
+// Регистрация маршрутов управления вентиляционной системой.
+func (srv *impl) deviceRoutes(router chi.Router) {
 	// Состояние вентиляционной системы.
+	// Если статус не изменился с момента предыдущего запроса, возвращается 304 без тела ответа.
+	// Ответ формируется из заранее сериализованной версии статуса без блокировок.
 	router.Get("/condition", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			ok   bool
+			dev  *device
+			view *statusView
+		)
+
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
+		view = dev.Status.Load()
+		wr.Header().Set(headerETag, view.ETag)
+		if etagMatch(rq.Header.Get(headerIfNoneMatch), view.ETag) {
+			answer.Response(wr, webStatus.NotModified, nil)
+			return
+		}
 		wr.Header().Set(header.ContentType, mime.TextPlainCharsetUTF8)
-		answer.JSON(wr, webStatus.Ok, srv.Status)
+		wr.WriteHeader(http.StatusOK)
+		_, _ = wr.Write(view.JSON)
 	})
 	// Включение и отключение вентиляционной системы.
 	router.Put("/state", func(wr http.ResponseWriter, rq *http.Request) {
@@ -44,8 +184,13 @@ func (srv *impl) webServer(ctx context.Context) {
 			err     error
 			decoder *json.Decoder
 			req     *stateRequest
+			dev     *device
+			ok      bool
 		)
 
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
 		decoder = json.NewDecoder(rq.Body)
 		decoder.DisallowUnknownFields()
 		req = new(stateRequest)
@@ -53,7 +198,7 @@ func (srv *impl) webServer(ctx context.Context) {
 			answer.InternalServerError(wr, err)
 			return
 		}
-		if err = srv.TurnOnOff(req.State); err != nil {
+		if err = srv.TurnOnOff(dev, req.State); err != nil {
 			answer.InternalServerError(wr, err)
 			return
 		}
@@ -65,8 +210,13 @@ func (srv *impl) webServer(ctx context.Context) {
 			err     error
 			decoder *json.Decoder
 			req     *speedRequest
+			dev     *device
+			ok      bool
 		)
 
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
 		decoder = json.NewDecoder(rq.Body)
 		decoder.DisallowUnknownFields()
 		req = new(speedRequest)
@@ -74,7 +224,7 @@ func (srv *impl) webServer(ctx context.Context) {
 			answer.InternalServerError(wr, err)
 			return
 		}
-		if err = srv.Speed(req.Speed); err != nil {
+		if err = srv.Speed(dev, req.Speed); err != nil {
 			answer.InternalServerError(wr, err)
 			return
 		}
@@ -86,9 +236,14 @@ func (srv *impl) webServer(ctx context.Context) {
 			err     error
 			decoder *json.Decoder
 			req     *workmodeRequest
+			dev     *device
+			ok      bool
 			wmode   WorkType
 		)
 
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
 		decoder = json.NewDecoder(rq.Body)
 		decoder.DisallowUnknownFields()
 		req = new(workmodeRequest)
@@ -100,29 +255,127 @@ func (srv *impl) webServer(ctx context.Context) {
 			answer.Response(wr, webStatus.UnprocessableEntity, nil)
 			return
 		}
-		if err = srv.Workmode(wmode); err != nil {
+		if err = srv.Workmode(dev, wmode); err != nil {
 			answer.InternalServerError(wr, err)
 			return
 		}
 		answer.Response(wr, webStatus.NoContent, nil)
 	})
-	// Настройка сервера.
-	server := &http.Server{Addr: srv.Cfg.WebServer, Handler: router}
-	addr := server.Addr
-	if addr == "" {
-		addr = ":http"
-	}
-	if listener, err = net.Listen("tcp", addr); err != nil {
-		log.Printf("запуск web сервера прерван ошибкой: %s", err)
-		srv.done <- struct{}{}
+	// Совместная установка состояния, скорости и режима работы вентиляции.
+	router.Put("/control", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			err     error
+			decoder *json.Decoder
+			req     *controlRequest
+			dev     *device
+			ok      bool
+			wmode   WorkType
+		)
+
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
+		decoder = json.NewDecoder(rq.Body)
+		decoder.DisallowUnknownFields()
+		req = new(controlRequest)
+		if err = decoder.Decode(req); err != nil {
+			answer.InternalServerError(wr, err)
+			return
+		}
+		if req.Workmode != nil {
+			if wmode = WorkParse(*req.Workmode); wmode == WorkUnknown {
+				answer.Response(wr, webStatus.UnprocessableEntity, nil)
+				return
+			}
+		}
+		if err = srv.Control(dev, req.State, req.Speed, wmode); err != nil {
+			answer.InternalServerError(wr, err)
+			return
+		}
+		answer.Response(wr, webStatus.NoContent, nil)
+	})
+	// Недельная программа вентиляционной системы.
+	router.Get("/schedule", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			dev *device
+			ok  bool
+		)
+
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
+		wr.Header().Set(header.ContentType, mime.TextPlainCharsetUTF8)
+		answer.JSON(wr, webStatus.Ok, srv.Schedules.Get(dev.ID))
+	})
+	// Установка недельной программы вентиляционной системы, программа заменяется целиком.
+	// Если программа не прошла проверку, возвращается 422 с описанием ошибки.
+	router.Put("/schedule", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			err     error
+			decoder *json.Decoder
+			req     *schedule
+			dev     *device
+			ok      bool
+		)
+
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
+		decoder = json.NewDecoder(rq.Body)
+		decoder.DisallowUnknownFields()
+		req = new(schedule)
+		if err = decoder.Decode(req); err != nil {
+			answer.InternalServerError(wr, err)
+			return
+		}
+		if err = req.Prepare(); err != nil {
+			answer.Response(wr, webStatus.UnprocessableEntity, []byte(err.Error()))
+			return
+		}
+		srv.Schedules.Set(dev.ID, req)
+		srv.Snapshot.Changed()
+		answer.Response(wr, webStatus.NoContent, nil)
+	})
+	// Удаление недельной программы вентиляционной системы.
+	router.Delete("/schedule", func(wr http.ResponseWriter, rq *http.Request) {
+		var (
+			dev *device
+			ok  bool
+		)
+
+		if dev, ok = srv.requestDevice(wr, rq); !ok {
+			return
+		}
+		srv.Schedules.Set(dev.ID, nil)
+		srv.Snapshot.Changed()
+		answer.Response(wr, webStatus.NoContent, nil)
+	})
+}
+
+// Вентиляционная система запроса: по идентификатору из адреса или система по умолчанию.
+// Если вентиляционная система не найдена, отправляется ответ 404.
+func (srv *impl) requestDevice(wr http.ResponseWriter, rq *http.Request) (dev *device, ok bool) {
+	var id string
+
+	if id = chi.URLParam(rq, "id"); id == "" {
+		dev, ok = srv.defaultDevice(), true
 		return
 	}
-	end = make(chan error)
-	go func(e chan<- error, l net.Listener) { e <- server.Serve(listener) }(end, listener)
-	select {
-	case err = <-end:
-		log.Printf("работа web сервера прервана ошибкой: %s", err)
-		srv.done <- struct{}{}
-	case <-ctx.Done():
+	if dev, ok = srv.Devices[id]; !ok {
+		answer.Response(wr, webStatus.NotFound, nil)
+	}
+
+	return
+}
+
+// Значение заголовка ETag для статусов всех вентиляционных систем.
+func (srv *impl) conditionsETag() string {
+	var sum = sha1.New()
+
+	for _, id := range srv.DeviceIds {
+		sum.Write([]byte(id))
+		sum.Write([]byte(srv.Devices[id].Status.Load().Hash))
 	}
+
+	return `"` + base64.URLEncoding.EncodeToString(sum.Sum(nil)) + `"`
 }
@@ -0,0 +1,100 @@
+"""
+Общие фикстуры тестов: цикл событий, минимальный экземпляр Home Assistant и
+локальная замена сервера управления.
+Тесты синхронные: асинхронный код выполняется в цикле событий фикстуры loop,
+что позволяет измерять его с помощью pytest-benchmark.
+"""
+import asyncio
+import pathlib
+import sys
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.fake_bridge import FakeBridge  # noqa: E402
+
+
+@pytest.fixture
+def loop():
+    """Отдельный цикл событий теста."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def run(loop) -> Callable[[Awaitable[Any]], Any]:
+    """Выполнение корутины в цикле событий теста."""
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def hass(tmp_path, run):
+    """
+    Минимальный экземпляр Home Assistant с подключённой интеграцией из
+    custom_components репозитория.
+    """
+    from homeassistant import config_entries, loader
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers import (
+        area_registry,
+        device_registry,
+        entity,
+        entity_registry,
+        floor_registry,
+        issue_registry,
+        label_registry,
+        restore_state,
+        template,
+        translation,
+    )
+
+    (tmp_path / "custom_components").symlink_to(ROOT / "custom_components")
+
+    async def start() -> HomeAssistant:
+        hass = HomeAssistant(str(tmp_path))
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        translation.async_setup(hass)
+        entity.async_setup(hass)
+        template.async_setup(hass)
+        for registry in (
+            area_registry,
+            device_registry,
+            entity_registry,
+            floor_registry,
+            issue_registry,
+            label_registry,
+            restore_state,
+        ):
+            await registry.async_load(hass)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        return hass
+
+    hass = run(start())
+    yield hass
+    run(hass.async_stop(force=True))
+
+
+@pytest.fixture
+def bridge(run):
+    """Фабрика запущенных серверов управления, останавливаются после теста."""
+    bridges: list[FakeBridge] = []
+
+    def factory(**kwargs: Any) -> FakeBridge:
+        fake = FakeBridge(**kwargs)
+        run(fake.start())
+        bridges.append(fake)
+        return fake
+
+    yield factory
+    for fake in bridges:
+        run(fake.stop())
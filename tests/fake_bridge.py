@@ -0,0 +1,208 @@
+"""
+Локальная замена сервера управления вентиляционными системами (server/).
+Повторяет REST API сервера: состояние устройств с ETag, команды управления и
+маршруты устройств по идентификатору. Задержка ответа, доля ошибок и частота
+изменения состояния устройств настраиваются.
+"""
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+
+DEFAULT_DEVICE: str = "vakio"
+WORKMODES: tuple[str, ...] = (
+    "inflow",
+    "inflow_max",
+    "recuperator",
+    "winter",
+    "outflow",
+    "outflow_max",
+    "night",
+)
+
+
+class FakeBridge:
+    """
+    Сервер управления с devices вентиляционными системами.
+    latency - задержка каждого ответа, секунд.
+    error_rate - доля запросов, на которые отвечается ошибкой 500.
+    churn - вероятность изменения состояния одного из устройств перед ответом
+    на запрос состояния.
+    batch - поддержка пакетных команд /controls.
+    schedules - поддержка недельных программ устройств.
+    """
+
+    def __init__(
+        self,
+        devices: int = 1,
+        latency: float = 0,
+        error_rate: float = 0,
+        churn: float = 0,
+        seed: int = 0,
+        batch: bool = True,
+        schedules: bool = True,
+    ) -> None:
+        self.latency = latency
+        self.batch = batch
+        self.schedules: dict[str, dict[str, Any]] | None = {} if schedules else None
+        self.error_rate = error_rate
+        self.churn = churn
+        self.requests: int = 0
+        self.commands: list[tuple[str, dict[str, Any]]] = []
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.url: str = ""
+        self.devices: dict[str, dict[str, Any]] = {}
+        for n in range(devices):
+            self.devices[DEFAULT_DEVICE if n == 0 else f"{DEFAULT_DEVICE}{n}"] = {
+                "last_activity_at": "2024-05-01T12:34:56.123456789+03:00",
+                "available": True,
+                "speed": 3,
+                "state": "on",
+                "work": "inflow",
+                "mode": "",
+                "command": "",
+                "ping": {
+                    "samples": 20,
+                    "rtt_min": 1.2,
+                    "rtt_avg": 2.5,
+                    "rtt_max": 7.9,
+                    "loss": 0,
+                    "last_at": "2024-05-01T12:34:30.5+03:00",
+                },
+            }
+
+    async def start(self) -> str:
+        """Запуск сервера на свободном порту, возвращается адрес сервера."""
+        app = web.Application()
+        app.router.add_get("/conditions", self._conditions)
+        app.router.add_get("/condition", self._condition)
+        app.router.add_get("/devices/{id}/condition", self._condition)
+        for endpoint in ("state", "speed", "workmode", "control"):
+            app.router.add_put(f"/{endpoint}", self._command)
+            app.router.add_put(f"/devices/{{id}}/{endpoint}", self._command)
+        if self.batch:
+            app.router.add_put("/controls", self._controls)
+        if self.schedules is not None:
+            app.router.add_get("/schedules", self._schedules)
+            app.router.add_put("/devices/{id}/schedule", self._schedule)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port: int = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Остановка сервера."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def Churn(self) -> None:
+        """Изменение скорости и режима случайного устройства."""
+        device = self.devices[self._random.choice(list(self.devices))]
+        device["speed"] = self._random.randint(1, 7)
+        device["work"] = self._random.choice(WORKMODES)
+
+    async def _prepare(self) -> web.Response | None:
+        """Общая обработка запроса: счётчик, задержка и имитация ошибки."""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500)
+        return None
+
+    def _device(self, request: web.Request) -> dict[str, Any]:
+        device_id: str = request.match_info.get("id", DEFAULT_DEVICE)
+        if device_id not in self.devices:
+            raise web.HTTPNotFound()
+        return self.devices[device_id]
+
+    @staticmethod
+    def _etag(data: Any) -> str:
+        body: bytes = json.dumps(data, sort_keys=True).encode()
+        return f'"{hashlib.sha1(body).hexdigest()}"'
+
+    def _respond(self, request: web.Request, data: Any) -> web.Response:
+        """Ответ с ETag, при совпадении If-None-Match - 304 без тела."""
+        etag = self._etag(data)
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=json.dumps(data),
+            content_type="application/json",
+            headers={"ETag": etag},
+        )
+
+    async def _conditions(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        if self.churn and self._random.random() < self.churn:
+            self.Churn()
+        return self._respond(request, self.devices)
+
+    async def _condition(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        if self.churn and self._random.random() < self.churn:
+            self.Churn()
+        return self._respond(request, self._device(request))
+
+    async def _command(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        device = self._device(request)
+        data: dict[str, Any] = await request.json()
+        self.commands.append((request.path, data))
+        self._apply(device, data)
+        return web.Response(status=204)
+
+    async def _controls(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        data: dict[str, dict[str, Any]] = await request.json()
+        self.commands.append((request.path, data))
+        results: dict[str, dict[str, Any]] = {}
+        for device_id, command in data.items():
+            if device_id not in self.devices:
+                results[device_id] = {"ok": False, "error": "device not found"}
+                continue
+            self._apply(self.devices[device_id], command)
+            results[device_id] = {"ok": True}
+        return web.json_response(results)
+
+    async def _schedules(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        return web.json_response(
+            {
+                device_id: self.schedules.get(device_id, {"enabled": False, "slots": []})
+                for device_id in self.devices
+            }
+        )
+
+    async def _schedule(self, request: web.Request) -> web.Response:
+        if (error := await self._prepare()) is not None:
+            return error
+        self._device(request)
+        data: dict[str, Any] = await request.json()
+        self.commands.append((request.path, data))
+        self.schedules[request.match_info["id"]] = data
+        return web.Response(status=204)
+
+    @staticmethod
+    def _apply(device: dict[str, Any], data: dict[str, Any]) -> None:
+        """Выполнение команды устройством."""
+        if "state" in data:
+            device["state"] = "on" if data["state"] else "off"
+        if "speed" in data and device["state"] == "on":
+            device["speed"] = data["speed"]
+        if "workmode" in data:
+            device["work"] = data["workmode"]
@@ -0,0 +1,248 @@
+"""
+Измерение производительности опроса сервера, разбора ответа, отправки команд
+и обновления сущностей для 1, 10 и 100 вентиляционных систем.
+
+Запуск: python -m pytest tests/test_benchmark.py --benchmark-only
+"""
+import datetime
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+import pytest
+
+from homeassistant import config_entries
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.vakio_base_smart.api import Api, Coordinator
+from custom_components.vakio_base_smart.breaker import CircuitBreaker
+from custom_components.vakio_base_smart.const import (
+    BREAKER_CLOSED,
+    CONF_LANGUAGE,
+    CONF_SERVER_URL,
+    DEFAULT_LANGUAGE,
+    DOMAIN,
+)
+from custom_components.vakio_base_smart.types import ConditionResponse
+from tests.fake_bridge import FakeBridge
+
+
+DEVICES: list[int] = [1, 10, 100]
+
+
+async def create_api(hass, fake) -> Api:
+    return Api(async_get_clientsession(hass), fake.url, "", "", DEFAULT_LANGUAGE)
+
+
+async def create_coordinator(hass, fake) -> Coordinator:
+    return Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE)
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_api_poll(benchmark, hass, run, bridge, devices):
+    """Опрос состояния с изменением данных перед каждым ответом сервера."""
+    fake = bridge(devices=devices, churn=1)
+    api = run(create_api(hass, fake))
+
+    result = benchmark(lambda: run(api.Conditions()))
+
+    assert len(result) == devices
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_api_poll_not_modified(benchmark, hass, run, bridge, devices):
+    """Опрос состояния без изменений: сервер отвечает 304, JSON не декодируется."""
+    fake = bridge(devices=devices)
+    api = run(create_api(hass, fake))
+    first = run(api.Conditions())
+
+    result = benchmark(lambda: run(api.Conditions()))
+
+    assert result is first
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_condition_parse(benchmark, devices):
+    """
+    Разбор ответа сервера и сравнение с предыдущим состоянием без обмена по
+    сети: обработка одного опроса на стороне Home Assistant.
+    """
+    data = FakeBridge(devices=devices).devices
+    previous = {
+        device: ConditionResponse.Parse(condition) for device, condition in data.items()
+    }
+
+    def parse() -> bool:
+        conditions = {
+            device: ConditionResponse.Parse(condition)
+            for device, condition in data.items()
+        }
+        return conditions == previous
+
+    assert benchmark(parse) is True
+
+
+class FormerConditionResponse:
+    """
+    Прежняя модель состояния устройства для сравнения: объект со словарём
+    атрибутов, создаваемый из именованных аргументов ответа сервера.
+    """
+
+    def __init__(
+        self,
+        last_activity_at: str,
+        available: bool,
+        speed: int,
+        state: str,
+        work: str,
+        mode: str,
+        command: str,
+    ) -> None:
+        self.State: bool = state == "on"
+        self.LastActivityAt = datetime.datetime.fromisoformat(last_activity_at)
+        self.Available: bool = available
+        self.Speed: int = speed
+        self.Work: str = work
+        self.Mode: str = mode
+        self.Command: str = command
+
+
+def allocated(function: Callable[[], Any]) -> tuple[Any, int, int]:
+    """
+    Выполнение функции с отслеживанием выделения памяти. Возвращается результат,
+    объём памяти, удерживаемой после выполнения, и пиковый объём, байт.
+    """
+    tracemalloc.start()
+    try:
+        started, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current - started, peak - started
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_condition_allocation(devices):
+    """
+    Память на разбор ответа сервера и сравнение с предыдущим состоянием в
+    сравнении с прежней моделью. Статистика проверок доступности прежней
+    моделью не разбиралась и в сравнение не входит.
+    """
+    data = {
+        device: {key: value for key, value in condition.items() if key != "ping"}
+        for device, condition in FakeBridge(devices=devices).devices.items()
+    }
+    previous = {
+        device: ConditionResponse.Parse(condition) for device, condition in data.items()
+    }
+
+    conditions, parsed, _ = allocated(
+        lambda: {
+            device: ConditionResponse.Parse(condition)
+            for device, condition in data.items()
+        }
+    )
+    _, former, _ = allocated(
+        lambda: {
+            device: FormerConditionResponse(**condition)
+            for device, condition in data.items()
+        }
+    )
+    # Первое сравнение заполняет внутренние кэши интерпретатора.
+    assert conditions == previous
+    equal, compared, _ = allocated(lambda: conditions == previous)
+
+    # Объект без словаря атрибутов занимает меньше прежнего.
+    assert parsed < former
+    # Сравнение не изменившегося состояния не удерживает память.
+    assert equal is True
+    assert compared == 0
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_coordinator_refresh(benchmark, hass, run, bridge, devices):
+    """Полный цикл обновления координатора с изменяющимися данными."""
+    fake = bridge(devices=devices, churn=1)
+    coordinator = run(create_coordinator(hass, fake))
+
+    benchmark(lambda: run(coordinator.async_refresh()))
+
+    assert coordinator.last_update_success
+    assert len(coordinator.data) == devices
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_coordinator_refresh_errors(benchmark, hass, run, bridge, devices):
+    """
+    Обновление координатора, когда половина запросов завершается ошибкой.
+    Выключатель не размыкается, чтобы измерялись запросы к серверу, а не
+    отказ в запросе без обращения к серверу.
+    """
+    fake = bridge(devices=devices, churn=1, error_rate=0.5)
+    coordinator = run(create_coordinator(hass, fake))
+    coordinator.api.breaker = CircuitBreaker(fake.url, threshold=sys.maxsize)
+    results: list[bool] = []
+
+    def refresh() -> None:
+        run(coordinator.async_refresh())
+        results.append(coordinator.last_update_success)
+
+    benchmark(refresh)
+    benchmark.extra_info["failed_share"] = results.count(False) / len(results)
+
+    # Каждое обновление выполнило запрос к серверу.
+    assert fake.requests == len(results)
+    assert coordinator.api.breaker.State == BREAKER_CLOSED
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_command_latency(benchmark, hass, run, bridge, devices):
+    """Задержка отправки команды управления одному из устройств."""
+    fake = bridge(devices=devices)
+    api = run(create_api(hass, fake))
+    device = list(fake.devices)[-1]
+
+    result = benchmark(lambda: run(api.Control(device, state=True, speed=5)))
+
+    assert result is True
+    assert fake.devices[device]["speed"] == 5
+
+
+@pytest.mark.parametrize("devices", DEVICES)
+def test_entity_update_rate(benchmark, hass, run, bridge, devices):
+    """
+    Обновление состояния сущностей Home Assistant после изменения всех
+    устройств сервера: опрос, разбор ответа и запись состояния сущностей.
+    """
+    fake = bridge(devices=devices)
+    entry = config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="",
+        data={CONF_SERVER_URL: fake.url, CONF_LANGUAGE: "Русский"},
+        source=config_entries.SOURCE_USER,
+        options={},
+    )
+    run(hass.config_entries.async_add(entry))
+    run(hass.async_block_till_done())
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    changes: list = []
+    rounds: list = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, changes.append)
+
+    async def update() -> None:
+        rounds.append(None)
+        for _ in range(devices):
+            fake.Churn()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    benchmark(lambda: run(update()))
+    benchmark.extra_info["state_changes_per_round"] = len(changes) / len(rounds)
+
+    assert changes
+    run(hass.config_entries.async_unload(entry.entry_id))
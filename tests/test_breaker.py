@@ -0,0 +1,86 @@
+"""Проверка автоматического выключателя запросов к серверу."""
+import asyncio
+
+import pytest
+
+from custom_components.vakio_base_smart import breaker as module
+from custom_components.vakio_base_smart.api import Coordinator
+from custom_components.vakio_base_smart.breaker import CircuitBreaker
+from custom_components.vakio_base_smart.const import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    DEFAULT_LANGUAGE,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker("test", threshold=3, backoff=5, backoff_max=20)
+
+    assert breaker.Failure() is True
+    assert breaker.Failure() is False
+    assert breaker.State == BREAKER_CLOSED
+    breaker.Failure()
+
+    assert breaker.State == BREAKER_OPEN
+    assert not breaker.Allow()
+    assert breaker.Remaining() == 5
+
+
+def test_half_open_probe_and_backoff(clock):
+    breaker = CircuitBreaker("test", threshold=1, backoff=5, backoff_max=12)
+    breaker.Failure()
+    clock[0] += 5
+
+    assert breaker.Allow()
+    assert breaker.State == BREAKER_HALF_OPEN
+    # Только один пробный запрос.
+    assert not breaker.Allow()
+    breaker.Failure()
+    assert breaker.State == BREAKER_OPEN
+    assert breaker.Backoff == 10
+    clock[0] += 10
+    assert breaker.Allow()
+    breaker.Failure()
+    assert breaker.Backoff == 12
+
+
+def test_success_closes(clock):
+    breaker = CircuitBreaker("test", threshold=1, backoff=5)
+    breaker.Failure()
+    clock[0] += 5
+    assert breaker.Allow()
+
+    breaker.Success()
+
+    assert breaker.State == BREAKER_CLOSED
+    assert breaker.Failures == 0
+    assert breaker.Allow()
+    assert breaker.Failure() is True
+
+
+def test_cancelled_probe_released(hass, run, bridge):
+    fake = bridge(devices=1, latency=0.2)
+    api = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE).api
+    api.breaker = CircuitBreaker("test", threshold=1, backoff=0)
+    api.breaker.Failure()
+
+    async def cancel_probe() -> None:
+        probe = asyncio.ensure_future(api.Conditions())
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        # Завершение обработки отменённого запроса сервером до его остановки.
+        await asyncio.sleep(0.2)
+
+    run(cancel_probe())
+
+    assert api.breaker.State == BREAKER_HALF_OPEN
+    assert api.breaker.Allow()
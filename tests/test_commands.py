@@ -0,0 +1,145 @@
+"""
+Проверка отправки команд: результат, ограничение времени, отмена, очередь и
+пакетная отправка команд нескольким устройствам.
+"""
+import asyncio
+
+from custom_components.vakio_base_smart.api import Coordinator
+from custom_components.vakio_base_smart.const import (
+    DEFAULT_COMMAND_CONCURRENCY,
+    DEFAULT_LANGUAGE,
+)
+
+
+async def create_coordinator(hass, fake, **kwargs) -> Coordinator:
+    coordinator = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE, **kwargs)
+    await coordinator.async_refresh()
+    return coordinator
+
+
+def test_result_and_callback(hass, run, bridge):
+    fake = bridge(devices=1)
+    coordinator = run(create_coordinator(hass, fake))
+    results: list[bool] = []
+
+    turned_on = coordinator.SetTurnOn("vakio")
+    done = coordinator.SetSpeed("vakio", 5, on_done=results.append)
+
+    assert run(done) is True
+    assert turned_on.result() is True
+    assert results == [True]
+    # Команды одного окна объединяются в один запрос.
+    assert fake.commands == [("/devices/vakio/control", {"state": True, "speed": 5})]
+
+
+def test_timeout(hass, run, bridge):
+    fake = bridge(devices=1)
+    coordinator = run(create_coordinator(hass, fake, command_timeout=0.1))
+    fake.latency = 0.5
+
+    done = coordinator.SetSpeed("vakio", 5)
+
+    assert run(done) is False
+    # Отображаемое состояние возвращено к полученному с сервера.
+    assert coordinator.data["vakio"].Speed == 3
+    # Завершение обработки прерванного запроса сервером.
+    run(asyncio.sleep(fake.latency))
+
+
+def test_cancel(hass, run, bridge):
+    fake = bridge(devices=1)
+    coordinator = run(create_coordinator(hass, fake))
+
+    coordinator.SetSpeed("vakio", 5).cancel()
+    run(asyncio.sleep(0.5))
+
+    assert fake.commands == []
+    assert coordinator.data["vakio"].Speed == 3
+
+
+def test_concurrency(hass, run, bridge):
+    fake = bridge(devices=DEFAULT_COMMAND_CONCURRENCY * 2, batch=False)
+    coordinator = run(create_coordinator(hass, fake))
+    fake.latency = 0.05
+    control = coordinator.api.Control
+    active: list[int] = [0, 0]
+
+    async def counting_control(device, **commands) -> bool:
+        active[0] += 1
+        active[1] = max(active)
+        try:
+            return await control(device, **commands)
+        finally:
+            active[0] -= 1
+
+    coordinator.api.Control = counting_control
+    results = run(
+        asyncio.gather(*[coordinator.SetTurnOff(device) for device in fake.devices])
+    )
+
+    assert all(results)
+    assert active[1] == DEFAULT_COMMAND_CONCURRENCY
+
+
+def test_batch(hass, run, bridge):
+    fake = bridge(devices=3)
+    coordinator = run(create_coordinator(hass, fake))
+
+    results = run(
+        coordinator.async_apply_scene(
+            ["vakio", "vakio2"], state=True, speed=5, workmode="night"
+        )
+    )
+
+    assert results == {"vakio": True, "vakio2": True}
+    command = {"state": True, "speed": 5, "workmode": "night"}
+    assert fake.commands == [("/controls", {"vakio": command, "vakio2": command})]
+    assert coordinator.data["vakio2"].Work == "night"
+    assert coordinator.data["vakio1"].Work == "inflow"
+
+
+def test_batch_turn_off(hass, run, bridge):
+    fake = bridge(devices=2)
+    coordinator = run(create_coordinator(hass, fake))
+
+    run(coordinator.async_apply_scene(["vakio", "vakio1"], state=False, speed=5))
+
+    # Скорость при выключении не отправляется.
+    assert fake.commands == [
+        ("/controls", {"vakio": {"state": False}, "vakio1": {"state": False}})
+    ]
+
+
+def test_batch_fallback(hass, run, bridge):
+    fake = bridge(devices=2, batch=False)
+    coordinator = run(create_coordinator(hass, fake))
+
+    results = run(coordinator.async_apply_scene(["vakio", "vakio1"], speed=2))
+    run(coordinator.async_apply_scene(["vakio", "vakio1"], speed=4))
+
+    assert results == {"vakio": True, "vakio1": True}
+    assert sorted(fake.commands, key=repr) == [
+        ("/devices/vakio/control", {"speed": 2}),
+        ("/devices/vakio/control", {"speed": 4}),
+        ("/devices/vakio1/control", {"speed": 2}),
+        ("/devices/vakio1/control", {"speed": 4}),
+    ]
+    # После отказа сервера пакетный запрос больше не отправляется.
+    assert coordinator.api._batch is False
+
+
+def test_fast_poll_with_unavailable_device(hass, run, bridge):
+    fake = bridge(devices=2)
+    fake.devices["vakio1"]["available"] = False
+    coordinator = run(create_coordinator(hass, fake))
+
+    assert run(coordinator.SetSpeed("vakio", 5)) is True
+    run(coordinator.async_refresh())
+    # Недоступность одного устройства не отменяет частый опрос после команды.
+    assert coordinator.update_interval == coordinator._poll_interval
+    # Редкий опрос выбирается, когда недоступны все устройства.
+    fake.devices["vakio"]["available"] = False
+    run(coordinator.async_refresh())
+    coordinator._fast_poll_until = 0
+    run(coordinator.async_refresh())
+    assert coordinator.update_interval >= coordinator._poll_interval_max
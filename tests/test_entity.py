@@ -0,0 +1,30 @@
+"""Проверка записи состояния сущностей только при его изменении."""
+from custom_components.vakio_base_smart.api import Coordinator
+from custom_components.vakio_base_smart.const import DEFAULT_LANGUAGE
+from custom_components.vakio_base_smart.switch import VakioScheduleSwitchEntity
+from custom_components.vakio_base_smart.types import Schedule, ScheduleSlot
+
+
+def test_write_extra_attributes(hass, run, bridge):
+    fake = bridge(devices=1)
+
+    async def create_coordinator() -> Coordinator:
+        coordinator = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE)
+        await coordinator.async_refresh()
+        return coordinator
+
+    coordinator = run(create_coordinator())
+    slot = ScheduleSlot(At="07:00", Speed=2)
+    coordinator.schedules = {"vakio": Schedule(Enabled=True, Slots=(slot,))}
+    entity = VakioScheduleSwitchEntity(coordinator, "vakio", "entry")
+    written: list[dict] = []
+    entity.async_write_ha_state = lambda: written.append(entity.extra_state_attributes)
+
+    entity.async_write_state_if_changed()
+    entity.async_write_state_if_changed()
+    # Изменились только слоты программы, состояние переключателя прежнее.
+    slot = ScheduleSlot(At="07:00", Speed=4)
+    coordinator.schedules = {"vakio": Schedule(Enabled=True, Slots=(slot,))}
+    entity.async_write_state_if_changed()
+
+    assert [attributes["slots"][0]["speed"] for attributes in written] == [2, 4]
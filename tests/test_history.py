@@ -0,0 +1,156 @@
+"""Проверка кольцевого буфера истории состояния и его выгрузки."""
+import io
+import json
+import time
+
+import pytest
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.vakio_base_smart.api import Coordinator
+from custom_components.vakio_base_smart.const import DEFAULT_LANGUAGE, SPEED_MAX
+from custom_components.vakio_base_smart.history import (
+    History,
+    HistorySample,
+    write_csv,
+    write_jsonl,
+)
+from custom_components.vakio_base_smart.services import _export_path, _write_history
+from custom_components.vakio_base_smart.types import ConditionResponse
+
+CONDITION = ConditionResponse(Available=True, State=True, Speed=3, Work="night")
+
+
+def test_add():
+    history = History(retention=60)
+
+    history.Add(100, "vakio", CONDITION)
+    history.Add(101, "hall", ConditionResponse(Work="turbo"))
+    history.Add(102, "vakio", None)
+    history.Add(103, "vakio", ConditionResponse(Speed=SPEED_MAX, Work="inflow_max"))
+    history.Add(104, "vakio", ConditionResponse(Speed=1000))
+
+    assert list(history.Samples(104)) == [
+        HistorySample(100, "vakio", True, 3, "night", True),
+        HistorySample(101, "hall", False, 0, None, False),
+        HistorySample(102, "vakio", None, None, None, False),
+        HistorySample(103, "vakio", False, SPEED_MAX, "inflow_max", False),
+        HistorySample(104, "vakio", False, None, None, False),
+    ]
+
+
+def test_capacity():
+    history = History(retention=60, capacity=3)
+
+    for n in range(5):
+        history.Add(100 + n, f"d{n}", CONDITION)
+
+    assert len(history) == 3
+    assert [s.Device for s in history.Samples(104)] == ["d2", "d3", "d4"]
+
+
+def test_retention():
+    history = History(retention=10, capacity=5)
+    for n in range(4):
+        history.Add(100 + n * 5, "vakio", CONDITION)
+
+    # Отсчёты вытесняются при записи, а при чтении пропускаются устаревшие.
+    assert len(history) == 3
+    assert [s.At for s in history.Samples(121)] == [115]
+
+
+def test_copy():
+    history = History(retention=60)
+    history.Add(100, "vakio", CONDITION)
+
+    copy = history.Copy()
+    history.Add(101, "vakio", None)
+
+    assert len(copy) == 1
+    assert [s.Device for s in copy.Samples(101)] == ["vakio"]
+
+
+def test_export():
+    samples = [
+        HistorySample(0, "vakio", True, 3, "night", True),
+        HistorySample(1.5, "vakio", None, None, None, False),
+    ]
+    csv_stream, jsonl_stream = io.StringIO(), io.StringIO()
+
+    assert write_csv(iter(samples), csv_stream) == 2
+    assert write_jsonl(iter(samples), jsonl_stream) == 2
+
+    assert csv_stream.getvalue().splitlines() == [
+        "time,device,state,speed,workmode,available",
+        "1970-01-01T00:00:00+00:00,vakio,True,3,night,True",
+        "1970-01-01T00:00:01.500000+00:00,vakio,,,,False",
+    ]
+    rows = [json.loads(line) for line in jsonl_stream.getvalue().splitlines()]
+    assert rows[0] == {
+        "time": "1970-01-01T00:00:00+00:00",
+        "device": "vakio",
+        "state": True,
+        "speed": 3,
+        "workmode": "night",
+        "available": True,
+    }
+
+
+def test_coordinator_history(hass, run, bridge):
+    fake = bridge(devices=2)
+
+    async def create_coordinator() -> Coordinator:
+        coordinator = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE)
+        await coordinator.async_refresh()
+        return coordinator
+
+    coordinator = run(create_coordinator())
+    fake.devices["vakio1"]["speed"] = 5
+    fake.devices["vakio"]["ping"]["loss"] = 5
+    run(coordinator.async_refresh())
+
+    samples = list(coordinator.history.Samples(time.time()))
+
+    # Изменение только телеметрии в историю не записывается.
+    assert [(s.Device, s.Speed) for s in samples] == [
+        ("vakio", 3),
+        ("vakio1", 3),
+        ("vakio1", 5),
+    ]
+
+
+def test_coordinator_history_command(hass, run, bridge):
+    fake = bridge(devices=1)
+
+    async def create_coordinator() -> Coordinator:
+        coordinator = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE)
+        await coordinator.async_refresh()
+        return coordinator
+
+    coordinator = run(create_coordinator())
+
+    assert run(coordinator.SetSpeed("vakio", 6)) is True
+    run(coordinator.async_refresh())
+
+    # Состояние после команды записано один раз, подтверждение не повторяется.
+    samples = list(coordinator.history.Samples(time.time()))
+    assert [(s.Device, s.Speed) for s in samples] == [("vakio", 3), ("vakio", 6)]
+
+
+def test_export_path(hass, tmp_path):
+    path, exclusive = _export_path(hass, "history.csv")
+
+    assert path == tmp_path / "vakio_history" / "history.csv"
+    assert exclusive is False
+    # Файлы конфигурации и пути вне разрешённых каталогов недоступны.
+    for filename in ("../configuration.yaml", "../.storage/core.config", "/etc/x"):
+        with pytest.raises(ServiceValidationError):
+            _export_path(hass, filename)
+
+
+def test_export_no_overwrite(tmp_path):
+    path = tmp_path / "configuration.yaml"
+    path.write_text("homeassistant:\n")
+
+    with pytest.raises(FileExistsError):
+        _write_history(path, "csv", [History(retention=60)], time.time(), True)
+    assert path.read_text() == "homeassistant:\n"
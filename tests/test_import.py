@@ -0,0 +1,80 @@
+"""
+Проверка модулей, загружаемых импортом интеграции, по данным
+python -X importtime. Модули Home Assistant, которые загружаются при запуске
+независимо от интеграции, импортируются заранее и в проверку не входят.
+Проверяется состав модулей, а не время импорта: время зависит от нагрузки
+машины, а состав - только от кода интеграции.
+"""
+import subprocess
+import sys
+
+from tests.conftest import ROOT
+
+PACKAGE: str = "custom_components.vakio_base_smart"
+# Модули, загружаемые Home Assistant до настройки интеграций с координатором.
+PRELOADED: tuple[str, ...] = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.update_coordinator",
+)
+# Модули, которые не должны загружаться при импорте интеграции: платформы и
+# настройка загружаются Home Assistant отдельно, MQTT - только при его выборе.
+LAZY: tuple[str, ...] = (
+    f"{PACKAGE}.config_flow",
+    f"{PACKAGE}.fan",
+    f"{PACKAGE}.sensor",
+    f"{PACKAGE}.switch",
+    "homeassistant.components.fan",
+    "homeassistant.components.mqtt",
+)
+# Модули вне интеграции, которые разрешено загружать её импортом сверх
+# предварительно загруженных.
+ALLOWED: tuple[str, ...] = (
+    "custom_components",
+    "homeassistant.helpers.aiohttp_client",
+)
+
+
+def imported(module: str) -> list[str]:
+    """
+    Импорт модуля в отдельном процессе после предварительно загруженных модулей,
+    возвращаются модули, загруженные импортом, в порядке завершения загрузки.
+    """
+    command = [
+        sys.executable,
+        "-X",
+        "importtime",
+        "-c",
+        f"import {', '.join(PRELOADED)}; import {module}",
+    ]
+    result = subprocess.run(
+        command, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    names: list[str] = [
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    ]
+    start = max(names.index(name) for name in PRELOADED)
+
+    return names[start + 1 :]
+
+
+def test_lazy_imports():
+    modules = imported(PACKAGE)
+
+    assert PACKAGE in modules
+    assert [module for module in LAZY if module in modules] == []
+
+
+def test_import_modules():
+    modules = imported(PACKAGE)
+
+    assert [
+        module
+        for module in modules
+        if module != PACKAGE
+        and not module.startswith(f"{PACKAGE}.")
+        and module not in ALLOWED
+    ] == []
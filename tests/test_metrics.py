@@ -0,0 +1,31 @@
+"""Проверка показателей работы координатора."""
+from custom_components.vakio_base_smart.metrics import Metrics
+
+
+def test_empty():
+    metrics = Metrics()
+
+    assert metrics.PollLatency() is None
+    assert metrics.ErrorRate() is None
+    assert metrics.CommandRoundTrip() is None
+
+
+def test_window():
+    metrics = Metrics(window=4)
+    calls: list[None] = []
+    unsubscribe = metrics.AddListener(lambda: calls.append(None))
+
+    metrics.Poll(0.010, True)
+    metrics.Poll(0.030, True)
+    metrics.Poll(5, False)
+    metrics.Command(False)
+    metrics.RoundTrip(1.5)
+    unsubscribe()
+    metrics.Poll(0.020, True)
+
+    assert len(calls) == 5
+    # Длительность ошибочного опроса не учитывается.
+    assert metrics.PollLatency() == 20
+    # Первый результат вытеснен из окна.
+    assert metrics.ErrorRate() == 50
+    assert metrics.CommandRoundTrip() == 1.5
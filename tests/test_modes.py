@@ -0,0 +1,154 @@
+"""Проверка таблиц режимов работы и скоростей вентиляционной системы."""
+import pytest
+
+from homeassistant.components.fan import DIRECTION_FORWARD, DIRECTION_REVERSE
+from homeassistant.util.percentage import (
+    ordered_list_item_to_percentage,
+    percentage_to_ordered_list_item,
+)
+
+from custom_components.vakio_base_smart.const import (
+    FAN_MODE_INFLOW,
+    FAN_MODE_INFLOW_MAX,
+    FAN_MODE_NIGHT,
+    FAN_MODE_OFF,
+    FAN_MODE_OUTFLOW,
+    FAN_MODE_RECUPERATOR,
+    FAN_MODE_WINTER,
+    SERVER_WORK_TO_FAN_MODE,
+    SPEED_MAX,
+)
+from custom_components.vakio_base_smart.modes import (
+    ACTION_FORWARD,
+    ACTION_OSCILLATE_OFF,
+    ACTION_OSCILLATE_ON,
+    ACTION_REVERSE,
+    ACTION_TURN_ON,
+    FAN_MODE_TO_SERVER_WORK,
+    INFLOW_MODES,
+    MODE_STATE,
+    MODES,
+    OUTFLOW_MODES,
+    RECUPERATION_MODES,
+    TRANSITIONS,
+    Transition,
+    speed_table,
+)
+
+
+def test_reverse_map():
+    for work, mode in SERVER_WORK_TO_FAN_MODE.items():
+        assert FAN_MODE_TO_SERVER_WORK[mode] == work
+    assert len(FAN_MODE_TO_SERVER_WORK) == len(SERVER_WORK_TO_FAN_MODE)
+
+
+def test_categories_are_disjoint():
+    assert not INFLOW_MODES & OUTFLOW_MODES
+    assert not INFLOW_MODES & RECUPERATION_MODES
+    assert not OUTFLOW_MODES & RECUPERATION_MODES
+
+
+def test_table_is_complete():
+    for mode in MODES:
+        for action in (
+            ACTION_FORWARD,
+            ACTION_REVERSE,
+            ACTION_OSCILLATE_ON,
+            ACTION_OSCILLATE_OFF,
+            ACTION_TURN_ON,
+        ):
+            transition = TRANSITIONS[(mode, action)]
+            state = MODE_STATE[transition.preset_mode]
+            assert transition.direction == state.direction
+            assert transition.oscillating == state.oscillating
+
+
+@pytest.mark.parametrize(
+    "mode, action, expected",
+    [
+        # Направление уже соответствует режиму: команда не нужна.
+        (
+            FAN_MODE_INFLOW_MAX,
+            ACTION_FORWARD,
+            Transition(FAN_MODE_INFLOW_MAX, DIRECTION_FORWARD, False, None),
+        ),
+        (
+            FAN_MODE_INFLOW_MAX,
+            ACTION_REVERSE,
+            Transition(FAN_MODE_OUTFLOW, DIRECTION_REVERSE, False, "outflow"),
+        ),
+        (
+            FAN_MODE_NIGHT,
+            ACTION_FORWARD,
+            Transition(FAN_MODE_INFLOW, DIRECTION_FORWARD, False, "inflow"),
+        ),
+        (
+            FAN_MODE_OUTFLOW,
+            ACTION_OSCILLATE_ON,
+            Transition(FAN_MODE_RECUPERATOR, None, True, "recuperator"),
+        ),
+        (
+            FAN_MODE_WINTER,
+            ACTION_OSCILLATE_ON,
+            Transition(FAN_MODE_WINTER, None, True, None),
+        ),
+        (
+            FAN_MODE_WINTER,
+            ACTION_OSCILLATE_OFF,
+            Transition(FAN_MODE_INFLOW, DIRECTION_FORWARD, False, "inflow"),
+        ),
+        (
+            FAN_MODE_OUTFLOW,
+            ACTION_OSCILLATE_OFF,
+            Transition(FAN_MODE_OUTFLOW, DIRECTION_REVERSE, False, None),
+        ),
+        (
+            None,
+            ACTION_TURN_ON,
+            Transition(FAN_MODE_INFLOW, DIRECTION_FORWARD, False, "inflow"),
+        ),
+        (
+            FAN_MODE_OFF,
+            ACTION_TURN_ON,
+            Transition(FAN_MODE_INFLOW, DIRECTION_FORWARD, False, "inflow"),
+        ),
+        (
+            FAN_MODE_RECUPERATOR,
+            ACTION_TURN_ON,
+            Transition(FAN_MODE_RECUPERATOR, None, True, None),
+        ),
+    ],
+)
+def test_transition(mode, action, expected):
+    assert TRANSITIONS[(mode, action)] == expected
+
+
+@pytest.mark.parametrize("count", [3, 7, 10])
+def test_speed_table(count):
+    speeds = list(range(1, count + 1))
+    table = speed_table(count)
+
+    # Таблица совпадает с функциями Home Assistant, по которым она построена.
+    for speed in speeds:
+        assert table.Percentage(speed) == ordered_list_item_to_percentage(
+            speeds, speed
+        )
+    for percentage in range(1, 101):
+        assert table.Speed(percentage) == percentage_to_ordered_list_item(
+            speeds, percentage
+        )
+    assert table.count == count
+    assert speed_table(count) is table
+
+
+@pytest.mark.parametrize(
+    "speed, percentage",
+    [(0, 0), (1, 14), (7, 100), (SPEED_MAX, 100), (8, None), (-1, None), (2.5, None)],
+)
+def test_speed_percentage(speed, percentage):
+    assert speed_table(7).Percentage(speed) == percentage
+
+
+@pytest.mark.parametrize("percentage, speed", [(0, 0), (14, 1), (15, 2), (150, 7)])
+def test_percentage_speed(percentage, speed):
+    assert speed_table(7).Speed(percentage) == speed
@@ -0,0 +1,70 @@
+"""Проверка разбора сообщений MQTT топиков вентиляционной системы."""
+import pytest
+
+from custom_components.vakio_base_smart.mqtt_transport import (
+    SPEED_MAX,
+    apply_message,
+    parse_devices,
+)
+from custom_components.vakio_base_smart.types import ConditionResponse
+
+
+def test_parse_devices():
+    assert parse_devices("kitchen=192.168.1.2, hall ") == ["kitchen", "hall"]
+    assert parse_devices("/vakio/") == ["vakio"]
+
+
+@pytest.mark.parametrize("value", ["=192.168.1.2", "vakio vakio", "vakio/x", "vakio#"])
+def test_parse_devices_invalid(value):
+    with pytest.raises(ValueError):
+        parse_devices(value)
+
+
+def test_apply_message():
+    condition = apply_message(ConditionResponse(), "state", "ON")
+    condition = apply_message(condition, "speed", "4")
+    condition = apply_message(condition, "workmode", "night")
+
+    assert condition.State is True
+    assert condition.Speed == 4
+    assert condition.Work == "night"
+    assert condition.Available is True
+    assert condition.LastActivityAt is not None
+
+
+@pytest.mark.parametrize("payload", ["3\n", " 3", "3\r\n"])
+def test_apply_speed_whitespace(payload):
+    assert apply_message(ConditionResponse(), "speed", payload).Speed == 3
+
+
+@pytest.mark.parametrize(
+    "mode, state, speed, work",
+    [
+        ("06000", False, 0, "inflow"),
+        ("06022", True, SPEED_MAX, "inflow_max"),
+        ("06503", True, 3, "inflow"),
+    ],
+)
+def test_apply_mode(mode, state, speed, work):
+    condition = ConditionResponse(State=True, Speed=1, Work="inflow")
+
+    condition = apply_message(condition, "mode", mode)
+
+    assert (condition.State, condition.Speed, condition.Work) == (state, speed, work)
+    assert condition.Mode == mode
+
+
+@pytest.mark.parametrize(
+    "name, payload",
+    [
+        ("state", "maybe"),
+        ("speed", "-1"),
+        ("workmode", "turbo"),
+        ("mode", "06999"),
+        ("system", "9999"),
+        ("unknown", "on"),
+    ],
+)
+def test_apply_message_invalid(name, payload):
+    with pytest.raises(ValueError):
+        apply_message(ConditionResponse(), name, payload)
@@ -0,0 +1,101 @@
+"""Проверка недельных программ устройств, выполняемых сервером."""
+import datetime
+
+import pytest
+import voluptuous as vol
+
+from custom_components.vakio_base_smart.api import Coordinator
+from custom_components.vakio_base_smart.const import DEFAULT_LANGUAGE
+from custom_components.vakio_base_smart.services import (
+    SET_SCHEDULE_SCHEMA,
+    _schedule_slot,
+)
+from custom_components.vakio_base_smart.types import (
+    Error,
+    Schedule,
+    ScheduleSlot,
+    UnsupportedEndpoint,
+)
+
+SCHEDULE = Schedule(
+    Enabled=True,
+    Slots=(
+        ScheduleSlot(At="07:00", Days=(1, 2, 3, 4, 5), State=True, Speed=4),
+        ScheduleSlot(At="22:00", Work="night"),
+    ),
+)
+
+
+async def create_coordinator(hass, fake) -> Coordinator:
+    coordinator = Coordinator(hass, "", "", fake.url, DEFAULT_LANGUAGE)
+    await coordinator.async_refresh()
+    return coordinator
+
+
+def test_dump_round_trip():
+    data = SCHEDULE.Dump()
+
+    assert data["slots"][1] == {"at": "22:00", "workmode": "night"}
+    assert Schedule.Parse(data) == SCHEDULE
+
+
+def test_service_slot():
+    data = SET_SCHEDULE_SCHEMA(
+        {
+            "entity_id": "fan.vakio",
+            "slots": [{"at": "7:05", "days": ["sun", "mon", "sat"], "speed": "2"}],
+        }
+    )
+
+    assert data["enabled"] is True
+    assert data["slots"][0]["at"] == datetime.time(7, 5)
+    assert _schedule_slot(data["slots"][0]) == ScheduleSlot(
+        At="07:05", Days=(0, 1, 6), Speed=2
+    )
+
+
+def test_service_slot_speed_limit():
+    # Скорость слота ограничена именованными скоростями сервера.
+    with pytest.raises(vol.Invalid):
+        SET_SCHEDULE_SCHEMA(
+            {"entity_id": "fan.vakio", "slots": [{"at": "07:00", "speed": 8}]}
+        )
+
+
+def test_set_schedule(hass, run, bridge):
+    fake = bridge(devices=2)
+    coordinator = run(create_coordinator(hass, fake))
+
+    assert run(coordinator.async_refresh_schedules()) is True
+    assert coordinator.schedules == {"vakio": Schedule(), "vakio1": Schedule()}
+    assert run(coordinator.async_set_schedule("vakio1", SCHEDULE)) is True
+    assert fake.commands == [("/devices/vakio1/schedule", SCHEDULE.Dump())]
+    assert coordinator.schedules["vakio1"] == SCHEDULE
+    # Программа хранится на сервере.
+    coordinator.schedules = None
+    run(coordinator.async_refresh_schedules())
+    assert coordinator.schedules["vakio1"] == SCHEDULE
+
+
+def test_unsupported(hass, run, bridge):
+    fake = bridge(devices=1, schedules=False)
+    coordinator = run(create_coordinator(hass, fake))
+
+    assert run(coordinator.async_refresh_schedules()) is False
+    assert coordinator.schedules is None
+    # Отсутствие метода у сервера не считается ошибкой связи.
+    assert coordinator.api.breaker.Failures == 0
+    # Повторный запрос к серверу без поддержки программ не выполняется.
+    assert coordinator.api._schedules is False
+
+
+def test_unsupported_endpoint(hass, run, bridge):
+    fake = bridge(devices=1, schedules=False)
+    coordinator = run(create_coordinator(hass, fake))
+
+    with pytest.raises(UnsupportedEndpoint) as info:
+        run(coordinator.api._get("/schedules", dict, optional=True))
+
+    assert isinstance(info.value, Error)
+    assert info.value.endpoint == "/schedules"
+    assert coordinator.api.breaker.Failures == 0
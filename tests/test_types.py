@@ -0,0 +1,67 @@
+"""Проверка разбора и сравнения состояния вентиляционной системы."""
+import dataclasses
+
+from custom_components.vakio_base_smart.types import (
+    CONDITION_FIELDS,
+    ConditionResponse,
+)
+
+
+RESPONSE: dict = {
+    "last_activity_at": "2024-05-01T12:34:56.123456789+03:00",
+    "available": True,
+    "speed": 3,
+    "state": "on",
+    "work": "inflow",
+    "mode": "",
+    "command": "",
+    "ping": {
+        "samples": 3,
+        "rtt_min": None,
+        "rtt_avg": None,
+        "rtt_max": None,
+        "loss": 100,
+        "last_at": "2024-05-01T12:34:30Z",
+    },
+}
+
+
+def test_parse_ignores_unknown_fields():
+    condition = ConditionResponse.Parse({**RESPONSE, "unknown": 1})
+
+    assert condition.State is True
+    assert condition.Speed == 3
+    assert condition.LastActivityAt.microsecond == 123456
+    assert condition.Ping.Loss == 100
+    assert condition.Ping.RttAvg is None
+
+
+def test_dump_round_trip():
+    condition = ConditionResponse.Parse(RESPONSE)
+
+    assert ConditionResponse.Parse(condition.Dump()) == condition
+    assert ConditionResponse.Parse({**RESPONSE, "ping": None}).Ping is None
+
+
+def test_equality_ignores_activity():
+    condition = ConditionResponse.Parse(RESPONSE)
+    other = ConditionResponse.Parse(
+        {
+            **RESPONSE,
+            "last_activity_at": "2024-05-02T00:00:00Z",
+            "command": "x",
+            "ping": {**RESPONSE["ping"], "last_at": "2024-05-02T00:00:00Z"},
+        }
+    )
+
+    assert condition == other
+    assert not condition.Diff(other)
+
+
+def test_diff():
+    condition = ConditionResponse.Parse(RESPONSE)
+
+    assert condition.Diff(None) == CONDITION_FIELDS
+    assert dataclasses.replace(condition, Speed=5, Work="night").Diff(
+        condition
+    ) == {"Speed", "Work"}